@@ -0,0 +1,70 @@
+"""Compare two benchmark results and fail on regressions.
+
+    python benchmarks/compare.py baseline.json current.json --threshold 0.10 --metric p50
+
+Accepts micro.py JSON files or the *_stats.csv written by `locust --csv`.
+Exits with status 1 when any case present in both files got slower than the
+threshold (a fraction: 0.10 = 10%).
+"""
+import argparse
+import csv
+import json
+import sys
+
+METRICS = ('mean', 'p50', 'p95', 'p99')
+# locust reports milliseconds
+LOCUST_COLUMNS = {'mean': 'Average Response Time', 'p50': 'Median Response Time', 'p95': '95%', 'p99': '99%'}
+
+
+def load(path):
+    if path.endswith('.csv'):
+        with open(path, newline='') as f:
+            return {'%s %s' % (row['Type'], row['Name']): {metric: float(row[column]) / 1000
+                                                          for metric, column in LOCUST_COLUMNS.items()}
+                    for row in csv.DictReader(f) if row['Name'] != 'Aggregated'}
+    with open(path) as f:
+        return json.load(f)['results']
+
+
+def compare(baseline, current, metric, threshold):
+    rows = []
+    regressions = []
+    for name in sorted(set(baseline) | set(current)):
+        if name not in baseline or name not in current:
+            rows.append((name, baseline.get(name, {}).get(metric), current.get(name, {}).get(metric), None, 'only in one'))
+            continue
+        before, after = baseline[name][metric], current[name][metric]
+        change = (after - before) / before if before else 0.0
+        status = 'REGRESSION' if change > threshold else ('faster' if change < -threshold else '')
+        if status == 'REGRESSION':
+            regressions.append(name)
+        rows.append((name, before, after, change, status))
+    return rows, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('baseline')
+    parser.add_argument('current')
+    parser.add_argument('--metric', choices=METRICS, default='p50')
+    parser.add_argument('--threshold', type=float, default=0.10)
+    args = parser.parse_args()
+
+    rows, regressions = compare(load(args.baseline), load(args.current), args.metric, args.threshold)
+
+    def ms(value):
+        return '%10.2f' % (value * 1000) if value is not None else '%10s' % '-'
+
+    print('%-32s %10s %10s %8s' % ('case', 'before ms', 'after ms', 'change'))
+    for name, before, after, change, status in rows:
+        print('%-32s %s %s %8s  %s' % (name, ms(before), ms(after),
+                                        '%+.1f%%' % (change * 100) if change is not None else '', status))
+
+    if regressions:
+        print('\n%d case(s) regressed more than %.0f%% on %s: %s' % (
+            len(regressions), args.threshold * 100, args.metric, ', '.join(regressions)))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
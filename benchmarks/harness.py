@@ -0,0 +1,41 @@
+import os
+import subprocess
+import sys
+
+# Shared setup for the benchmark scripts. The app reads its configuration at
+# import time, so the environment has to be settled before `import app`.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC = os.path.join(ROOT, 'src')
+MIGRATIONS = os.path.join(ROOT, 'migrations')
+
+DEFAULT_DATABASE_URL = 'sqlite:////tmp/benchmark.db'
+# The app refuses to start without a signing key; this one only ever signs benchmark tokens
+BENCH_JWT_SECRET_KEY = 'benchmark-only-signing-key'
+# Every seeded user has this password
+BENCH_PASSWORD = os.getenv('BENCH_PASSWORD', 'benchmark-password')
+
+
+def user_email(index):
+    return 'user%d@bench.local' % index
+
+
+def load_app(migrations=False):
+    os.environ.setdefault('DATABASE_URL', DEFAULT_DATABASE_URL)
+    os.environ.setdefault('JWT_SECRET_KEY', BENCH_JWT_SECRET_KEY)
+    # Measure the handlers, not the response cache (set CACHE_BACKEND=memory to bench cache hits)
+    os.environ.setdefault('CACHE_BACKEND', 'none')
+    # The login and signup cases would trip the per-IP limits within a few iterations
+    os.environ.setdefault('RATE_LIMIT_ENABLED', '0')
+    if SRC not in sys.path:
+        sys.path.insert(0, SRC)
+    from app import create_app
+    return create_app(migrations=migrations)
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
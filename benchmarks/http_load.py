@@ -0,0 +1,127 @@
+"""Closed-loop HTTP load generator for comparing server/worker configurations.
+
+    python benchmarks/http_load.py --url http://localhost:8000 --scenario catalog --scenario login \\
+        --concurrency 32 --duration 20 --output results/gthread.json
+
+Each of --concurrency threads sends one request at a time for --duration seconds
+over a keep-alive connection. Uses only the standard library, so it runs anywhere
+the API does; results use the micro.py format and work with compare.py.
+"""
+import argparse
+import http.client
+import json
+import random
+import statistics
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+from harness import BENCH_PASSWORD, git_commit, user_email
+
+
+def catalog_request(rng, sizes):
+    collection = rng.choice(('planets', 'characters', 'vehicles'))
+    if rng.random() < 0.5:
+        return 'GET', '/%s?limit=100' % collection, None
+    return 'GET', '/%s/%d' % (collection, rng.randint(1, sizes[collection])), None
+
+
+def login_request(rng, sizes):
+    body = {'email': user_email(rng.randint(1, sizes['users'])), 'password': BENCH_PASSWORD}
+    return 'POST', '/login', body
+
+
+SCENARIOS = {'catalog': catalog_request, 'login': login_request}
+
+
+def worker(url, scenario, sizes, deadline, seed, timings, errors):
+    rng = random.Random(seed)
+    connection = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=60)
+    while time.perf_counter() < deadline:
+        method, path, body = scenario(rng, sizes)
+        payload = json.dumps(body) if body is not None else None
+        headers = {'Content-Type': 'application/json'} if body is not None else {}
+        start = time.perf_counter()
+        try:
+            connection.request(method, path, body=payload, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            ok = response.status < 400
+        except (OSError, http.client.HTTPException):
+            connection.close()
+            connection = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=60)
+            ok = False
+        timings.append(time.perf_counter() - start)
+        if not ok:
+            errors.append(1)
+    connection.close()
+
+
+def run(url, name, concurrency, duration, sizes):
+    timings, errors = [], []
+    deadline = time.perf_counter() + duration
+    threads = [threading.Thread(target=worker, args=(url, SCENARIOS[name], sizes, deadline, i, timings, errors))
+               for i in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    timings.sort()
+
+    def percentile(fraction):
+        return timings[min(len(timings) - 1, int(round(fraction * (len(timings) - 1))))]
+
+    return {
+        'requests': len(timings),
+        'errors': len(errors),
+        'requests_per_sec': len(timings) / elapsed,
+        'mean': statistics.fmean(timings),
+        'p50': percentile(0.50),
+        'p95': percentile(0.95),
+        'p99': percentile(0.99),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://localhost:8000')
+    parser.add_argument('--scenario', action='append', choices=sorted(SCENARIOS))
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=20)
+    parser.add_argument('--label', help='free text stored in meta, e.g. the worker configuration')
+    parser.add_argument('--output', help='write the JSON results here (default: stdout)')
+    # Must match the seed sizes (ids start at 1 on a fresh database)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--planets', type=int, default=500)
+    parser.add_argument('--characters', type=int, default=2000)
+    parser.add_argument('--vehicles', type=int, default=500)
+    args = parser.parse_args()
+
+    url = urlsplit(args.url)
+    sizes = {'users': args.users, 'planets': args.planets, 'characters': args.characters, 'vehicles': args.vehicles}
+    results = {}
+    for name in args.scenario or sorted(SCENARIOS):
+        results[name] = stats = run(url, name, args.concurrency, args.duration, sizes)
+        print('%-10s %8.1f req/s  p50 %8.2fms  p95 %8.2fms  p99 %8.2fms  %d errors' % (
+            name, stats['requests_per_sec'], stats['p50'] * 1000, stats['p95'] * 1000, stats['p99'] * 1000,
+            stats['errors']), file=sys.stderr)
+
+    report = {
+        'meta': {'commit': git_commit(), 'created_at': datetime.now(timezone.utc).isoformat(), 'url': args.url,
+                 'label': args.label, 'concurrency': args.concurrency, 'duration': args.duration},
+        'results': results,
+    }
+    output = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
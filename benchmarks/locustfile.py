@@ -0,0 +1,69 @@
+"""Mixed load scenario: catalog reads, logins and favorite writes.
+
+    python benchmarks/seed.py --reset
+    RATE_LIMIT_ENABLED=0 gunicorn &
+    locust -f benchmarks/locustfile.py --host http://localhost:8000 --headless \\
+        -u 200 -r 20 -t 2m --csv results/<commit>
+
+BENCH_USERS / BENCH_CHARACTERS / BENCH_PLANETS / BENCH_VEHICLES must match the
+seed sizes so requests hit existing rows (ids start at 1 on a fresh database).
+"""
+import os
+import random
+from locust import HttpUser, between, task
+
+BENCH_PASSWORD = os.getenv('BENCH_PASSWORD', 'benchmark-password')
+USERS = int(os.getenv('BENCH_USERS', 1000))
+PLANETS = int(os.getenv('BENCH_PLANETS', 500))
+CHARACTERS = int(os.getenv('BENCH_CHARACTERS', 2000))
+VEHICLES = int(os.getenv('BENCH_VEHICLES', 500))
+SEARCH_TERMS = ('reb', 'jedi', 'hidden moon', 'droid', 'outer rim')
+
+
+class ApiUser(HttpUser):
+    wait_time = between(0.1, 1)
+
+    def on_start(self):
+        self.user_index = random.randint(1, USERS)
+        self.user_id = None
+        self.login()
+
+    @task(1)
+    def login(self):
+        response = self.client.post('/login', json={'email': 'user%d@bench.local' % self.user_index,
+                                                    'password': BENCH_PASSWORD})
+        if response.status_code == 200:
+            self.user_id = response.json()['user']['id']
+
+    @task(10)
+    def list_catalog(self):
+        collection = random.choice(('planets', 'characters', 'vehicles'))
+        self.client.get('/%s?limit=100' % collection, name='/%s' % collection)
+
+    @task(8)
+    def catalog_detail(self):
+        collection, count = random.choice((('planets', PLANETS), ('characters', CHARACTERS), ('vehicles', VEHICLES)))
+        self.client.get('/%s/%d' % (collection, random.randint(1, count)), name='/%s/<id>' % collection)
+
+    @task(3)
+    def search(self):
+        self.client.get('/search', params={'q': random.choice(SEARCH_TERMS)}, name='/search')
+
+    @task(2)
+    def user_favorites(self):
+        if self.user_id:
+            self.client.get('/users/%d/favorites' % self.user_id, name='/users/<id>/favorites')
+
+    @task(2)
+    def toggle_favorite(self):
+        if not self.user_id:
+            return
+        with self.client.post('/character-favorite-lists', name='/character-favorite-lists',
+                              json={'user_id': self.user_id, 'character_id': random.randint(1, CHARACTERS)},
+                              catch_response=True) as response:
+            if response.status_code == 409:
+                response.success()  # already a favorite: expected under a random workload
+                return
+        if response.status_code == 201:
+            self.client.delete('/character-favorite-lists/%d' % response.json()['favorite_list']['id'],
+                               name='/character-favorite-lists/<id>')
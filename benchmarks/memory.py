@@ -0,0 +1,155 @@
+"""Per-worker memory of gunicorn with and without preload_app (Linux only).
+
+    python benchmarks/seed.py --reset
+    python benchmarks/memory.py --workers 4 --duration 20 --output results/memory.json
+
+Boots `gunicorn` (gunicorn.conf.py) once per mode, reads /proc/<pid>/smaps_rollup
+of the master and every worker right after boot and again after --duration seconds
+of catalog traffic, then stops it. RSS counts every page a process maps, shared or
+not; PSS splits each shared page between the processes sharing it, so the sum of
+PSS over master and workers is what the deployment really costs. A growing
+Private_Dirty after traffic is shared memory the workers copied on write.
+
+The modes run with CATALOG_SNAPSHOT=1 unless the environment says otherwise.
+"""
+import argparse
+import http.client
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+from harness import BENCH_JWT_SECRET_KEY, DEFAULT_DATABASE_URL, ROOT, git_commit
+from http_load import run as generate_load
+
+MODES = {
+    'no-preload': {'GUNICORN_PRELOAD': '0'},
+    'preload': {'GUNICORN_PRELOAD': '1'},
+}
+FIELDS = ('Rss', 'Pss', 'Shared_Clean', 'Shared_Dirty', 'Private_Clean', 'Private_Dirty')
+
+
+def smaps(pid):
+    # {field: kB}
+    values = {}
+    with open('/proc/%d/smaps_rollup' % pid) as f:
+        for line in f:
+            name, _, rest = line.partition(':')
+            if name in FIELDS:
+                values[name] = int(rest.split()[0])
+    return values
+
+
+def children(pid):
+    found = []
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open('/proc/%s/stat' % entry) as f:
+                # pid (comm) state ppid ...; comm may contain spaces
+                if int(f.read().rsplit(')', 1)[1].split()[1]) == pid:
+                    found.append(int(entry))
+        except (OSError, IndexError, ValueError):
+            continue
+    return sorted(found)
+
+
+def sample(master):
+    workers = children(master)
+    processes = {'master': smaps(master)}
+    processes.update({'worker %d' % index: smaps(pid) for index, pid in enumerate(workers, 1)})
+    worker_values = [values for name, values in processes.items() if name != 'master']
+    return {
+        'processes': processes,
+        'worker_rss_mean': sum(values['Rss'] for values in worker_values) / max(len(worker_values), 1),
+        'worker_pss_mean': sum(values['Pss'] for values in worker_values) / max(len(worker_values), 1),
+        'worker_private_dirty_mean': sum(values['Private_Dirty'] for values in worker_values) / max(len(worker_values), 1),
+        'total_pss': sum(values['Pss'] for values in processes.values()),
+    }
+
+
+def wait_until_up(url, workers, master, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection(url.hostname, url.port, timeout=5)
+            connection.request('GET', '/planets/1')
+            connection.getresponse().read()
+            connection.close()
+            if len(children(master)) >= workers:
+                return
+        except (OSError, http.client.HTTPException):
+            pass
+        time.sleep(0.5)
+    raise SystemExit('gunicorn did not come up within %d seconds' % timeout)
+
+
+def measure(mode, args, sizes):
+    port = args.port
+    env = dict(os.environ, WEB_CONCURRENCY=str(args.workers), PORT=str(port), RATE_LIMIT_ENABLED='0')
+    env.setdefault('DATABASE_URL', DEFAULT_DATABASE_URL)
+    env.setdefault('JWT_SECRET_KEY', BENCH_JWT_SECRET_KEY)
+    env.setdefault('CACHE_BACKEND', 'none')
+    env.setdefault('CATALOG_SNAPSHOT', '1')
+    env.update(MODES[mode])
+    server = subprocess.Popen(['gunicorn'], cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = urlsplit('http://localhost:%d' % port)
+    try:
+        wait_until_up(url, args.workers, server.pid)
+        time.sleep(1)  # let every worker finish booting
+        boot = sample(server.pid)
+        traffic = generate_load(url, 'catalog', args.concurrency, args.duration, sizes)
+        after = sample(server.pid)
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=30)
+    return {'boot': boot, 'after_traffic': after, 'traffic': traffic}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mode', action='append', choices=sorted(MODES))
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=20)
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--output', help='write the JSON results here (default: stdout)')
+    # Must match the seed sizes (ids start at 1 on a fresh database)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--planets', type=int, default=500)
+    parser.add_argument('--characters', type=int, default=2000)
+    parser.add_argument('--vehicles', type=int, default=500)
+    args = parser.parse_args()
+
+    sizes = {'users': args.users, 'planets': args.planets, 'characters': args.characters, 'vehicles': args.vehicles}
+    results = {}
+    print('%-10s %-13s %10s %10s %14s %10s' % ('mode', 'phase', 'RSS/worker', 'PSS/worker', 'PrivDirty/wkr',
+                                              'total PSS'), file=sys.stderr)
+    for mode in args.mode or ['no-preload', 'preload']:
+        results[mode] = measure(mode, args, sizes)
+        for phase in ('boot', 'after_traffic'):
+            stats = results[mode][phase]
+            print('%-10s %-13s %8.1fMB %8.1fMB %12.1fMB %8.1fMB' % (
+                mode, phase, stats['worker_rss_mean'] / 1024, stats['worker_pss_mean'] / 1024,
+                stats['worker_private_dirty_mean'] / 1024, stats['total_pss'] / 1024), file=sys.stderr)
+
+    report = {
+        'meta': {'commit': git_commit(), 'created_at': datetime.now(timezone.utc).isoformat(),
+                 'workers': args.workers, 'concurrency': args.concurrency, 'duration': args.duration,
+                 'catalog_snapshot': os.getenv('CATALOG_SNAPSHOT', '1')},
+        'results': results,
+    }
+    output = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
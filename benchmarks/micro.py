@@ -0,0 +1,188 @@
+"""Micro-benchmarks for each route family, run in-process with the Flask test client.
+
+    python benchmarks/seed.py --reset
+    python benchmarks/micro.py --output results/$(git rev-parse --short HEAD).json
+    python benchmarks/compare.py results/<before>.json results/<after>.json
+
+No network or server is involved, so the numbers isolate the handler, ORM,
+database and serialization cost of each route. Results are written as JSON.
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from harness import BENCH_PASSWORD, git_commit, load_app, user_email
+
+
+class Case:
+    def __init__(self, name, method, path, body=None, expect=(200,), cost=1, after=None):
+        # path and body are callables taking the Random instance so each call hits a different row;
+        # cost > 1 divides the iteration count for slow (bcrypt) routes
+        self.name = name
+        self.method = method
+        self.path = path
+        self.body = body
+        self.expect = expect
+        self.cost = cost
+        self.after = after
+
+
+def build_cases(ids, signup_counter):
+    def pick(kind):
+        return lambda rng: rng.choice(ids[kind])
+
+    def user_login(rng):
+        return {'email': user_email(rng.choice(ids['user_index'])), 'password': BENCH_PASSWORD}
+
+    run_id = time.time_ns()
+
+    def signup(rng):
+        # Fresh emails on every run; the seeder never creates signup-* users
+        return {'email': 'signup-%d-%d@bench.local' % (run_id, next(signup_counter)), 'password': BENCH_PASSWORD}
+
+    def add_favorite(rng):
+        return {'user_id': pick('user')(rng), 'character_id': pick('character')(rng)}
+
+    def remove_favorite(client, response):
+        # Keep the favorites table the same size from one run to the next
+        if response.status_code == 201:
+            client.delete('/character-favorite-lists/%d' % response.get_json()['favorite_list']['id'])
+
+    cases = []
+    for entity in ('planet', 'character', 'vehicle'):
+        collection = entity + 's'
+        cases += [
+            Case('%s_list' % collection, 'GET', lambda rng, c=collection: '/%s?limit=100' % c),
+            Case('%s_list_fields' % collection, 'GET', lambda rng, c=collection: '/%s?limit=100&fields=name' % c),
+            Case('%s_detail' % collection, 'GET', lambda rng, c=collection, e=entity: '/%s/%d' % (c, pick(e)(rng))),
+            Case('%s_popular' % collection, 'GET', lambda rng, c=collection: '/%s/popular?limit=10' % c),
+        ]
+    cases += [
+        Case('planets_filtered_sorted', 'GET', lambda rng: '/planets?terrain=desert&sort=-population&limit=50'),
+        Case('characters_deep_page', 'GET',
+             lambda rng: '/characters?after=%d&limit=100' % ids['character'][len(ids['character']) // 2]),
+        Case('search', 'GET', lambda rng: '/search?q=%s' % rng.choice(('reb', 'jedi', 'hidden moon', 'droid'))),
+        Case('users_list', 'GET', lambda rng: '/users?limit=100'),
+        Case('users_list_expanded', 'GET', lambda rng: '/users?limit=50&expand=character_favorites'),
+        Case('user_favorites', 'GET', lambda rng: '/users/%d/favorites' % pick('user')(rng)),
+        Case('character_favorite_lists', 'GET', lambda rng: '/character-favorite-lists?limit=100'),
+        Case('favorite_write', 'POST', lambda rng: '/character-favorite-lists', body=add_favorite,
+             expect=(201, 409), after=remove_favorite),
+        Case('login', 'POST', lambda rng: '/login', body=user_login, cost=10),
+        Case('token', 'POST', lambda rng: '/token', body=user_login, cost=10),
+        Case('signup', 'POST', lambda rng: '/signup', body=signup, expect=(201,), cost=10),
+    ]
+    return cases
+
+
+def load_ids():
+    from sqlalchemy import select
+    from models import db, User, Planet, Character, Vehicle
+    ids = {
+        'user': db.session.scalars(select(User.id).order_by(User.id)).all(),
+        'planet': db.session.scalars(select(Planet.id).order_by(Planet.id)).all(),
+        'character': db.session.scalars(select(Character.id).order_by(Character.id)).all(),
+        'vehicle': db.session.scalars(select(Vehicle.id).order_by(Vehicle.id)).all(),
+    }
+    # Seeded users are user<N>@bench.local, so the login cases only need the N
+    emails = db.session.scalars(select(User.email).where(User.email.like('user%@bench.local'))).all()
+    ids['user_index'] = [int(email[4:-len('@bench.local')]) for email in emails]
+    if not all(ids.values()):
+        sys.exit('The database is empty; run benchmarks/seed.py first')
+    return ids
+
+
+def percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def run_case(client, case, rng, iterations, warmup):
+    iterations = max(3, iterations // case.cost)
+    timings = []
+    errors = 0
+    for i in range(warmup + iterations):
+        path = case.path(rng)
+        body = case.body(rng) if case.body else None
+        start = time.perf_counter()
+        response = client.open(path, method=case.method, json=body)
+        response.get_data()
+        elapsed = time.perf_counter() - start
+        if response.status_code not in case.expect:
+            errors += 1
+        if case.after:
+            case.after(client, response)
+        if i >= warmup:
+            timings.append(elapsed)
+
+    timings.sort()
+    return {
+        'iterations': iterations,
+        'errors': errors,
+        'mean': statistics.fmean(timings),
+        'p50': percentile(timings, 0.50),
+        'p95': percentile(timings, 0.95),
+        'p99': percentile(timings, 0.99),
+        'min': timings[0],
+        'max': timings[-1],
+        'ops_per_sec': len(timings) / sum(timings),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--warmup', type=int, default=10)
+    parser.add_argument('--only', action='append', help='run only cases whose name contains this (repeatable)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='write the JSON results here (default: stdout)')
+    args = parser.parse_args()
+
+    app = load_app()
+    from models import db
+
+    with app.app_context():
+        ids = load_ids()
+        dialect = db.engine.dialect.name
+
+    client = app.test_client()
+    rng = random.Random(args.seed)
+    results = {}
+    for case in build_cases(ids, itertools.count()):
+        if args.only and not any(part in case.name for part in args.only):
+            continue
+        results[case.name] = stats = run_case(client, case, rng, args.iterations, args.warmup)
+        print('%-28s p50 %8.2fms  p95 %8.2fms  %9.1f ops/s%s' % (
+            case.name, stats['p50'] * 1000, stats['p95'] * 1000, stats['ops_per_sec'],
+            '  (%d errors)' % stats['errors'] if stats['errors'] else ''), file=sys.stderr)
+
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'database': dialect,
+            'rows': {kind: len(values) for kind, values in ids.items() if kind != 'user_index'},
+            'config': {name: os.getenv(name) for name in ('CACHE_BACKEND', 'BCRYPT_LOG_ROUNDS', 'DB_POOL_SIZE')},
+            'iterations': args.iterations,
+        },
+        'results': results,
+    }
+    output = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+"""Seed a database with synthetic users, catalog rows and favorites.
+
+    DATABASE_URL=sqlite:////tmp/benchmark.db python benchmarks/seed.py --users 1000 --characters 5000
+    DATABASE_URL=postgresql://localhost/benchmark python benchmarks/seed.py --reset
+
+Runs the migrations first, so an empty database works. The data is generated
+from --seed, so two runs with the same arguments produce the same rows.
+"""
+import argparse
+import random
+import time
+from harness import MIGRATIONS, BENCH_PASSWORD, load_app, user_email
+
+CHUNK = 1000
+
+TERRAINS = ('desert', 'forest', 'ocean', 'tundra', 'mountains', 'swamp', 'urban', 'grasslands')
+COLORS = ('blue', 'brown', 'green', 'black', 'red', 'yellow', 'white', 'grey')
+GENDERS = ('male', 'female', 'n/a')
+CLASSES = ('wheeled', 'repulsorcraft', 'starfighter', 'walker', 'speeder', 'transport')
+MANUFACTURERS = ('Incom', 'Kuat', 'Sienar', 'Corellia', 'Sorosuub', 'Aratech')
+WORDS = ('rebel', 'imperial', 'outer', 'rim', 'core', 'ancient', 'hidden', 'frozen', 'twin', 'red',
+         'moon', 'station', 'smuggler', 'jedi', 'sith', 'droid', 'clone', 'bounty', 'hunter', 'pilot')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--planets', type=int, default=500)
+    parser.add_argument('--characters', type=int, default=2000)
+    parser.add_argument('--vehicles', type=int, default=500)
+    parser.add_argument('--favorites', type=int, default=5, help='favorites of each kind per user')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--reset', action='store_true', help='delete existing rows first')
+    return parser.parse_args()
+
+
+def words(rng, count):
+    return ' '.join(rng.choice(WORDS) for _ in range(count))
+
+
+def insert_rows(db, model, rows):
+    from sqlalchemy import insert
+    for start in range(0, len(rows), CHUNK):
+        db.session.execute(insert(model), rows[start:start + CHUNK])
+    db.session.commit()
+
+
+def main():
+    args = parse_args()
+    app = load_app(migrations=True)
+
+    from flask_migrate import upgrade
+    from sqlalchemy import delete, func, select, text
+    from hashing import bcrypt
+    from search import index_entities
+    from popularity import reconcile_favorite_counts
+    from models import (db, User, Planet, Character, Vehicle,
+                        Character_Favorite_List, Planet_Favorite_List, Vehicle_Favorite_List)
+
+    rng = random.Random(args.seed)
+    started = time.perf_counter()
+    with app.app_context():
+        upgrade(directory=MIGRATIONS)
+
+        if args.reset:
+            for model in (Character_Favorite_List, Planet_Favorite_List, Vehicle_Favorite_List,
+                          User, Planet, Character, Vehicle):
+                db.session.execute(delete(model))
+            db.session.execute(text('DELETE FROM catalog_search'))
+            db.session.commit()
+
+        # One hash for everyone: hashing thousands of passwords would dominate the run
+        password_hash = bcrypt.generate_password_hash(BENCH_PASSWORD).decode('utf-8')
+        first_user = (db.session.scalar(select(func.max(User.id))) or 0) + 1
+        insert_rows(db, User, [
+            {'email': user_email(i), 'password': password_hash, 'username': 'user%d' % i, 'name': words(rng, 2),
+             'is_active': True}
+            for i in range(first_user, first_user + args.users)])
+
+        insert_rows(db, Planet, [
+            {'name': '%s %d' % (words(rng, 2).title(), i), 'description': words(rng, 12),
+             'population': rng.randrange(0, 10 ** 9), 'terrain': rng.choice(TERRAINS),
+             'diameter': rng.randrange(1000, 200000), 'orbital_period': rng.randrange(100, 5000)}
+            for i in range(args.planets)])
+        insert_rows(db, Character, [
+            {'name': '%s %d' % (words(rng, 2).title(), i), 'description': words(rng, 12),
+             'eye_color': rng.choice(COLORS), 'hair_color': rng.choice(COLORS), 'gender': rng.choice(GENDERS),
+             'height': rng.randrange(60, 250), 'birth_date': rng.randrange(0, 1000)}
+            for i in range(args.characters)])
+        insert_rows(db, Vehicle, [
+            {'name': '%s %d' % (words(rng, 2).title(), i), 'description': words(rng, 12),
+             'model': words(rng, 1).title(), 'manufacturer': rng.choice(MANUFACTURERS),
+             'passengers': rng.randrange(0, 500), 'max_speed': rng.randrange(50, 2000),
+             'vehicle_class': rng.choice(CLASSES)}
+            for i in range(args.vehicles)])
+
+        # Favorites point at random existing rows; sample() keeps (user, entity) pairs unique
+        user_ids = db.session.scalars(select(User.id)).all()
+        for model, favorite_model, column in ((Character, Character_Favorite_List, 'character_id'),
+                                              (Planet, Planet_Favorite_List, 'planet_id'),
+                                              (Vehicle, Vehicle_Favorite_List, 'vehicle_id')):
+            entity_ids = db.session.scalars(select(model.id)).all()
+            taken = set(db.session.execute(select(favorite_model.user_id, getattr(favorite_model, column))).all())
+            rows = []
+            for user_id in user_ids:
+                for entity_id in rng.sample(entity_ids, min(args.favorites, len(entity_ids))):
+                    if (user_id, entity_id) not in taken:
+                        rows.append({'user_id': user_id, column: entity_id})
+            insert_rows(db, favorite_model, rows)
+
+            ids = db.session.scalars(select(model.id)).all()
+            for start in range(0, len(ids), CHUNK):
+                index_entities(model, ids[start:start + CHUNK])
+            db.session.commit()
+
+        # The favorites went in as plain INSERTs: bring every favorite_count in line with them
+        reconcile_favorite_counts()
+
+        counts = {model.__tablename__: db.session.scalar(select(func.count()).select_from(model))
+                  for model in (User, Planet, Character, Vehicle,
+                                Character_Favorite_List, Planet_Favorite_List, Vehicle_Favorite_List)}
+
+    print('Seeded %s in %.1fs' % (', '.join('%s=%d' % item for item in counts.items()),
+                                  time.perf_counter() - started))
+
+
+if __name__ == '__main__':
+    main()
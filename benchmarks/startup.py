@@ -0,0 +1,107 @@
+"""Cold start report: what importing the app costs, checked against a budget.
+
+    python benchmarks/startup.py --runs 7 --budget-ms 600
+    python benchmarks/startup.py --target "import wsgi; wsgi.application.test_client().get('/planets/1')"
+
+Runs `python -X importtime -c <target>` in src/ --runs times, each in a fresh
+interpreter, and reports the median import time of the app, the wall time of the
+whole process and the packages that take the most import time (their own time,
+summed per top-level package). Exits with status 1 when the median import time is
+over --budget-ms (STARTUP_BUDGET_MS), or when a module that must stay out of the
+startup path (--forbid; flask_admin and alembic by default) was imported.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from harness import BENCH_JWT_SECRET_KEY, DEFAULT_DATABASE_URL, SRC, git_commit
+
+DEFAULT_FORBIDDEN = ('flask_admin', 'flask_migrate', 'alembic')
+
+
+def parse_importtime(stderr):
+    # {module: (self us, cumulative us)} from the `import time: self | cumulative | name` lines
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def run_once(target):
+    env = dict(os.environ)
+    env.setdefault('DATABASE_URL', DEFAULT_DATABASE_URL)
+    env.setdefault('JWT_SECRET_KEY', BENCH_JWT_SECRET_KEY)
+    started = time.perf_counter()
+    process = subprocess.run([sys.executable, '-X', 'importtime', '-c', target], cwd=SRC, env=env,
+                             stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    wall = time.perf_counter() - started
+    if process.returncode != 0:
+        raise SystemExit(process.stderr[-2000:])
+    return wall, parse_importtime(process.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--target', default='import wsgi', help='statement to time (default: build the app)')
+    parser.add_argument('--module', default='wsgi', help='module whose cumulative import time is checked')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float, default=float(os.getenv('STARTUP_BUDGET_MS', 600)))
+    parser.add_argument('--forbid', action='append', help='module that must not be imported at startup')
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--output', help='write the JSON report here')
+    args = parser.parse_args()
+    forbidden = args.forbid or list(DEFAULT_FORBIDDEN)
+
+    run_once(args.target)  # warm up: bytecode caches and the OS page cache
+    walls, totals, per_package, imported = [], [], {}, set()
+    for _ in range(args.runs):
+        wall, modules = run_once(args.target)
+        walls.append(wall)
+        totals.append(modules.get(args.module, (0, 0))[1])
+        imported.update(modules)
+        packages = {}
+        for name, (self_us, _) in modules.items():
+            root = name.split('.')[0]
+            packages[root] = packages.get(root, 0) + self_us
+        for root, total in packages.items():
+            per_package.setdefault(root, []).append(total)
+
+    import_ms = statistics.median(totals) / 1000
+    wall_ms = statistics.median(walls) * 1000
+    top = sorted(((statistics.median(values) / 1000, root) for root, values in per_package.items()), reverse=True)
+    violations = sorted(name for name in imported if name.split('.')[0] in forbidden)
+
+    print('import %s: %.1f ms median of %d (budget %.0f ms); process wall time %.1f ms' % (
+        args.module, import_ms, args.runs, args.budget_ms, wall_ms), file=sys.stderr)
+    for milliseconds, root in top[:args.top]:
+        print('  %-24s %8.1f ms' % (root, milliseconds), file=sys.stderr)
+    if violations:
+        print('imported at startup but should not be: %s' % ', '.join(violations[:10]), file=sys.stderr)
+
+    report = {
+        'meta': {'commit': git_commit(), 'created_at': datetime.now(timezone.utc).isoformat(), 'target': args.target,
+                 'runs': args.runs, 'budget_ms': args.budget_ms},
+        'import_ms': import_ms,
+        'wall_ms': wall_ms,
+        'packages_ms': {root: milliseconds for milliseconds, root in top},
+        'forbidden_imports': violations,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(json.dumps(report, indent=2, sort_keys=True) + '\n')
+
+    over_budget = import_ms > args.budget_ms
+    if over_budget:
+        print('over budget by %.1f ms' % (import_ms - args.budget_ms), file=sys.stderr)
+    sys.exit(1 if over_budget or violations else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,29 @@
+#!/usr/bin/env bash
+# Runs benchmarks/http_load.py against the same app under each worker configuration.
+#   DATABASE_URL=sqlite:////tmp/benchmark.db python benchmarks/seed.py --reset
+#   DATABASE_URL=sqlite:////tmp/benchmark.db benchmarks/workers.sh results/
+# Tune with WORKERS, THREADS, CONCURRENCY and DURATION.
+set -o errexit -o nounset
+
+OUT=${1:-results}
+WORKERS=${WORKERS:-2}
+THREADS=${THREADS:-8}
+CONCURRENCY=${CONCURRENCY:-32}
+DURATION=${DURATION:-20}
+PORT=${PORT:-8000}
+cd "$(dirname "$0")/.."
+mkdir -p "$OUT"
+
+run() {
+    local name=$1; shift
+    env PORT="$PORT" WEB_CONCURRENCY="$WORKERS" RATE_LIMIT_ENABLED=0 "$@" &
+    local pid=$!
+    until curl -s -o /dev/null "http://localhost:$PORT/planets/1"; do sleep 0.5; done
+    python benchmarks/http_load.py --url "http://localhost:$PORT" --concurrency "$CONCURRENCY" \
+        --duration "$DURATION" --label "$name" --output "$OUT/$name.json"
+    kill "$pid"; wait "$pid" 2>/dev/null || true
+}
+
+run sync gunicorn
+run gthread env GUNICORN_WORKER_CLASS=gthread GUNICORN_THREADS="$THREADS" gunicorn
+run asgi env GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker ASGI_THREADS="$THREADS" gunicorn
@@ -0,0 +1,105 @@
+import gc
+import os
+
+# gunicorn reads this file from the directory it is started in (the repo root in
+# the Procfile and render.yml). Every setting can be overridden from the environment:
+#
+#   GUNICORN_WORKER_CLASS   sync (default), gthread, gevent or uvicorn.workers.UvicornWorker (with asgi:application)
+#   WEB_CONCURRENCY         worker processes (default 1, as before)
+#   GUNICORN_THREADS        threads per worker; > 1 with the sync class switches gunicorn to gthread
+#   GUNICORN_WORKER_CONNECTIONS  concurrent requests per gevent worker
+#   GUNICORN_TIMEOUT        seconds before a silent worker is killed and restarted
+#   GUNICORN_PRELOAD        1 (default except gevent): import the app, compile the routes and load the catalog
+#                           snapshot once in the master, then fork; 0: every worker does it itself
+#
+# Each thread (or greenlet) that reaches the database holds a pooled connection, so keep
+#   WEB_CONCURRENCY * (min(GUNICORN_THREADS, DB_POOL_SIZE + DB_MAX_OVERFLOW) + 1) <= max_connections
+# (+ 1: the single-connection Flask-Admin engine a worker opens if it serves /admin)
+# See docs/DEPLOYMENT.md for the trade-offs and a benchmark procedure.
+
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'sync')
+
+bind = '0.0.0.0:%s' % os.getenv('PORT', '8000')
+chdir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src')
+# ASGI workers need the ASGI callable (src/asgi.py); every other class serves src/wsgi.py
+wsgi_app = 'asgi:application' if worker_class.startswith('uvicorn') else 'wsgi:application'
+workers = int(os.getenv('WEB_CONCURRENCY', 1))
+threads = int(os.getenv('GUNICORN_THREADS', 1))
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', 1000))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+
+# With preload the workers start as copies of the master and share its memory until
+# they write to it. Keep the collector out of that memory (gc.disable() here, then
+# gc.freeze() right before forking, as the gc docs recommend) so a collection in a
+# worker does not touch every object inherited from the master. A preloaded app is
+# not reloaded by `kill -HUP`; restart the master to deploy new code.
+# gevent patches the standard library when the worker starts, too late for modules
+# the master already imported, so it keeps loading the app in each worker.
+preload_app = os.getenv('GUNICORN_PRELOAD', '0' if worker_class == 'gevent' else '1').lower() in ('1', 'true', 'yes')
+if preload_app:
+    gc.disable()
+
+
+def on_starting(server):
+    concurrency = worker_connections if worker_class == 'gevent' else threads
+    pool = int(os.getenv('DB_POOL_SIZE', 5)) + int(os.getenv('DB_MAX_OVERFLOW', 10))
+    if concurrency > pool:
+        server.log.warning('%d concurrent requests per worker but only %d pooled DB connections; '
+                           'requests beyond that wait up to DB_POOL_TIMEOUT for a connection', concurrency, pool)
+
+
+def when_ready(server):
+    # Master, after the app was preloaded and before the first fork
+    if not preload_app:
+        return
+    from wsgi import application as app
+    from models import db
+    from replicas import replica_set
+    from snapshot import catalog_snapshot
+    app.url_map.update()  # compile the URL matcher now instead of in each worker's first request
+    if catalog_snapshot.enabled:
+        with app.app_context():
+            catalog_snapshot.load()
+            db.session.remove()
+            # The workers must not share the master's sockets: they open their own connections
+            db.engine.dispose()
+        for replica in replica_set.replicas:
+            replica.engine.dispose()
+        server.log.info('Catalog snapshot loaded in the master')
+    gc.collect()
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    if preload_app:
+        gc.enable()
+        # Forget (without closing) any pooled connection inherited from the master
+        from wsgi import application as app
+        from models import db
+        from replicas import replica_set
+        with app.app_context():
+            db.engine.dispose(close=False)
+        for replica in replica_set.replicas:
+            replica.engine.dispose(close=False)
+    if worker_class == 'gevent':
+        # psycopg2 blocks the whole worker on I/O unless it is told to yield to the gevent hub
+        try:
+            from psycogreen.gevent import patch_psycopg
+        except ImportError:
+            server.log.warning('psycogreen is not installed: Postgres queries will block the gevent worker')
+        else:
+            patch_psycopg()
+
+
+def post_worker_init(worker):
+    # CATALOG_SNAPSHOT=1 without preload: load the catalog before the worker takes its first request
+    from wsgi import application as app
+    from models import db
+    from snapshot import catalog_snapshot
+    if catalog_snapshot.enabled and not catalog_snapshot.loaded:
+        with app.app_context():
+            catalog_snapshot.load()
+            db.session.remove()
+        worker.log.info('Catalog snapshot loaded')
@@ -0,0 +1,49 @@
+"""catalog_search full-text index (FTS5 on sqlite, tsvector + GIN on postgres)
+
+Revision ID: 55ab916dd5b5
+Revises: ad2a447cb3f2
+Create Date: 2026-10-18 11:46:10.092771
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '55ab916dd5b5'
+down_revision = 'ad2a447cb3f2'
+branch_labels = None
+depends_on = None
+
+
+# Must match KIND_CODES in src/search.py
+KIND_CODES = {'character': 1, 'planet': 2, 'vehicle': 3}
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute("CREATE VIRTUAL TABLE catalog_search USING fts5("
+                   "kind UNINDEXED, name, description, prefix='2 3', tokenize='unicode61')")
+        for kind, code in KIND_CODES.items():
+            op.execute('INSERT INTO catalog_search (rowid, kind, name, description) '
+                       'SELECT id * 4 + %d, \'%s\', name, description FROM "%s"' % (code, kind, kind))
+    elif dialect == 'postgresql':
+        op.execute("CREATE TABLE catalog_search ("
+                   "kind VARCHAR(20) NOT NULL, "
+                   "entity_id INTEGER NOT NULL, "
+                   "name VARCHAR(250), "
+                   "description VARCHAR(250), "
+                   "document TSVECTOR GENERATED ALWAYS AS ("
+                   "setweight(to_tsvector('simple', coalesce(name, '')), 'A') || "
+                   "setweight(to_tsvector('simple', coalesce(description, '')), 'B')) STORED, "
+                   "PRIMARY KEY (kind, entity_id))")
+        op.execute('CREATE INDEX ix_catalog_search_document ON catalog_search USING GIN (document)')
+        for kind in KIND_CODES:
+            op.execute('INSERT INTO catalog_search (kind, entity_id, name, description) '
+                       'SELECT \'%s\', id, name, description FROM "%s"' % (kind, kind))
+
+
+def downgrade():
+    if op.get_bind().dialect.name in ('sqlite', 'postgresql'):
+        op.execute('DROP TABLE catalog_search')
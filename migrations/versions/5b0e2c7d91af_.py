@@ -0,0 +1,28 @@
+"""created_at on revoked_token, for the denylist sync window
+
+Revision ID: 5b0e2c7d91af
+Revises: ea67459960f4
+Create Date: 2026-10-18 19:05:12.447031
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b0e2c7d91af'
+down_revision = 'ea67459960f4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('revoked_token', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('created_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False))
+        batch_op.create_index(batch_op.f('ix_revoked_token_created_at'), ['created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('revoked_token', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_revoked_token_created_at'))
+        batch_op.drop_column('created_at')
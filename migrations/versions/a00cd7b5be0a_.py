@@ -0,0 +1,41 @@
+"""Unique indexes on user.email and user.username
+
+Revision ID: a00cd7b5be0a
+Revises: dd5b4672f786
+Create Date: 2026-10-18 16:02:51.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a00cd7b5be0a'
+down_revision = 'dd5b4672f786'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    connection = op.get_bind()
+    # Duplicated emails are accounts someone has to merge by hand; deleting any of them here would lose data
+    duplicates = connection.execute(sa.text(
+        'SELECT email, COUNT(*) FROM "user" GROUP BY email HAVING COUNT(*) > 1 ORDER BY email LIMIT 10')).all()
+    if duplicates:
+        raise RuntimeError('user.email has duplicates, resolve them before upgrading: %s' % ', '.join(
+            '%s (%d rows)' % (email, count) for email, count in duplicates))
+    # username is optional: the oldest account keeps a duplicated one, the others lose it
+    op.execute('UPDATE "user" SET username = NULL WHERE username IS NOT NULL AND id NOT IN '
+               '(SELECT MIN(id) FROM "user" WHERE username IS NOT NULL GROUP BY username)')
+
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_user_email'))
+        batch_op.create_index(batch_op.f('ix_user_email'), ['email'], unique=True)
+        batch_op.create_index(batch_op.f('ix_user_username'), ['username'], unique=True)
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_user_username'))
+        batch_op.drop_index(batch_op.f('ix_user_email'))
+        batch_op.create_index(batch_op.f('ix_user_email'), ['email'], unique=False)
@@ -0,0 +1,40 @@
+"""indexes for catalog filters/sorts and user email lookups
+
+Revision ID: ad2a447cb3f2
+Revises: 416504f366d9
+Create Date: 2026-10-18 11:07:22.419730
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'ad2a447cb3f2'
+down_revision = '416504f366d9'
+branch_labels = None
+depends_on = None
+
+
+INDEXED_COLUMNS = [
+    ('user', 'email'),
+    ('planet', 'population'),
+    ('planet', 'terrain'),
+    ('planet', 'diameter'),
+    ('character', 'eye_color'),
+    ('character', 'gender'),
+    ('character', 'height'),
+    ('vehicle', 'manufacturer'),
+    ('vehicle', 'max_speed'),
+    ('vehicle', 'vehicle_class'),
+]
+
+
+def upgrade():
+    for table, column in INDEXED_COLUMNS:
+        op.create_index(op.f('ix_%s_%s' % (table, column)), table, [column], unique=False)
+
+
+def downgrade():
+    for table, column in reversed(INDEXED_COLUMNS):
+        op.drop_index(op.f('ix_%s_%s' % (table, column)), table_name=table)
@@ -0,0 +1,35 @@
+"""version and updated_at columns on catalog tables
+
+Revision ID: c0dad9551950
+Revises: f055ace6df96
+Create Date: 2026-10-18 09:48:05.220914
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c0dad9551950'
+down_revision = 'f055ace6df96'
+branch_labels = None
+depends_on = None
+
+
+CATALOG_TABLES = ['planet', 'character', 'vehicle']
+
+
+def upgrade():
+    for table in CATALOG_TABLES:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+            batch_op.add_column(sa.Column('updated_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False))
+            batch_op.create_index(batch_op.f('ix_%s_updated_at' % table), ['updated_at'], unique=False)
+
+
+def downgrade():
+    for table in CATALOG_TABLES:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_index(batch_op.f('ix_%s_updated_at' % table))
+            batch_op.drop_column('updated_at')
+            batch_op.drop_column('version')
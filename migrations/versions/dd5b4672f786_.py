@@ -0,0 +1,62 @@
+"""ON DELETE CASCADE on the favorite list foreign keys
+
+Revision ID: dd5b4672f786
+Revises: e619c526d503
+Create Date: 2026-10-18 13:24:07.341982
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'dd5b4672f786'
+down_revision = 'e619c526d503'
+branch_labels = None
+depends_on = None
+
+
+# favorite table -> catalog column and table
+FAVORITE_TABLES = {
+    'character__favorite__list': ('character_id', 'character'),
+    'planet__favorite__list': ('planet_id', 'planet'),
+    'vehicle__favorite__list': ('vehicle_id', 'vehicle'),
+}
+
+# The foreign keys were created unnamed. sqlite reflects them without a name, so batch
+# mode names them with this convention in order to drop them; postgres gave them
+# its default <table>_<column>_fkey names.
+NAMING_CONVENTION = {'fk': 'fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s'}
+
+
+def _fk_name(table, column, referred_table):
+    if op.get_bind().dialect.name == 'sqlite':
+        return 'fk_%s_%s_%s' % (table, column, referred_table)
+    return '%s_%s_fkey' % (table, column)
+
+
+def _replace_foreign_keys(ondelete):
+    for table, (column, referred_table) in FAVORITE_TABLES.items():
+        with op.batch_alter_table(table, schema=None, naming_convention=NAMING_CONVENTION) as batch_op:
+            for fk_column, fk_table in ((column, referred_table), ('user_id', 'user')):
+                name = _fk_name(table, fk_column, fk_table)
+                batch_op.drop_constraint(name, type_='foreignkey')
+                batch_op.create_foreign_key(name, fk_table, [fk_column], ['id'], ondelete=ondelete)
+
+
+def upgrade():
+    # Favorites left behind by the old delete_user (it removed one row per table) would
+    # violate the constraints once sqlite enforces them
+    for table, (column, referred_table) in FAVORITE_TABLES.items():
+        op.execute('DELETE FROM {table} WHERE user_id NOT IN (SELECT id FROM "user") '
+                   'OR {column} NOT IN (SELECT id FROM "{referred}")'.format(table=table, column=column,
+                                                                             referred=referred_table))
+        # ...and they were counted by the favorite_count backfill
+        op.execute('UPDATE "{referred}" SET favorite_count = (SELECT count(*) FROM {table} '
+                   'WHERE {table}.{column} = "{referred}".id)'.format(table=table, column=column,
+                                                                     referred=referred_table))
+    _replace_foreign_keys('CASCADE')
+
+
+def downgrade():
+    _replace_foreign_keys(None)
@@ -0,0 +1,45 @@
+"""favorite_count counters on catalog tables for /<entity>/popular
+
+Revision ID: e619c526d503
+Revises: 55ab916dd5b5
+Create Date: 2026-10-18 13:10:42.518203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e619c526d503'
+down_revision = '55ab916dd5b5'
+branch_labels = None
+depends_on = None
+
+
+# catalog table -> (favorite table, foreign key column)
+CATALOG_TABLES = {
+    'character': ('character__favorite__list', 'character_id'),
+    'planet': ('planet__favorite__list', 'planet_id'),
+    'vehicle': ('vehicle__favorite__list', 'vehicle_id'),
+}
+
+
+def upgrade():
+    for table, (favorite_table, column) in CATALOG_TABLES.items():
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('favorite_count', sa.Integer(), server_default='0', nullable=False))
+            batch_op.create_index('ix_%s_favorite_count_id' % table, ['favorite_count', 'id'], unique=False)
+
+        # Backfill from the existing favorites; later drift is fixed by `flask reconcile-favorites`
+        op.execute(
+            'UPDATE "{table}" SET favorite_count = '
+            '(SELECT COUNT(*) FROM {favorite_table} WHERE {favorite_table}.{column} = "{table}".id)'
+            .format(table=table, favorite_table=favorite_table, column=column)
+        )
+
+
+def downgrade():
+    for table in CATALOG_TABLES:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_index('ix_%s_favorite_count_id' % table)
+            batch_op.drop_column('favorite_count')
@@ -0,0 +1,38 @@
+"""(column, id) indexes for the catalog sort columns that had none
+
+Revision ID: ea67459960f4
+Revises: a00cd7b5be0a
+Create Date: 2026-10-18 17:21:40.903117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'ea67459960f4'
+down_revision = 'a00cd7b5be0a'
+branch_labels = None
+depends_on = None
+
+
+# Columns in filters.SORTS without an index; keyset pages order by (column, id)
+SORT_COLUMNS = {
+    'planet': ('name', 'orbital_period'),
+    'character': ('name', 'birth_date'),
+    'vehicle': ('name', 'passengers'),
+}
+
+
+def upgrade():
+    for table, columns in SORT_COLUMNS.items():
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for column in columns:
+                batch_op.create_index('ix_%s_%s_id' % (table, column), [column, 'id'], unique=False)
+
+
+def downgrade():
+    for table, columns in SORT_COLUMNS.items():
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for column in columns:
+                batch_op.drop_index('ix_%s_%s_id' % (table, column))
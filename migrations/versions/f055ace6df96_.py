@@ -0,0 +1,38 @@
+"""unique (user_id, entity_id) indexes on favorite lists
+
+Revision ID: f055ace6df96
+Revises: 041c94eb4a88
+Create Date: 2026-10-18 09:12:41.503118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f055ace6df96'
+down_revision = '041c94eb4a88'
+branch_labels = None
+depends_on = None
+
+
+FAVORITE_TABLES = [
+    ('character__favorite__list', 'character_id', 'ix_character_favorite_list_user_character'),
+    ('planet__favorite__list', 'planet_id', 'ix_planet_favorite_list_user_planet'),
+    ('vehicle__favorite__list', 'vehicle_id', 'ix_vehicle_favorite_list_user_vehicle'),
+]
+
+
+def upgrade():
+    for table, column, index in FAVORITE_TABLES:
+        # Keep the oldest row of every duplicated favorite so the unique index can be built
+        op.execute(
+            'DELETE FROM {table} WHERE id NOT IN '
+            '(SELECT MIN(id) FROM {table} GROUP BY user_id, {column})'.format(table=table, column=column)
+        )
+        op.create_index(index, table, ['user_id', column], unique=True)
+
+
+def downgrade():
+    for table, column, index in FAVORITE_TABLES:
+        op.drop_index(index, table_name=table)
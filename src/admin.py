@@ -1,18 +1,75 @@
 import os
+from flask import Flask, flash
 from flask_admin import Admin
-
+from flask_admin.actions import action
 from flask_admin.contrib.sqla import ModelView
+from sqlalchemy import inspect
 
 from models import db, User, Planet, Character, Vehicle, Character_Favorite_List, Planet_Favorite_List, Vehicle_Favorite_List
+from pool import instrument_pool
+from purge import purge_users
+
+
+class UserView(ModelView):
+    # Borrado masivo: los usuarios marcados y sus favoritos en un número fijo de sentencias
+    # (el "Delete" por defecto de flask-admin borra fila a fila)
+    @action('purge', 'Purge', 'Delete the selected users and all their favorites?')
+    def action_purge(self, ids):
+        flash('%d users purged.' % purge_users([int(user_id) for user_id in ids]), 'success')
+
+    def delete_model(self, model):
+        # También el "Delete" de una fila: con solo ON DELETE CASCADE los favorite_count quedarían desfasados
+        return bool(purge_users([model.id]))
+
+
+class ResourceView(ModelView):
+    """ModelView that runs the hooks of the API resource for its model, so an admin edit
+    moves favorite_count, the search index, the response cache and the catalog snapshot
+    like the same edit through the API."""
+
+    def __init__(self, resource, api_app, **kwargs):
+        self.resource = resource
+        self.api_app = api_app
+        super().__init__(resource.model, db.session, **kwargs)
+
+    def on_model_change(self, form, model, is_created):
+        # In the admin's transaction, like Resource.save(). written() gets the old values of
+        # the columns that changed: edited directly (attribute history, cleared by the flush)
+        # or through a relationship field (planet_id only follows `planet` at the flush)
+        if is_created:
+            db.session.flush()
+            self.resource.written(model)
+            return
+        state = inspect(model)
+        previous = {name: state.attrs[name].history.deleted[0] for name in self.resource.columns
+                    if state.attrs[name].history.deleted}
+        before = {name: state.dict.get(name) for name in self.resource.columns if name not in previous}
+        db.session.flush()
+        previous.update((name, value) for name, value in before.items() if value != getattr(model, name))
+        self.resource.written(model, previous)
 
-def setup_admin(app):
+    def after_model_change(self, form, model, is_created):
+        # changed() runs in the API's app context: the snapshot has to be encoded by the API's JSON provider
+        with self.api_app.app_context():
+            self.resource.changed(None if is_created else model.id)
+
+    def on_model_delete(self, model):
+        self.resource.deleting(model)
+
+    def after_model_delete(self, model):
+        with self.api_app.app_context():
+            self.resource.changed(model.id)
+
+
+def setup_admin(app, api_app, resources):
     app.secret_key = os.environ.get('FLASK_APP_KEY', 'sample key')
     app.config['FLASK_ADMIN_SWATCH'] = 'cerulean'
     admin = Admin(app, name='Star Wars Flask REST API', template_mode='bootstrap3')
+    resources = {resource.model: resource for resource in resources}
 
     
     # Add your models here, for example this is how we add a the User model to the admin
-    admin.add_view(ModelView(User, db.session))
+    admin.add_view(UserView(User, db.session))
 
     # You can duplicate that line to add mew models
     # admin.add_view(ModelView(YourModelName, db.session))
@@ -22,21 +79,40 @@ def setup_admin(app):
 
 
      # Add Planet model to the admin
-    admin.add_view(ModelView(Planet, db.session))
+    admin.add_view(ResourceView(resources[Planet], api_app))
 
     # Add Character model to the admin
-    admin.add_view(ModelView(Character, db.session))
+    admin.add_view(ResourceView(resources[Character], api_app))
 
     # Add Vehicle model to the admin
-    admin.add_view(ModelView(Vehicle, db.session))
+    admin.add_view(ResourceView(resources[Vehicle], api_app))
 
     # Add Character_Favorite_List model to the admin
-    admin.add_view(ModelView(Character_Favorite_List, db.session))
+    admin.add_view(ResourceView(resources[Character_Favorite_List], api_app))
 
       # Add Planet_Favorite_List model to the admin
-    admin.add_view(ModelView(Planet_Favorite_List, db.session))
+    admin.add_view(ResourceView(resources[Planet_Favorite_List], api_app))
 
       # Add Vehicle_Favorite_List model to the admin
-    admin.add_view(ModelView(Vehicle_Favorite_List, db.session))
+    admin.add_view(ResourceView(resources[Vehicle_Favorite_List], api_app))
+
+    
+
 
-    
\ No newline at end of file
+def create_admin_app(app, resources):
+    # /admin runs as its own small Flask app with the API's config and database. The API
+    # mounts it on the first request to /admin (LazyMount in utils.py), so a worker that
+    # never serves the admin never imports flask_admin.
+    admin_app = Flask(__name__)
+    admin_app.config.from_mapping(app.config)
+    # db.init_app() gives it an engine of its own: keep that to one connection, so a worker
+    # that serves /admin adds 1 to the pool sizing in docs/DEPLOYMENT.md and no more
+    options = dict(app.config['SQLALCHEMY_ENGINE_OPTIONS'])
+    if 'pool_size' in options:
+        options.update(pool_size=1, max_overflow=0)
+    admin_app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+    db.init_app(admin_app)
+    with admin_app.app_context():
+        instrument_pool(db.engine)
+    setup_admin(admin_app, app, resources)
+    return admin_app
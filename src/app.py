@@ -2,70 +2,181 @@
 This module takes care of starting the API Server, Loading the DB and Adding the endpoints
 """
 import os
-from flask import Flask, request, jsonify, redirect, session, url_for
-from flask_migrate import Migrate
+import click
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from flask import Flask, Response, current_app, request, jsonify
+from flask.cli import with_appcontext
 from flask_cors import CORS
-from utils import APIException, generate_sitemap, generate_token
-from admin import setup_admin
+from utils import APIException, LazyMount, generate_sitemap, generate_token
+from pagination import paginate
+from favorites import user_favorites
+from hashing import bcrypt, generate_password_hash, check_password_hash
+from metrics import render_metrics
+from profiling import init_profiling
+from idempotency import idempotent
+from ratelimit import init_rate_limits, rate_limit, LOGIN_IP_LIMIT, LOGIN_EMAIL_LIMIT, SIGNUP_IP_LIMIT
+from expand import get_expand, expand_options, serialize_expanded
+from search import search
+from serialization import FastJSONProvider
+from resources import CatalogResource, FavoriteResource
+from popularity import reconcile_favorite_counts
+from purge import purge_users
+from pool import engine_options, instrument_pool
+from replicas import replica_set
 from models import db, User, Planet, Character, Vehicle, Character_Favorite_List, Planet_Favorite_List, Vehicle_Favorite_List
 
-from flask_bcrypt import Bcrypt  # para encriptar y comparar
-from flask_sqlalchemy import SQLAlchemy  # Para rutas
-from flask_jwt_extended import  JWTManager, create_access_token, jwt_required, get_jwt_identity, unset_jwt_cookies
+from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity, unset_jwt_cookies
+from tokens import configure_tokens, denylist, issue_tokens, rotate_refresh_token, revoke_encoded_token
 
 # app.config["JWT_SECRET_KEY"] = "valor-variable"  # clave secreta para firmar los tokens, cuanto mas largo mejor.
 
+# Flask-Admin en /admin se construye con la primera petición a /admin; ADMIN_ENABLED=0 lo quita del todo
+ADMIN_ENABLED = os.getenv('ADMIN_ENABLED', '1').lower() in ('1', 'true', 'yes')
 
-app = Flask(__name__)
-bcrypt = Bcrypt(app)
-app.url_map.strict_slashes = False
-jwt = JWTManager(app)  # isntanciamos jwt de JWTManager utilizando app para tener las herramientas de encriptacion.
+# Rutas de este módulo; create_app() las registra en cada app que construye
+ROUTES = []
 
-db_url = os.getenv("DATABASE_URL")
-if db_url is not None:
-    app.config['SQLALCHEMY_DATABASE_URI'] = db_url.replace("postgres://", "postgresql://")
-else:
-    app.config['SQLALCHEMY_DATABASE_URI'] = "sqlite:////tmp/test.db"
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
-MIGRATE = Migrate(app, db)
-db.init_app(app)
-CORS(app)
-setup_admin(app)
+def route(rule, **options):
+    # Como @app.route, pero sin necesitar la app al importar el módulo
+    def decorator(view):
+        ROUTES.append((rule, view, options))
+        return view
+    return decorator
+
+
+def create_app(migrations=None):
+    """Builds the API. Flask-Migrate (and alembic with it) is only set up for the
+    `flask` command line, e.g. `flask db upgrade`, unless migrations says otherwise."""
+    app = Flask(__name__)
+    app.json = FastJSONProvider(app)
+    app.config['BCRYPT_LOG_ROUNDS'] = int(os.getenv('BCRYPT_LOG_ROUNDS', 12))  # bcrypt cost factor
+    bcrypt.init_app(app)
+    app.url_map.strict_slashes = False
+    configure_tokens(app)  # JWTManager, clave de firma y lista de tokens revocados
+
+    db_url = os.getenv("DATABASE_URL")
+    if db_url is not None:
+        app.config['SQLALCHEMY_DATABASE_URI'] = db_url.replace("postgres://", "postgresql://")
+    else:
+        app.config['SQLALCHEMY_DATABASE_URI'] = "sqlite:////tmp/test.db"
+    # Optional read replicas for GET traffic, comma separated
+    replica_urls = [url.strip().replace("postgres://", "postgresql://")
+                    for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config['SQLALCHEMY_DATABASE_URI'])
+
+    if migrations is None:
+        migrations = click.get_current_context(silent=True) is not None
+    if migrations:
+        from flask_migrate import Migrate
+        Migrate(app, db)
+    db.init_app(app)
+    with app.app_context():
+        instrument_pool(db.engine)
+    for replica_engine in replica_set.configure(replica_urls, app.config['SQLALCHEMY_ENGINE_OPTIONS']):
+        instrument_pool(replica_engine)
+    CORS(app)
+    if ADMIN_ENABLED:
+        def build_admin():
+            from admin import create_admin_app
+            return create_admin_app(app, RESOURCES)
+        app.wsgi_app = LazyMount(app.wsgi_app, '/admin', build_admin)
+    init_profiling(app)  # latencia por endpoint, SQL y serialización en /metrics
+    init_rate_limits(app)  # cabeceras RateLimit-* y límite opcional por IP y ruta
+
+    app.register_error_handler(APIException, handle_invalid_usage)
+    app.cli.add_command(reconcile_favorites)
+    app.cli.add_command(purge_users_command)
+    for rule, view, options in ROUTES:
+        app.add_url_rule(rule, view_func=view, **options)
+    for resource in RESOURCES:
+        resource.register(app)
+    return app
 
 # Handle/serialize errors like a JSON object
-@app.errorhandler(APIException)
 def handle_invalid_usage(error):
-    return jsonify(error.to_dict()), error.status_code
+    return jsonify(error.to_dict()), error.status_code, error.headers
+
+# flask reconcile-favorites: recalcula favorite_count (p. ej. desde un cron / Heroku Scheduler)
+@click.command('reconcile-favorites')
+@with_appcontext
+def reconcile_favorites():
+    for table, fixed in reconcile_favorite_counts().items():
+        print('%s: %d rows fixed' % (table, fixed))
+
+# flask purge-users --inactive: borra todos los usuarios inactivos con un número fijo de sentencias
+@click.command('purge-users')
+@click.argument('user_ids', nargs=-1, type=int)
+@click.option('--inactive', is_flag=True, help='Purge every user with is_active false.')
+@with_appcontext
+def purge_users_command(user_ids, inactive):
+    selection = select(User.id).where(User.is_active.is_(False)) if inactive else list(user_ids)
+    print('%d users deleted' % purge_users(selection))
 
 # generate sitemap with all your endpoints
-@app.route('/')
+@route('/')
 def sitemap():
-    return generate_sitemap(app)
+    return generate_sitemap(current_app, ['/admin/'] if ADMIN_ENABLED else [])
+
+@route('/search', methods=['GET'])
+def search_catalog():
+    q = request.args.get('q', '')
+    types = [kind.strip() for kind in request.args.get('types', '').split(',') if kind.strip()]
+    limit = request.args.get('limit', 20, type=int)
+    return jsonify(results=search(q, types, limit))
+
+@route('/metrics', methods=['GET'])
+def metrics():
+    return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
 
 # ... (definiciones de las rutas para User)
 
-@app.route('/users', methods=['GET'])
+@route('/users', methods=['GET'])
 def get_all_users():
     try:
-        users = User.query.all()
-        serialized_users = [user.serialize() for user in users]
-        return jsonify(users=serialized_users), 200
+        expand = get_expand(User)
+        users, next_cursor = paginate(User.query.options(*expand_options(User, expand)), User.id)
+        serialized_users = [serialize_expanded(user, expand) for user in users]
+        return jsonify(users=serialized_users, next=next_cursor), 200
 
+    except APIException:
+        raise
     except Exception as e:
         return jsonify({'error': 'Error retrieving users: ' + str(e)}), 500
 
 
-@app.route('/users/<int:user_id>', methods=['GET'])
+@route('/users/<int:user_id>', methods=['GET'])
 def get_user(user_id):
-    user = User.query.get(user_id)
+    expand = get_expand(User)
+    user = User.query.options(*expand_options(User, expand)).get(user_id)
     if not user:
         return jsonify(message='User not found'), 404
-    return jsonify(user.serialize())
+    return jsonify(serialize_expanded(user, expand))
+
+@route('/users/<int:user_id>/favorites', methods=['GET'])
+def get_user_favorites(user_id):
+    favorites = user_favorites(user_id)
+    if favorites is None:
+        return jsonify(message='User not found'), 404
+    return jsonify(favorites)
 
 # ... (create user that works like a signup)
 
-@app.route('/signup', methods=['POST'])
+def duplicate_user_message(error):
+    # Qué índice único saltó, por su nombre: el mensaje de postgres también trae los valores (DETAIL)
+    diag = getattr(error.orig, 'diag', None)  # psycopg2
+    if diag is not None:
+        username = diag.constraint_name == 'ix_user_username'
+    else:
+        username = 'user.username' in str(error.orig)  # sqlite: "UNIQUE constraint failed: user.username"
+    return 'Username already exists.' if username else 'Email already exists.'
+
+
+@route('/signup', methods=['POST'])
+@idempotent('signup')
+@rate_limit('signup', ip=SIGNUP_IP_LIMIT)
 def create_user():
     try:
         data = request.get_json()
@@ -81,11 +192,7 @@ def create_user():
         if not email or not password:
             return jsonify({'error': 'Email and password are required.'}), 400
 
-        existing_user = User.query.filter_by(email=email).first()
-        if existing_user is not None:
-            return jsonify({'error': 'Email already exists.'}), 409
-
-        password_hash = bcrypt.generate_password_hash(password).decode('utf-8')
+        password_hash = generate_password_hash(password)
 
         # username = data.get('username')
         # name = data.get('name')
@@ -113,17 +220,25 @@ def create_user():
         # new_address = Address(street_name=street_name, street_number=street_number, postal_code=postal_code)
         # new_user.address = new_address
 
+        # Sin SELECT previo: el índice único decide, también entre dos signups simultáneos
         db.session.add(new_user)
-        db.session.commit()
+        try:
+            db.session.commit()
+        except IntegrityError as e:
+            db.session.rollback()
+            return jsonify({'error': duplicate_user_message(e)}), 409
 
         return jsonify(message='User created successfully', user=new_user.serialize()), 201
 
+    except APIException:
+        raise
     except Exception as e:
         return jsonify({'error': 'Error in user creation: ' + str(e)}), 500
 
 # ... (login route)
 
-@app.route('/login', methods=['POST'])
+@route('/login', methods=['POST'])
+@rate_limit('login', ip=LOGIN_IP_LIMIT, email=LOGIN_EMAIL_LIMIT)  # antes de buscar el usuario y de bcrypt
 def login():
     try:
         data = request.get_json()
@@ -136,12 +251,12 @@ def login():
         
         login_user = User.query.filter_by(email=request.json['email']).first()
         password_db = login_user.password
-        true_o_false = bcrypt.check_password_hash(password_db,  data["password"])
+        true_o_false = check_password_hash(password_db,  data["password"])
         
         if true_o_false:
-            access_token = create_access_token(identity=login_user.id)  
+            tokens = issue_tokens(login_user.id)
             form_status = login_user.is_active 
-            return jsonify({ 'access_token':access_token, 'form_status':form_status, "user": login_user.to_dict()}), 200
+            return jsonify({ 'access_token':tokens['access_token'], 'refresh_token':tokens['refresh_token'], 'form_status':form_status, "user": login_user.to_dict()}), 200
         else:
             return {"Error":"Contraseña  incorrecta"},401
 
@@ -158,32 +273,39 @@ def login():
         # else:
             # return jsonify({'error': 'Invalid credentials'}), 401
 
+    except APIException:
+        raise
     except Exception as e:
         return jsonify({'error': 'Error in login: ' + str(e)}), 500
 
 # ... (logout route)
 
-@app.route('/logout', methods=['POST'])
-@jwt_required()  # Requires authentication with a valid JWT token
+@route('/logout', methods=['POST'])
+@jwt_required(verify_type=False)  # Accepts either the access or the refresh token
 def logout():
-    unset_jwt_cookies()  # Remove JWT token from the client
+    denylist.revoke(get_jwt())  # Revoke the token used for this request
+
+    # The client can send its refresh token too so the whole session ends
+    refresh_token = (request.get_json(silent=True) or {}).get('refresh_token')
+    if refresh_token:
+        revoke_encoded_token(refresh_token)
 
-    return redirect(url_for('/signup'))  # Redirect to the home page (public)
+    response = jsonify(message='Logged out successfully')
+    unset_jwt_cookies(response)  # Remove JWT cookies from the client, if any
+    return response
 
 # ... (Private route)
 
-@app.route('/private')
+@route('/private')
+@jwt_required()
 def private():
-    token = session.get('token')
-    if token:
-        # User is authenticated, perform private actions
-        return jsonify({'message': 'Welcome to the private area!'})
-    else:
-        return jsonify({'error': 'Unauthorized'}), 401
+    # User is authenticated by the access token, perform private actions
+    return jsonify({'message': 'Welcome to the private area!', 'user_id': get_jwt_identity()})
 
 # ... (token route)
 
-@app.route('/token', methods=['POST'])
+@route('/token', methods=['POST'])
+@rate_limit('login', ip=LOGIN_IP_LIMIT, email=LOGIN_EMAIL_LIMIT)
 def get_token():
     try:
         email = request.json.get('email')
@@ -194,23 +316,35 @@ def get_token():
         
         login_user = User.query.filter_by(email=request.json['email']).one()
         password_db = login_user.password
-        true_o_false = bcrypt.check_password_hash(password_db, password)
+        true_o_false = check_password_hash(password_db, password)
         
         if true_o_false:
             # Lógica para crear y enviar el token
             user_id = login_user.id
-            access_token = create_access_token(identity=user_id)
-            return { 'access_token':access_token}, 200
+            return issue_tokens(user_id), 200
 
         else:
             return {"Error":"Incorrect Password"}
     
+    except APIException:
+        raise
     except Exception as e:
         return {"Error":"Written email is not in the database:" + str(e)}, 500
 
+# ... (refresh token route)
+
+@route('/token/refresh', methods=['POST'])
+@jwt_required(refresh=True)
+def refresh_token():
+    # Refresh tokens are single use: the one sent here is revoked and a new pair is issued
+    tokens = rotate_refresh_token(get_jwt())
+    if tokens is None:
+        return jsonify({'error': 'Refresh token has already been used'}), 401
+    return jsonify(tokens), 200
+
 # ... (otros métodos para users)
 
-@app.route('/users/<int:user_id>', methods=['PUT'])
+@route('/users/<int:user_id>', methods=['PUT'])
 def update_user(user_id):
     user = User.query.get(user_id)
     if not user:
@@ -229,7 +363,7 @@ def update_user(user_id):
         return jsonify(message='Missing required fields'), 400
 
     user.username = username
-    user.password = password
+    user.password = generate_password_hash(password)
     user.name = name
     user.surname = surname
     user.phone_number = phone_number
@@ -253,377 +387,44 @@ def update_user(user_id):
     #     address.street_number = street_number
     #     address.postal_code = postal_code
 
-    db.session.commit()
+    try:
+        db.session.commit()
+    except IntegrityError as e:
+        db.session.rollback()
+        return jsonify(message=duplicate_user_message(e)), 409
 
     return jsonify(message='User and address updated successfully', user=user.serialize(), address=address.serialize())
 
 
-@app.route('/users/<int:user_id>', methods=['DELETE'])
+@route('/users/<int:user_id>', methods=['DELETE'])
 def delete_user(user_id):
-    user = User.query.get(user_id)
-    if not user:
+    # Un DELETE por tabla de favoritos (y los contadores favorite_count al día), sin cargar filas
+    if not purge_users([user_id]):
         return jsonify(message='User not found'), 404
 
-   
-
-    # Delete associated favorite lists
-    character_favorite_list = Character_Favorite_List.query.filter_by(user_id=user_id).first()
-    if character_favorite_list:
-        db.session.delete(character_favorite_list)
-
-    planet_favorite_list = Planet_Favorite_List.query.filter_by(user_id=user_id).first()
-    if planet_favorite_list:
-        db.session.delete(planet_favorite_list)
-
-    vehicle_favorite_list = Vehicle_Favorite_List.query.filter_by(user_id=user_id).first()
-    if vehicle_favorite_list:
-        db.session.delete(vehicle_favorite_list)
-
-    db.session.delete(user)
-    db.session.commit()
-
     return jsonify(message='User deleted successfully')
 
 
 
-@app.route('/planets', methods=['GET'])
-def get_planets():
-    planets = Planet.query.all()
-    return jsonify(planets=[planet.serialize() for planet in planets])
-
-@app.route('/planets/<int:planet_id>', methods=['GET'])
-def get_planet(planet_id):
-    planet = Planet.query.get(planet_id)
-    if planet:
-        return jsonify(planet.serialize())
-    else:
-        return jsonify(message='Planet not found'), 404
-
-@app.route('/planets', methods=['POST'])
-def create_planet():
-    data = request.get_json()
-    name = data.get('name')
-    description = data.get('description')
-    population = data.get('population')
-    terrain = data.get('terrain')
-    diameter = data.get('diameter')
-    orbital_period = data.get('orbital_period')
-
-    new_planet = Planet(name=name, description=description, population=population, terrain=terrain,
-                        diameter=diameter, orbital_period=orbital_period)
-    db.session.add(new_planet)
-    db.session.commit()
-
-    return jsonify(message='Planet created successfully', planet=new_planet.serialize()), 201
-
-@app.route('/planets/<int:planet_id>', methods=['PUT'])
-def update_planet(planet_id):
-    planet = Planet.query.get(planet_id)
-    if not planet:
-        return jsonify(message='Planet not found'), 404
-
-    data = request.get_json()
-    planet.name = data.get('name', planet.name)
-    planet.description = data.get('description', planet.description)
-    planet.population = data.get('population', planet.population)
-    planet.terrain = data.get('terrain', planet.terrain)
-    planet.diameter = data.get('diameter', planet.diameter)
-    planet.orbital_period = data.get('orbital_period', planet.orbital_period)
-
-    db.session.commit()
-
-    return jsonify(message='Planet updated successfully', planet=planet.serialize())
-
-@app.route('/planets/<int:planet_id>', methods=['DELETE'])
-def delete_planet(planet_id):
-    planet = Planet.query.get(planet_id)
-    if planet:
-        db.session.delete(planet)
-        db.session.commit()
-        return jsonify(message='Planet deleted successfully')
-    else:
-        return jsonify(message='Planet not found'), 404
-
-
-@app.route('/characters', methods=['GET'])
-def get_characters():
-    characters = Character.query.all()
-    return jsonify(characters=[character.serialize() for character in characters])
-
-@app.route('/characters/<int:character_id>', methods=['GET'])
-def get_character(character_id):
-    character = Character.query.get(character_id)
-    if character:
-        return jsonify(character.serialize())
-    else:
-        return jsonify(message='Character not found'), 404
-
-@app.route('/characters', methods=['POST'])
-def create_character():
-    data = request.get_json()
-    name = data.get('name')
-    description = data.get('description')
-    eye_color = data.get('eye_color')
-    hair_color = data.get('hair_color')
-    gender = data.get('gender')
-    height = data.get('height')
-    birth_date = data.get('birth_date')
-
-    new_character = Character(name=name, description=description, eye_color=eye_color, hair_color=hair_color,
-                              gender=gender, height=height, birth_date=birth_date)
-    db.session.add(new_character)
-    db.session.commit()
-
-    return jsonify(message='Character created successfully', character=new_character.serialize()), 201
-
-@app.route('/characters/<int:character_id>', methods=['PUT'])
-def update_character(character_id):
-    character = Character.query.get(character_id)
-    if not character:
-        return jsonify(message='Character not found'), 404
-
-    data = request.get_json()
-    character.name = data.get('name', character.name)
-    character.description = data.get('description', character.description)
-    character.eye_color = data.get('eye_color', character.eye_color)
-    character.hair_color = data.get('hair_color', character.hair_color)
-    character.gender = data.get('gender', character.gender)
-    character.height = data.get('height', character.height)
-    character.birth_date = data.get('birth_date', character.birth_date)
-
-    db.session.commit()
-
-    return jsonify(message='Character updated successfully', character=character.serialize())
-
-@app.route('/characters/<int:character_id>', methods=['DELETE'])
-def delete_character(character_id):
-    character = Character.query.get(character_id)
-    if character:
-        db.session.delete(character)
-        db.session.commit()
-        return jsonify(message='Character deleted successfully')
-    else:
-        return jsonify(message='Character not found'), 404
-
-
-@app.route('/vehicles', methods=['GET'])
-def get_vehicles():
-    vehicles = Vehicle.query.all()
-    return jsonify(vehicles=[vehicle.serialize() for vehicle in vehicles])
-
-@app.route('/vehicles/<int:vehicle_id>', methods=['GET'])
-def get_vehicle(vehicle_id):
-    vehicle = Vehicle.query.get(vehicle_id)
-    if vehicle:
-        return jsonify(vehicle.serialize())
-    else:
-        return jsonify(message='Vehicle not found'), 404
-
-@app.route('/vehicles', methods=['POST'])
-def create_vehicle():
-    data = request.get_json()
-    name = data.get('name')
-    description = data.get('description')
-    model = data.get('model')
-    manufacturer = data.get('manufacturer')
-    passengers = data.get('passengers')
-    max_speed = data.get('max_speed')
-    vehicle_class = data.get('vehicle_class')
-
-    new_vehicle = Vehicle(name=name, description=description, model=model, manufacturer=manufacturer,
-                          passengers=passengers, max_speed=max_speed, vehicle_class=vehicle_class)
-    db.session.add(new_vehicle)
-    db.session.commit()
-
-    return jsonify(message='Vehicle created successfully', vehicle=new_vehicle.serialize()), 201
-
-@app.route('/vehicles/<int:vehicle_id>', methods=['PUT'])
-def update_vehicle(vehicle_id):
-    vehicle = Vehicle.query.get(vehicle_id)
-    if not vehicle:
-        return jsonify(message='Vehicle not found'), 404
-
-    data = request.get_json()
-    vehicle.name = data.get('name', vehicle.name)
-    vehicle.description = data.get('description', vehicle.description)
-    vehicle.model = data.get('model', vehicle.model)
-    vehicle.manufacturer = data.get('manufacturer', vehicle.manufacturer)
-    vehicle.passengers = data.get('passengers', vehicle.passengers)
-    vehicle.max_speed = data.get('max_speed', vehicle.max_speed)
-    vehicle.vehicle_class = data.get('vehicle_class', vehicle.vehicle_class)
-
-    db.session.commit()
-
-    return jsonify(message='Vehicle updated successfully', vehicle=vehicle.serialize())
-
-@app.route('/vehicles/<int:vehicle_id>', methods=['DELETE'])
-def delete_vehicle(vehicle_id):
-    vehicle = Vehicle.query.get(vehicle_id)
-    if vehicle:
-        db.session.delete(vehicle)
-        db.session.commit()
-        return jsonify(message='Vehicle deleted successfully')
-    else:
-        return jsonify(message='Vehicle not found'), 404
-
-# ... (definición de la clase Character_Favorite_List)
-
-@app.route('/character-favorite-lists', methods=['GET'])
-def get_character_favorite_lists():
-    favorite_lists = Character_Favorite_List.query.all()
-    return jsonify(favorite_lists=[favorite_list.serialize() for favorite_list in favorite_lists])
-
-@app.route('/character-favorite-lists', methods=['POST'])
-def create_character_favorite_list():
-    data = request.get_json()
-    character_id = data.get('character_id')
-    user_id = data.get('user_id')
-
-    new_character_favorite_list = Character_Favorite_List(character_id=character_id, user_id=user_id)
-    db.session.add(new_character_favorite_list)
-    db.session.commit()
-
-    return jsonify(message='Character favorite list created successfully', favorite_list=new_character_favorite_list.serialize()), 201
-
-@app.route('/character-favorite-lists/<int:favorite_list_id>', methods=['GET'])
-def get_character_favorite_list(favorite_list_id):
-    favorite_list = Character_Favorite_List.query.get(favorite_list_id)
-    if favorite_list:
-        return jsonify(favorite_list.serialize())
-    else:
-        return jsonify(message='Character favorite list not found'), 404
-
-@app.route('/character-favorite-lists/<int:favorite_list_id>', methods=['PUT'])
-def update_character_favorite_list(favorite_list_id):
-    favorite_list = Character_Favorite_List.query.get(favorite_list_id)
-    if not favorite_list:
-        return jsonify(message='Character favorite list not found'), 404
-
-    data = request.get_json()
-    favorite_list.character_id = data.get('character_id', favorite_list.character_id)
-    favorite_list.user_id = data.get('user_id', favorite_list.user_id)
-
-    db.session.commit()
-
-    return jsonify(message='Character favorite list updated successfully', favorite_list=favorite_list.serialize())
-
-@app.route('/character-favorite-lists/<int:favorite_list_id>', methods=['DELETE'])
-def delete_character_favorite_list(favorite_list_id):
-    favorite_list = Character_Favorite_List.query.get(favorite_list_id)
-    if favorite_list:
-        db.session.delete(favorite_list)
-        db.session.commit()
-        return jsonify(message='Character favorite list deleted successfully')
-    else:
-        return jsonify(message='Character favorite list not found'), 404
-
-
-
-# ... (definición de la clase Planet_Favorite_List)
-
-@app.route('/planet-favorite-lists', methods=['GET'])
-def get_planet_favorite_lists():
-    favorite_lists = Planet_Favorite_List.query.all()
-    return jsonify(favorite_lists=[favorite_list.serialize() for favorite_list in favorite_lists])
-
-@app.route('/planet-favorite-lists', methods=['POST'])
-def create_planet_favorite_list():
-    data = request.get_json()
-    planet_id = data.get('planet_id')
-    user_id = data.get('user_id')
-
-    new_planet_favorite_list = Planet_Favorite_List(planet_id=planet_id, user_id=user_id)
-    db.session.add(new_planet_favorite_list)
-    db.session.commit()
-
-    return jsonify(message='Planet favorite list created successfully', favorite_list=new_planet_favorite_list.serialize()), 201
-
-@app.route('/planet-favorite-lists/<int:favorite_list_id>', methods=['GET'])
-def get_planet_favorite_list(favorite_list_id):
-    favorite_list = Planet_Favorite_List.query.get(favorite_list_id)
-    if favorite_list:
-        return jsonify(favorite_list.serialize())
-    else:
-        return jsonify(message='Planet favorite list not found'), 404
-
-@app.route('/planet-favorite-lists/<int:favorite_list_id>', methods=['PUT'])
-def update_planet_favorite_list(favorite_list_id):
-    favorite_list = Planet_Favorite_List.query.get(favorite_list_id)
-    if not favorite_list:
-        return jsonify(message='Planet favorite list not found'), 404
-
-    data = request.get_json()
-    favorite_list.planet_id = data.get('planet_id', favorite_list.planet_id)
-    favorite_list.user_id = data.get('user_id', favorite_list.user_id)
-
-    db.session.commit()
-
-    return jsonify(message='Planet favorite list updated successfully', favorite_list=favorite_list.serialize())
-
-@app.route('/planet-favorite-lists/<int:favorite_list_id>', methods=['DELETE'])
-def delete_planet_favorite_list(favorite_list_id):
-    favorite_list = Planet_Favorite_List.query.get(favorite_list_id)
-    if favorite_list:
-        db.session.delete(favorite_list)
-        db.session.commit()
-        return jsonify(message='Planet favorite list deleted successfully')
-    else:
-        return jsonify(message='Planet favorite list not found'), 404
-
-
-
-# ... (definición de la clase Vehicle_Favorite_List)
-
-@app.route('/vehicle-favorite-lists', methods=['GET'])
-def get_vehicle_favorite_lists():
-    favorite_lists = Vehicle_Favorite_List.query.all()
-    return jsonify(favorite_lists=[favorite_list.serialize() for favorite_list in favorite_lists])
-
-@app.route('/vehicle-favorite-lists', methods=['POST'])
-def create_vehicle_favorite_list():
-    data = request.get_json()
-    vehicle_id = data.get('vehicle_id')
-    user_id = data.get('user_id')
-
-    new_vehicle_favorite_list = Vehicle_Favorite_List(vehicle_id=vehicle_id, user_id=user_id)
-    db.session.add(new_vehicle_favorite_list)
-    db.session.commit()
-
-    return jsonify(message='Vehicle favorite list created successfully', favorite_list=new_vehicle_favorite_list.serialize()), 201
-
-@app.route('/vehicle-favorite-lists/<int:favorite_list_id>', methods=['GET'])
-def get_vehicle_favorite_list(favorite_list_id):
-    favorite_list = Vehicle_Favorite_List.query.get(favorite_list_id)
-    if favorite_list:
-        return jsonify(favorite_list.serialize())
-    else:
-        return jsonify(message='Vehicle favorite list not found'), 404
-
-@app.route('/vehicle-favorite-lists/<int:favorite_list_id>', methods=['PUT'])
-def update_vehicle_favorite_list(favorite_list_id):
-    favorite_list = Vehicle_Favorite_List.query.get(favorite_list_id)
-    if not favorite_list:
-        return jsonify(message='Vehicle favorite list not found'), 404
-
-    data = request.get_json()
-    favorite_list.vehicle_id = data.get('vehicle_id', favorite_list.vehicle_id)
-    favorite_list.user_id = data.get('user_id', favorite_list.user_id)
-
-    db.session.commit()
-
-    return jsonify(message='Vehicle favorite list updated successfully', favorite_list=favorite_list.serialize())
-
-@app.route('/vehicle-favorite-lists/<int:favorite_list_id>', methods=['DELETE'])
-def delete_vehicle_favorite_list(favorite_list_id):
-    favorite_list = Vehicle_Favorite_List.query.get(favorite_list_id)
-    if favorite_list:
-        db.session.delete(favorite_list)
-        db.session.commit()
-
+# ... (catálogo y listas de favoritos: rutas CRUD generadas a partir de las columnas de cada modelo)
 
+RESOURCES = [
+    CatalogResource(Planet, 'planet', 'Planet'),
+    CatalogResource(Character, 'character', 'Character'),
+    CatalogResource(Vehicle, 'vehicle', 'Vehicle'),
+    FavoriteResource(Character_Favorite_List, 'character_favorite_list', 'Character favorite list',
+                     id_arg='favorite_list_id', item_key='favorite_list', list_key='favorite_lists',
+                     conflict_message='Character is already in this user favorites'),
+    FavoriteResource(Planet_Favorite_List, 'planet_favorite_list', 'Planet favorite list',
+                     id_arg='favorite_list_id', item_key='favorite_list', list_key='favorite_lists',
+                     conflict_message='Planet is already in this user favorites'),
+    FavoriteResource(Vehicle_Favorite_List, 'vehicle_favorite_list', 'Vehicle favorite list',
+                     id_arg='favorite_list_id', item_key='favorite_list', list_key='favorite_lists',
+                     conflict_message='Vehicle is already in this user favorites'),
+]
 
 
 # this only runs if `$ python src/app.py` is executed
 if __name__ == '__main__':
     PORT = int(os.environ.get('PORT', 3000))
-    app.run(host='0.0.0.0', port=PORT, debug=False)
\ No newline at end of file
+    create_app().run(host='0.0.0.0', port=PORT, debug=False)
\ No newline at end of file
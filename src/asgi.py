@@ -0,0 +1,121 @@
+# ASGI entry point, next to wsgi.py, for running the API under an ASGI server:
+#
+#   uvicorn asgi:application --app-dir src --workers 2
+#   GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker gunicorn asgi:application
+#
+# Flask itself stays synchronous: each request runs on a thread from a bounded
+# pool (ASGI_THREADS per worker process), so a slow query or a bcrypt check
+# blocks one thread instead of the whole worker.
+import os
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from asgiref.sync import async_to_sync, sync_to_async
+from wsgi import application as app
+
+ASGI_THREADS = int(os.getenv('ASGI_THREADS', 16))
+# Request bodies above this size are spooled to a temporary file (bulk NDJSON uploads)
+BODY_MEMORY_LIMIT = 64 * 1024
+
+_executor = ThreadPoolExecutor(max_workers=ASGI_THREADS, thread_name_prefix='asgi')
+
+
+def build_environ(scope, body):
+    script_name = scope.get('root_path', '').encode('utf8').decode('latin1')
+    path_info = scope['path'].encode('utf8').decode('latin1')
+    if path_info.startswith(script_name):
+        path_info = path_info[len(script_name):]
+    server_name, server_port = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': script_name,
+        'PATH_INFO': path_info,
+        'QUERY_STRING': scope['query_string'].decode('ascii'),
+        'SERVER_NAME': server_name,
+        'SERVER_PORT': str(server_port),
+        'SERVER_PROTOCOL': 'HTTP/%s' % scope['http_version'],
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': body,
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    if scope.get('client'):
+        environ['REMOTE_ADDR'] = scope['client'][0]
+    for name, value in scope.get('headers', []):
+        name, value = name.decode('latin1'), value.decode('latin1')
+        key = {'content-length': 'CONTENT_LENGTH', 'content-type': 'CONTENT_TYPE'}.get(
+            name, 'HTTP_' + name.upper().replace('-', '_'))
+        # Repeated headers are joined with commas, as WSGI expects
+        environ[key] = environ[key] + ',' + value if key in environ else value
+    return environ
+
+
+def run_wsgi(wsgi_application, scope, body, send):
+    # Runs on a pool thread; send is the ASGI send made synchronous with async_to_sync
+    response_start = None
+    started = False
+
+    def start_response(status, headers, exc_info=None):
+        nonlocal response_start
+        if exc_info is not None and started:
+            raise exc_info[1].with_traceback(exc_info[2])
+        response_start = {
+            'type': 'http.response.start',
+            'status': int(status.split(' ', 1)[0]),
+            'headers': [(name.lower().encode('latin1'), value.encode('latin1')) for name, value in headers],
+        }
+
+    result = wsgi_application(build_environ(scope, body), start_response)
+    try:
+        for chunk in result:
+            if not started:
+                started = True
+                send(response_start)
+            if chunk:
+                send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+    finally:
+        if hasattr(result, 'close'):
+            result.close()
+    if not started:
+        send(response_start)
+    send({'type': 'http.response.body'})
+
+
+class ThreadedWsgiToAsgi:
+    """Serves a WSGI app over ASGI, each request on a thread of the pool. asgiref's
+    WsgiToAsgi runs every request on one shared thread (thread_sensitive=True), which
+    serializes the whole worker; this only relies on asgiref's public sync_to_async."""
+
+    def __init__(self, wsgi_application):
+        self.wsgi_application = wsgi_application
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            # Nothing to set up or tear down; acknowledge so servers do not log a failure
+            while True:
+                message = await receive()
+                if message['type'] == 'lifespan.startup':
+                    await send({'type': 'lifespan.startup.complete'})
+                elif message['type'] == 'lifespan.shutdown':
+                    await send({'type': 'lifespan.shutdown.complete'})
+                    return
+        if scope['type'] != 'http':
+            raise ValueError('The API only speaks HTTP, not %s' % scope['type'])
+
+        with tempfile.SpooledTemporaryFile(max_size=BODY_MEMORY_LIMIT) as body:
+            while True:
+                message = await receive()
+                if message['type'] == 'http.disconnect':
+                    return  # the client went away before sending the whole body
+                body.write(message.get('body', b''))
+                if not message.get('more_body'):
+                    break
+            body.seek(0)
+            await sync_to_async(run_wsgi, thread_sensitive=False, executor=_executor)(
+                self.wsgi_application, scope, body, async_to_sync(send))
+
+
+application = ThreadedWsgiToAsgi(app)
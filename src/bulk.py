@@ -0,0 +1,219 @@
+import json
+import os
+from datetime import datetime
+from flask import request
+from sqlalchemy import bindparam, delete, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from utils import APIException
+from models import db
+from search import index_entities, remove_entities
+
+# Rows sent to the database per executemany / multi-row statement
+BULK_BATCH_SIZE = int(os.getenv('BULK_BATCH_SIZE', 500))
+
+# Columns the API never lets clients write directly
+READ_ONLY_COLUMNS = ('id', 'version', 'updated_at', 'favorite_count')
+
+
+def iter_bulk_body():
+    # NDJSON bodies are parsed line by line straight off the request stream,
+    # so a large upload is never held in memory as a whole.
+    if request.mimetype == 'application/x-ndjson':
+        for line in request.stream:
+            if line.strip():
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    yield None
+        return
+
+    data = request.get_json(silent=True)
+    if not isinstance(data, list):
+        raise APIException('Body must be a JSON array or NDJSON', status_code=400)
+    yield from data
+
+
+def writable_columns(model):
+    return [column for column in model.__table__.columns if column.name not in READ_ONLY_COLUMNS]
+
+
+def validate_row(model, row, require_id=False):
+    if not isinstance(row, dict):
+        return None, 'Row must be a JSON object'
+
+    columns = {column.name: column for column in writable_columns(model)}
+    unknown = set(row) - set(columns) - {'id'}
+    if unknown:
+        return None, 'Unknown fields: ' + ', '.join(sorted(unknown))
+
+    clean = {}
+    if 'id' in row or require_id:
+        if not isinstance(row.get('id'), int) or isinstance(row.get('id'), bool):
+            return None, 'id must be an integer'
+        clean['id'] = row['id']
+
+    for name, value in row.items():
+        if name == 'id':
+            continue
+        column = columns[name]
+        if value is None:
+            if not column.nullable:
+                return None, '%s cannot be null' % name
+        elif column.type.python_type is int:
+            if not isinstance(value, int) or isinstance(value, bool):
+                return None, '%s must be an integer' % name
+        elif column.type.python_type is str:
+            if not isinstance(value, str):
+                return None, '%s must be a string' % name
+            if column.type.length and len(value) > column.type.length:
+                return None, '%s is longer than %s characters' % (name, column.type.length)
+        clean[name] = value
+    return clean, None
+
+
+def iter_batches(model, require_id=False):
+    # Yields (batch, errors) where batch is a list of (index, clean_row) ready for one
+    # statement and errors are the per-row results for rows that failed validation.
+    batch, errors = [], []
+    for index, row in enumerate(iter_bulk_body()):
+        clean, error = validate_row(model, row, require_id=require_id)
+        if error:
+            errors.append({'index': index, 'error': error})
+            continue
+        batch.append((index, clean))
+        if len(batch) >= BULK_BATCH_SIZE:
+            yield batch, errors
+            batch, errors = [], []
+    if batch or errors:
+        yield batch, errors
+
+
+def _upsert_statement(model):
+    table = model.__table__
+    dialect = db.engine.dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        raise APIException('Upsert is not supported on %s' % dialect, status_code=400)
+
+    stmt = dialect_insert(table)
+    values = {column.name: stmt.excluded[column.name] for column in writable_columns(model)}
+    values['version'] = table.c.version + 1
+    values['updated_at'] = datetime.utcnow()
+    return stmt.on_conflict_do_update(index_elements=[table.c.id], set_=values)
+
+
+def bulk_create(model, upsert=False):
+    table = model.__table__
+    names = [column.name for column in writable_columns(model)]
+    results, touched_ids = [], []
+
+    for batch, errors in iter_batches(model):
+        results.extend(errors)
+        new_rows = [(i, row) for i, row in batch if 'id' not in row]
+        id_rows = [(i, row) for i, row in batch if 'id' in row]
+
+        for rows, stmt, status in [
+            (new_rows, insert(table), 'created'),
+            (id_rows, _upsert_statement(model) if upsert and id_rows else insert(table), 'upserted' if upsert else 'created'),
+        ]:
+            if not rows:
+                continue
+            # Fill missing columns so every row has the same keys and the whole
+            # batch goes to the driver as a single executemany
+            params = [dict({name: None for name in names}, **row) for _, row in rows]
+            try:
+                ids = _insert_rows(model, stmt, params)
+                written = list(zip(rows, ids))
+            except IntegrityError:
+                # One bad row fails the whole statement: redo the batch row by row so
+                # only the rows that really conflict are reported
+                db.session.rollback()
+                written = []
+                for (index, row), row_params in zip(rows, params):
+                    try:
+                        written.extend(zip([(index, row)], _insert_rows(model, stmt, [row_params])))
+                    except IntegrityError as e:
+                        db.session.rollback()
+                        results.append({'index': index, 'error': 'Conflict: ' + str(e.orig)})
+            for (index, _), row_id in written:
+                results.append({'index': index, 'id': row_id, 'status': status})
+                touched_ids.append(row_id)
+            if rows is id_rows and written:
+                _sync_id_sequence(model)
+
+    return sorted(results, key=lambda result: result['index']), touched_ids
+
+
+def _insert_rows(model, stmt, params):
+    table = model.__table__
+    ids = db.session.execute(stmt.returning(table.c.id, sort_by_parameter_order=True), params).scalars().all()
+    index_entities(model, ids)
+    db.session.commit()
+    return ids
+
+
+def _sync_id_sequence(model):
+    # Rows inserted with an explicit id do not advance the postgres serial sequence;
+    # without this the next POST without an id would collide with them
+    if db.engine.dialect.name != 'postgresql':
+        return
+    table = model.__table__
+    db.session.execute(select(func.setval(func.pg_get_serial_sequence('"%s"' % table.name, 'id'),
+                                          select(func.max(table.c.id)).scalar_subquery())))
+    db.session.commit()
+
+
+def bulk_update(model):
+    table = model.__table__
+    results, touched_ids = [], []
+
+    for batch, errors in iter_batches(model, require_id=True):
+        results.extend(errors)
+        ids = [row['id'] for _, row in batch]
+        existing = set(db.session.execute(select(table.c.id).where(table.c.id.in_(ids))).scalars())
+
+        # Rows updating the same set of columns share one executemany
+        groups = {}
+        for index, row in batch:
+            if row['id'] not in existing:
+                results.append({'index': index, 'id': row['id'], 'error': 'Not found'})
+                continue
+            groups.setdefault(tuple(sorted(k for k in row if k != 'id')), []).append((index, row))
+
+        for names, rows in groups.items():
+            values = {name: bindparam('v_' + name) for name in names}
+            values['version'] = table.c.version + 1
+            values['updated_at'] = datetime.utcnow()
+            stmt = update(table).where(table.c.id == bindparam('b_id')).values(values)
+            params = [dict({'v_' + name: row[name] for name in names}, b_id=row['id']) for _, row in rows]
+            db.session.connection().execute(stmt, params)
+            for index, row in rows:
+                results.append({'index': index, 'id': row['id'], 'status': 'updated'})
+                touched_ids.append(row['id'])
+        index_entities(model, [row['id'] for rows in groups.values() for _, row in rows])
+        db.session.commit()
+
+    return sorted(results, key=lambda result: result['index']), touched_ids
+
+
+def bulk_delete(model):
+    table = model.__table__
+    data = request.get_json(silent=True) or {}
+    ids = data.get('ids') if isinstance(data, dict) else None
+    if not isinstance(ids, list) or not all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+        raise APIException('Body must be {"ids": [<int>, ...]}', status_code=400)
+
+    results, touched_ids = [], []
+    for start in range(0, len(ids), BULK_BATCH_SIZE):
+        chunk = ids[start:start + BULK_BATCH_SIZE]
+        deleted = set(db.session.execute(delete(table).where(table.c.id.in_(chunk)).returning(table.c.id)).scalars())
+        remove_entities(model, deleted)
+        db.session.commit()
+        for row_id in chunk:
+            results.append({'id': row_id, 'status': 'deleted'} if row_id in deleted else {'id': row_id, 'error': 'Not found'})
+        touched_ids.extend(deleted)
+
+    return results, touched_ids
@@ -0,0 +1,191 @@
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from functools import wraps
+from flask import Response, current_app, request
+from streaming import wants_stream
+
+
+class LRUCache:
+    """Bounded in-process cache; least recently used entries go first, expired ones on read."""
+
+    def __init__(self, maxsize=1024, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, key):
+        item = self._data.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def _set(self, key, value):
+        self._data[key] = (value, time.monotonic() + self.ttl)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def get(self, key):
+        with self._lock:
+            return self._get(key)
+
+    def set(self, key, value):
+        with self._lock:
+            self._set(key, value)
+
+    def add(self, key, value):
+        # Store value only if the key is missing, and return whatever is stored
+        with self._lock:
+            current = self._get(key)
+            if current is not None:
+                return current
+            self._set(key, value)
+            return value
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class RedisCache:
+    """Cache shared by every worker, on a client from redis_client()."""
+
+    def __init__(self, client, ttl=60, prefix='cache:'):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key):
+        value = self.client.get(self.prefix + key)
+        return json.loads(value) if value is not None else None
+
+    def set(self, key, value):
+        self.client.set(self.prefix + key, json.dumps(value), ex=self.ttl)
+
+    def add(self, key, value):
+        self.client.set(self.prefix + key, json.dumps(value), ex=self.ttl, nx=True)
+        return self.get(key)
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+    def clear(self):
+        for key in self.client.scan_iter(self.prefix + '*'):
+            self.client.delete(key)
+
+
+class NullCache:
+    def get(self, key):
+        return None
+
+    def set(self, key, value):
+        pass
+
+    def add(self, key, value):
+        return value
+
+    def delete(self, key):
+        pass
+
+    def clear(self):
+        pass
+
+
+_redis_clients = {}
+
+
+def redis_client(url_setting='CACHE_REDIS_URL'):
+    """Client for the redis-backed stores (response cache, rate limits, idempotency keys).
+    Each store reads its URL from its own setting, falling back to CACHE_REDIS_URL, and
+    stores on the same URL share one client and connection pool. The stores take any
+    redis-py compatible client, so a local redis server or an in-memory stand-in such
+    as fakeredis works the same way."""
+    url = os.getenv(url_setting) or os.getenv('CACHE_REDIS_URL', 'redis://localhost:6379/0')
+    if url not in _redis_clients:
+        import redis  # optional dependency, only needed for the shared backends
+        _redis_clients[url] = redis.Redis.from_url(url)
+    return _redis_clients[url]
+
+
+def make_cache_backend():
+    backend = os.getenv('CACHE_BACKEND', 'memory')
+    ttl = int(os.getenv('CACHE_TTL', 60))
+    if backend == 'redis':
+        return RedisCache(redis_client(), ttl=ttl)
+    if backend == 'none':
+        return NullCache()
+    if int(os.getenv('WEB_CONCURRENCY', 1)) > 1:
+        # invalidate() only reaches the worker that made the write; the others would keep
+        # serving stale pages for up to CACHE_TTL. Several workers need the redis backend.
+        logging.getLogger(__name__).warning(
+            'CACHE_BACKEND=memory is per worker and WEB_CONCURRENCY > 1: response cache disabled, use redis')
+        return NullCache()
+    return LRUCache(maxsize=int(os.getenv('CACHE_MAXSIZE', 1024)), ttl=ttl)
+
+
+response_cache = make_cache_backend()
+
+
+# Entries are keyed under a generation token per namespace (collection pages) and per
+# item (detail pages). Invalidating drops the token, so every entry stored under it
+# becomes unreachable at once; a lost token only costs a miss, never a stale read.
+def _generation(key):
+    return response_cache.add('gen:' + key, uuid.uuid4().hex)
+
+
+def response_key(namespace, item_id=None):
+    scope = namespace if item_id is None else '%s:%s' % (namespace, item_id)
+    args = '&'.join('%s=%s' % (k, v) for k, v in sorted(request.args.items(multi=True)))
+    return 'resp:%s:%s:%s?%s' % (scope, _generation(scope), request.path, args)
+
+
+def invalidate(namespace, item_id=None):
+    response_cache.delete('gen:' + namespace)
+    if item_id is not None:
+        response_cache.delete('gen:%s:%s' % (namespace, item_id))
+
+
+def invalidate_many(namespace, item_ids):
+    response_cache.delete('gen:' + namespace)
+    for item_id in item_ids:
+        response_cache.delete('gen:%s:%s' % (namespace, item_id))
+
+
+def cached(namespace, id_arg=None):
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if wants_stream():
+                return view(*args, **kwargs)
+
+            key = response_key(namespace, kwargs.get(id_arg) if id_arg else None)
+            hit = response_cache.get(key)
+            if hit is not None:
+                response = Response(hit['body'], status=hit['status'], headers=hit['headers'])
+                return response.make_conditional(request)
+
+            response = current_app.make_response(view(*args, **kwargs))
+            if response.status_code == 200 and not response.is_streamed:
+                response_cache.set(key, {
+                    'body': response.get_data(as_text=True),
+                    'status': response.status_code,
+                    'headers': [(k, v) for k, v in response.headers.items() if k != 'Content-Length'],
+                })
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,46 @@
+import hashlib
+from flask import Response, request
+from sqlalchemy import func, select
+from models import db
+
+# Strong validators for the catalog GET routes. Clients send the ETag back in
+# If-None-Match and get an empty 304 when nothing changed.
+
+
+def item_etag(obj):
+    return version_etag(obj.__tablename__, obj.id, obj.version)
+
+
+def version_etag(table, item_id, version):
+    return '%s-%s-v%s' % (table, item_id, version)
+
+
+def table_fingerprint(model):
+    # count + max(id) + max(updated_at) changes on every create, update and delete,
+    # and max(updated_at) is answered from its index.
+    return tuple(db.session.execute(
+        select(func.count(model.id), func.max(model.id), func.max(model.updated_at))
+    ).one())
+
+
+def collection_etag(model, fingerprint=None):
+    count, max_id, last_modified = fingerprint or table_fingerprint(model)
+    args = sorted(request.args.items(multi=True))
+    digest = hashlib.sha1(repr((count, max_id, last_modified, args)).encode('utf-8')).hexdigest()
+    return '%s-%s' % (model.__tablename__, digest)
+
+
+def is_fresh(etag):
+    return request.if_none_match.contains(etag)
+
+
+def not_modified(etag, last_modified=None):
+    response = Response(status=304)
+    return tag_response(response, etag, last_modified)
+
+
+def tag_response(response, etag, last_modified=None):
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    return response
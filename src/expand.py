@@ -0,0 +1,40 @@
+from flask import request
+from sqlalchemy.orm import joinedload, selectinload
+from utils import APIException
+
+# ?expand=character,user embeds related rows in the response. Every requested
+# relationship is eager loaded, so the number of queries does not grow with the
+# number of rows returned.
+
+
+def get_expand(model):
+    names = [name.strip() for name in request.args.get('expand', '').split(',') if name.strip()]
+    allowed = model.__mapper__.relationships.keys()
+    unknown = [name for name in names if name not in allowed]
+    if unknown:
+        raise APIException('Cannot expand: ' + ', '.join(unknown), status_code=400,
+                           payload={'allowed': sorted(allowed)})
+    return names
+
+
+def expand_options(model, names):
+    options = []
+    for name in names:
+        relationship = model.__mapper__.relationships[name]
+        # Many-to-one rides along in the same SELECT; collections get one extra IN query
+        loader = selectinload if relationship.uselist else joinedload
+        options.append(loader(getattr(model, name)))
+    return options
+
+
+def serialize_expanded(obj, names):
+    data = obj.serialize()
+    for name in names:
+        value = getattr(obj, name)
+        if value is None:
+            data[name] = None
+        elif isinstance(value, list):
+            data[name] = [item.serialize() for item in value]
+        else:
+            data[name] = value.serialize()
+    return data
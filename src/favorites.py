@@ -0,0 +1,40 @@
+from sqlalchemy import literal, select, union_all
+from models import db, User, Planet, Character, Vehicle, Character_Favorite_List, Planet_Favorite_List, Vehicle_Favorite_List
+
+FAVORITE_KINDS = [
+    ('characters', Character_Favorite_List, Character_Favorite_List.character_id, Character),
+    ('planets', Planet_Favorite_List, Planet_Favorite_List.planet_id, Planet),
+    ('vehicles', Vehicle_Favorite_List, Vehicle_Favorite_List.vehicle_id, Vehicle),
+]
+
+
+def user_favorites(user_id):
+    # One UNION ALL over the three favorite tables, each joined to its entity and
+    # driven by the (user_id, <entity>_id) index, so this is a single round trip.
+    stmt = union_all(*[
+        select(
+            literal(kind).label('kind'),
+            favorite_model.id.label('favorite_id'),
+            entity_model.id.label('id'),
+            entity_model.name.label('name'),
+            entity_model.description.label('description'),
+        )
+        .join(entity_model, entity_column == entity_model.id)
+        .where(favorite_model.user_id == user_id)
+        for kind, favorite_model, entity_column, entity_model in FAVORITE_KINDS
+    ])
+    rows = db.session.execute(stmt).all()
+
+    # Only an empty result needs the extra lookup to tell "no favorites" from "no user"
+    if not rows and db.session.get(User, user_id) is None:
+        return None
+
+    favorites = {kind: [] for kind, _, _, _ in FAVORITE_KINDS}
+    for row in rows:
+        favorites[row.kind].append({
+            "favorite_id": row.favorite_id,
+            "id": row.id,
+            "name": row.name,
+            "description": row.description,
+        })
+    return favorites
@@ -0,0 +1,92 @@
+from flask import request
+from utils import APIException
+from models import Planet, Character, Vehicle
+
+# Whitelisted filters and sorts for the catalog collections, e.g.
+#   /planets?terrain=desert&population_gt=1000000&sort=-diameter
+# Only the columns listed here can be queried. Every range filter column is also
+# sortable, and every sortable column has an index: its own, or (column, id) where
+# it had none (see models.py).
+
+RANGE = ('eq', 'ne', 'gt', 'gte', 'lt', 'lte')
+EQUALITY = ('eq', 'ne')
+
+FILTERS = {
+    Planet: {
+        'name': EQUALITY, 'terrain': EQUALITY,
+        'population': RANGE, 'diameter': RANGE, 'orbital_period': RANGE,
+    },
+    Character: {
+        'name': EQUALITY, 'gender': EQUALITY, 'eye_color': EQUALITY, 'hair_color': EQUALITY,
+        'height': RANGE, 'birth_date': RANGE,
+    },
+    Vehicle: {
+        'name': EQUALITY, 'model': EQUALITY, 'manufacturer': EQUALITY, 'vehicle_class': EQUALITY,
+        'passengers': RANGE, 'max_speed': RANGE,
+    },
+}
+
+SORTS = {
+    Planet: ('name', 'population', 'diameter', 'orbital_period'),
+    Character: ('name', 'height', 'birth_date'),
+    Vehicle: ('name', 'passengers', 'max_speed'),
+}
+
+# Query args owned by other layers (pagination, streaming, expansion, ...)
+RESERVED_ARGS = {'after', 'limit', 'sort', 'stream', 'expand', 'fields'}
+
+OPERATORS = {
+    'eq': lambda column, value: column == value,
+    'ne': lambda column, value: column != value,
+    'gt': lambda column, value: column > value,
+    'gte': lambda column, value: column >= value,
+    'lt': lambda column, value: column < value,
+    'lte': lambda column, value: column <= value,
+}
+
+
+def _split_filter(key):
+    field, _, operator = key.rpartition('_')
+    if field and operator in OPERATORS:
+        return field, operator
+    return key, 'eq'
+
+
+def parse_filters(model):
+    # [(column name, operator, value)] with integer values already converted
+    allowed = FILTERS.get(model, {})
+    parsed = []
+    for key, value in request.args.items(multi=True):
+        if key in RESERVED_ARGS:
+            continue
+        field, operator = _split_filter(key)
+        if field not in allowed or operator not in allowed[field]:
+            field, operator = key, 'eq'
+        if field not in allowed or operator not in allowed[field]:
+            raise APIException('Unsupported filter: ' + key, status_code=400,
+                               payload={'filters': {name: list(ops) for name, ops in allowed.items()}})
+
+        column = getattr(model, field)
+        if column.type.python_type is int:
+            try:
+                value = int(value)
+            except ValueError:
+                raise APIException('%s must be an integer' % key, status_code=400)
+        parsed.append((field, operator, value))
+    return parsed
+
+
+def get_filters(model):
+    return [OPERATORS[operator](getattr(model, field), value) for field, operator, value in parse_filters(model)]
+
+
+def get_sort(model):
+    sort = request.args.get('sort')
+    if not sort:
+        return None
+    descending = sort.startswith('-')
+    field = sort.lstrip('-+')
+    if field not in SORTS.get(model, ()):
+        raise APIException('Unsupported sort: ' + sort, status_code=400,
+                           payload={'sorts': list(SORTS.get(model, ()))})
+    return getattr(model, field), descending
@@ -0,0 +1,47 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from flask_bcrypt import Bcrypt
+from utils import APIException
+from metrics import Counter, Gauge, Histogram
+
+# bcrypt releases the GIL while hashing, so a small thread pool is enough to keep
+# password work off the request thread and bound how much CPU it can take.
+HASH_WORKERS = int(os.getenv('HASH_WORKERS', 2))
+# Hashes allowed in flight (running + waiting) before new ones are rejected with 503
+HASH_QUEUE_SIZE = int(os.getenv('HASH_QUEUE_SIZE', 16))
+HASH_RETRY_AFTER = int(os.getenv('HASH_RETRY_AFTER', 1))
+
+bcrypt = Bcrypt()
+
+_executor = ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix='bcrypt')
+_slots = threading.BoundedSemaphore(HASH_QUEUE_SIZE)
+
+hash_queue_depth = Gauge('hash_queue_depth', 'Password hashes running or waiting for a worker')
+hash_duration = Histogram('hash_duration_seconds', 'Time from submitting a password hash to getting its result')
+hash_rejected = Counter('hash_rejected_total', 'Password hashes rejected because the queue was full')
+
+
+def _run(operation, fn, *args):
+    if not _slots.acquire(blocking=False):
+        hash_rejected.inc(operation=operation)
+        raise APIException('Server is busy, try again later', status_code=503,
+                           headers={'Retry-After': str(HASH_RETRY_AFTER)})
+
+    hash_queue_depth.inc()
+    start = time.perf_counter()
+    try:
+        return _executor.submit(fn, *args).result()
+    finally:
+        hash_duration.observe(time.perf_counter() - start, operation=operation)
+        hash_queue_depth.dec()
+        _slots.release()
+
+
+def generate_password_hash(password):
+    return _run('generate', bcrypt.generate_password_hash, password).decode('utf-8')
+
+
+def check_password_hash(pw_hash, password):
+    return _run('check', bcrypt.check_password_hash, pw_hash, password)
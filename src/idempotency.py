@@ -0,0 +1,95 @@
+import hashlib
+import os
+import time
+import uuid
+from functools import wraps
+from flask import current_app, jsonify, make_response, request
+from cache import LRUCache, RedisCache, redis_client
+from metrics import Counter
+
+# Idempotency-Key for POSTs that create things (/signup). The first request with a key
+# reserves it, runs and stores its response; a retry with the same key and the same
+# body gets that response back (Idempotent-Replayed: true) without running the view
+# again. The same key with a different body is a client bug (422); a retry while the
+# first request is still running gets 409. 5xx responses and errors are not stored,
+# so the client can retry them with the same key.
+#
+#   IDEMPOTENCY_BACKEND=memory    memory (per worker) or redis (shared by every worker)
+#   IDEMPOTENCY_REDIS_URL=        redis for the shared backend (default: CACHE_REDIS_URL)
+#   IDEMPOTENCY_TTL=86400         seconds a stored response can be replayed
+#   IDEMPOTENCY_MAXSIZE=10000     stored responses per worker (memory backend, least recently used go first)
+#   IDEMPOTENCY_LOCK_SECONDS=60   a reservation older than this belongs to a request that died; it is taken over
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+LOCK_SECONDS = float(os.getenv('IDEMPOTENCY_LOCK_SECONDS', 60))
+
+idempotent_replays = Counter('idempotent_replays_total', 'Responses replayed for a repeated Idempotency-Key, by scope')
+
+
+def make_idempotency_store():
+    backend = os.getenv('IDEMPOTENCY_BACKEND', 'memory')
+    ttl = int(os.getenv('IDEMPOTENCY_TTL', 86400))
+    if backend == 'redis':
+        return RedisCache(redis_client('IDEMPOTENCY_REDIS_URL'), ttl=ttl, prefix='idempotency:')
+    return LRUCache(maxsize=int(os.getenv('IDEMPOTENCY_MAXSIZE', 10000)), ttl=ttl)
+
+
+idempotency_store = make_idempotency_store()
+
+
+def _fingerprint():
+    return hashlib.sha256(b'%s %s\n%s' % (request.method.encode(), request.path.encode(),
+                                          request.get_data(cache=True))).hexdigest()
+
+
+def _replay(entry):
+    response = current_app.response_class(entry['body'], status=entry['status'],
+                                          headers=[tuple(header) for header in entry['headers']])
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def idempotent(scope):
+    """Honours the Idempotency-Key header on the decorated view. Goes above @rate_limit,
+    so replaying a stored response does not count as another attempt."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            key = request.headers.get(HEADER)
+            if key is None:
+                return view(*args, **kwargs)
+            if not key or len(key) > MAX_KEY_LENGTH:
+                return jsonify({'error': '%s must be 1 to %d characters.' % (HEADER, MAX_KEY_LENGTH)}), 400
+
+            store_key = '%s:%s' % (scope, key)
+            fingerprint = _fingerprint()
+            reservation = {'state': 'pending', 'token': uuid.uuid4().hex, 'fingerprint': fingerprint,
+                           'started': time.time()}
+            entry = idempotency_store.add(store_key, reservation)
+            if entry is not None and entry.get('token') != reservation['token']:
+                if entry['fingerprint'] != fingerprint:
+                    return jsonify({'error': '%s was already used with a different request.' % HEADER}), 422
+                if entry['state'] == 'done':
+                    idempotent_replays.inc(scope=scope)
+                    return _replay(entry)
+                if time.time() - entry['started'] < LOCK_SECONDS:
+                    return jsonify({'error': 'A request with this %s is still being processed.' % HEADER}), 409
+                idempotency_store.set(store_key, reservation)  # its owner died; this request takes over
+
+            try:
+                response = make_response(view(*args, **kwargs))
+            except BaseException:
+                idempotency_store.delete(store_key)
+                raise
+            if response.status_code >= 500 or response.status_code == 429 or response.is_streamed:
+                idempotency_store.delete(store_key)
+            else:
+                idempotency_store.set(store_key, {
+                    'state': 'done', 'token': reservation['token'], 'fingerprint': fingerprint,
+                    'started': reservation['started'], 'status': response.status_code,
+                    'body': response.get_data(as_text=True),
+                    'headers': [(name, value) for name, value in response.headers if name != 'Content-Length'],
+                })
+            return response
+        return wrapper
+    return decorator
@@ -1,18 +1,30 @@
+from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
+from replicas import RoutingSession
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    username = db.Column(db.String(250), nullable=True)
+    # Unique: signup inserts straight away and a duplicate comes back as IntegrityError (409)
+    username = db.Column(db.String(250), nullable=True, index=True, unique=True)
     password = db.Column(db.String(250), nullable=False)
     name = db.Column(db.String(250), nullable=True)
     surname = db.Column(db.String(250), nullable=True)
     phone_number = db.Column(db.String(250), nullable=True)
-    email = db.Column(db.String(250), nullable=False)
+    email = db.Column(db.String(250), nullable=False, index=True, unique=True)
     address = db.Column(db.String(250), nullable=True)
     is_active = db.Column(db.Boolean, nullable=False)
 
+    # passive_deletes: deleting a user leaves its favorites to the database cascade
+    # instead of loading them first
+    character_favorites = db.relationship('Character_Favorite_List', back_populates='user',
+                                          cascade='all, delete-orphan', passive_deletes=True)
+    planet_favorites = db.relationship('Planet_Favorite_List', back_populates='user',
+                                       cascade='all, delete-orphan', passive_deletes=True)
+    vehicle_favorites = db.relationship('Vehicle_Favorite_List', back_populates='user',
+                                        cascade='all, delete-orphan', passive_deletes=True)
+
     def __init__(self, **kwargs):
         super(User, self).__init__(**kwargs)
 
@@ -42,10 +54,24 @@ class Planet(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(250))
     description = db.Column(db.String(250))
-    population = db.Column(db.Integer)
-    terrain = db.Column(db.String(25))
-    diameter = db.Column(db.Integer)
+    population = db.Column(db.Integer, index=True)
+    terrain = db.Column(db.String(25), index=True)
+    diameter = db.Column(db.Integer, index=True)
     orbital_period = db.Column(db.Integer)
+    # Bumped by every update, ORM (version_id_col below) or bulk; drives ETag / Last-Modified on the GET routes
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow,
+                           server_default=db.func.now(), index=True)
+    # Rows in Planet_Favorite_List pointing here; kept in step by the favorite handlers (see popularity.py)
+    favorite_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+    # /planets/popular walks this index backwards: ORDER BY favorite_count DESC, id DESC LIMIT n
+    # Sortable columns without an index of their own: keyset pages ORDER BY <column>, id
+    __table_args__ = (db.Index('ix_planet_favorite_count_id', 'favorite_count', 'id'),
+                      db.Index('ix_planet_name_id', 'name', 'id'),
+                      db.Index('ix_planet_orbital_period_id', 'orbital_period', 'id'))
+    # Any ORM update (API, Flask-Admin, ...) bumps version, so the strong ETag never outlives a change
+    __mapper_args__ = {'version_id_col': version}
     
 
     def __init__(self, **kwargs):
@@ -73,11 +99,25 @@ class Character(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(250))
     description = db.Column(db.String(250))
-    eye_color = db.Column(db.String(20))
+    eye_color = db.Column(db.String(20), index=True)
     hair_color = db.Column(db.String(20))
-    gender = db.Column(db.String(20))
-    height = db.Column(db.Integer)
+    gender = db.Column(db.String(20), index=True)
+    height = db.Column(db.Integer, index=True)
     birth_date = db.Column(db.Integer)
+    # Bumped by every update, ORM (version_id_col below) or bulk; drives ETag / Last-Modified on the GET routes
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow,
+                           server_default=db.func.now(), index=True)
+    # Rows in Character_Favorite_List pointing here; kept in step by the favorite handlers (see popularity.py)
+    favorite_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+    # /characters/popular walks this index backwards: ORDER BY favorite_count DESC, id DESC LIMIT n
+    # Sortable columns without an index of their own: keyset pages ORDER BY <column>, id
+    __table_args__ = (db.Index('ix_character_favorite_count_id', 'favorite_count', 'id'),
+                      db.Index('ix_character_name_id', 'name', 'id'),
+                      db.Index('ix_character_birth_date_id', 'birth_date', 'id'))
+    # Any ORM update (API, Flask-Admin, ...) bumps version, so the strong ETag never outlives a change
+    __mapper_args__ = {'version_id_col': version}
     
 
     def __init__(self, **kwargs):
@@ -107,10 +147,24 @@ class Vehicle(db.Model):
     name = db.Column(db.String(250))
     description = db.Column(db.String(250))
     model = db.Column(db.String(250))
-    manufacturer = db.Column(db.String(250))
+    manufacturer = db.Column(db.String(250), index=True)
     passengers = db.Column(db.Integer)
-    max_speed = db.Column(db.Integer)
-    vehicle_class = db.Column(db.String(250))
+    max_speed = db.Column(db.Integer, index=True)
+    vehicle_class = db.Column(db.String(250), index=True)
+    # Bumped by every update, ORM (version_id_col below) or bulk; drives ETag / Last-Modified on the GET routes
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow,
+                           server_default=db.func.now(), index=True)
+    # Rows in Vehicle_Favorite_List pointing here; kept in step by the favorite handlers (see popularity.py)
+    favorite_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+    # /vehicles/popular walks this index backwards: ORDER BY favorite_count DESC, id DESC LIMIT n
+    # Sortable columns without an index of their own: keyset pages ORDER BY <column>, id
+    __table_args__ = (db.Index('ix_vehicle_favorite_count_id', 'favorite_count', 'id'),
+                      db.Index('ix_vehicle_name_id', 'name', 'id'),
+                      db.Index('ix_vehicle_passengers_id', 'passengers', 'id'))
+    # Any ORM update (API, Flask-Admin, ...) bumps version, so the strong ETag never outlives a change
+    __mapper_args__ = {'version_id_col': version}
     
 
     def __init__(self, **kwargs):
@@ -137,8 +191,15 @@ class Vehicle(db.Model):
 
 class Character_Favorite_List(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    character_id = db.Column(db.Integer, db.ForeignKey('character.id'))
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
+    # Favorites go away with the user or the character they point at (ON DELETE CASCADE)
+    character_id = db.Column(db.Integer, db.ForeignKey('character.id', ondelete='CASCADE'))
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'))
+
+    # One row per (user, character); also serves the per-user favorites lookup
+    __table_args__ = (db.Index('ix_character_favorite_list_user_character', 'user_id', 'character_id', unique=True),)
+
+    character = db.relationship('Character')
+    user = db.relationship('User', back_populates='character_favorites')
 
     def __init__(self, **kwargs):
         super(Character_Favorite_List, self).__init__(**kwargs)
@@ -158,8 +219,15 @@ class Character_Favorite_List(db.Model):
 
 class Planet_Favorite_List(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    planet_id = db.Column(db.Integer, db.ForeignKey('planet.id'))
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
+    # Favorites go away with the user or the planet they point at (ON DELETE CASCADE)
+    planet_id = db.Column(db.Integer, db.ForeignKey('planet.id', ondelete='CASCADE'))
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'))
+
+    # One row per (user, planet); also serves the per-user favorites lookup
+    __table_args__ = (db.Index('ix_planet_favorite_list_user_planet', 'user_id', 'planet_id', unique=True),)
+
+    planet = db.relationship('Planet')
+    user = db.relationship('User', back_populates='planet_favorites')
 
     def __init__(self, **kwargs):
         super(Planet_Favorite_List, self).__init__(**kwargs)
@@ -179,8 +247,15 @@ class Planet_Favorite_List(db.Model):
 
 class Vehicle_Favorite_List(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    vehicle_id = db.Column(db.Integer, db.ForeignKey('vehicle.id'))
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
+    # Favorites go away with the user or the vehicle they point at (ON DELETE CASCADE)
+    vehicle_id = db.Column(db.Integer, db.ForeignKey('vehicle.id', ondelete='CASCADE'))
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'))
+
+    # One row per (user, vehicle); also serves the per-user favorites lookup
+    __table_args__ = (db.Index('ix_vehicle_favorite_list_user_vehicle', 'user_id', 'vehicle_id', unique=True),)
+
+    vehicle = db.relationship('Vehicle')
+    user = db.relationship('User', back_populates='vehicle_favorites')
 
     def __init__(self, **kwargs):
         super(Vehicle_Favorite_List, self).__init__(**kwargs)
@@ -196,4 +271,19 @@ class Vehicle_Favorite_List(db.Model):
         }
 
     def to_dict(self):
-        return self.serialize()
\ No newline at end of file
+        return self.serialize()
+
+
+class RevokedToken(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    jti = db.Column(db.String(36), nullable=False, unique=True)
+    token_type = db.Column(db.String(10), nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow,
+                           server_default=db.func.now(), index=True)
+
+    def __init__(self, **kwargs):
+        super(RevokedToken, self).__init__(**kwargs)
+
+    def __repr__(self):
+        return '<RevokedToken %r>' % self.jti
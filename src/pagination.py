@@ -0,0 +1,92 @@
+import base64
+import json
+import os
+from flask import request
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Query
+from utils import APIException
+from models import db
+
+# Keyset pagination: clients walk a collection with ?after=<cursor>&limit=N.
+# Rows are always ordered by primary key (or by the sort column, then primary key)
+# so deep pages cost the same as the first one.
+DEFAULT_PAGE_SIZE = int(os.getenv('DEFAULT_PAGE_SIZE', 100))
+MAX_PAGE_SIZE = int(os.getenv('MAX_PAGE_SIZE', 1000))
+
+
+def encode_cursor(value, row_id):
+    return base64.urlsafe_b64encode(json.dumps([value, row_id]).encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor, column=None):
+    # [value of the sort column, id]; anything else the client sends is a 400, never a 500
+    try:
+        decoded = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except ValueError:
+        raise APIException('Invalid cursor', status_code=400)
+    if not isinstance(decoded, list) or len(decoded) != 2:
+        raise APIException('Invalid cursor', status_code=400)
+    value, row_id = decoded
+    if type(row_id) is not int or not (value is None or column is None or _is_value_of(column, value)):
+        raise APIException('Invalid cursor', status_code=400)
+    return value, row_id
+
+
+def _is_value_of(column, value):
+    # JSON only gives back str, int, float, bool, list and dict; bool is not an int here
+    expected = column.type.python_type
+    return type(value) is expected or (expected is float and type(value) is int)
+
+
+def get_page_args(sort_column=None):
+    try:
+        after = request.args.get('after')
+        if after is not None and sort_column is None:
+            after = int(after)
+        limit = int(request.args.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        raise APIException('after and limit must be integers', status_code=400)
+
+    if limit < 1:
+        raise APIException('limit must be a positive integer', status_code=400)
+
+    if after is not None and sort_column is not None:
+        after = decode_cursor(after, sort_column)
+
+    return after, min(limit, MAX_PAGE_SIZE)
+
+
+def _after_condition(column, descending, value, last_id, id_column):
+    # NULLs sort last in both directions, so once the cursor reaches them only
+    # the id tie-breaker is left to compare.
+    if value is None:
+        return and_(column.is_(None), id_column > last_id)
+    past_value = column < value if descending else column > value
+    return or_(past_value, and_(column == value, id_column > last_id), column.is_(None))
+
+
+def paginate(query, id_column, sort=None):
+    after, limit = get_page_args(sort_column=sort[0] if sort is not None else None)
+
+    if sort is None:
+        query = query.order_by(id_column)
+        if after is not None:
+            query = query.filter(id_column > after)
+    else:
+        column, descending = sort
+        order = column.desc() if descending else column.asc()
+        query = query.order_by(order.nulls_last(), id_column)
+        if after is not None:
+            query = query.filter(_after_condition(column, descending, after[0], after[1], id_column))
+
+    # Fetch one extra row to know whether there is a next page without a COUNT(*).
+    # Accepts ORM queries (model instances) or select() statements (plain rows).
+    query = query.limit(limit + 1)
+    rows = query.all() if isinstance(query, Query) else db.session.execute(query).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = last.id if sort is None else encode_cursor(getattr(last, sort[0].key), last.id)
+
+    return rows, next_cursor
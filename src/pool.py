@@ -0,0 +1,86 @@
+import os
+import time
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+from metrics import Counter, Gauge, Histogram
+
+# Connection pool settings come from the environment so they can be sized against
+# the number of gunicorn workers and the database's max_connections:
+#   workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW) <= max_connections
+
+pool_checkout_wait = Histogram('db_pool_checkout_wait_seconds', 'Time spent waiting for a pooled connection',
+                               buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30))
+pool_timeouts = Counter('db_pool_checkout_timeouts_total', 'Checkouts that gave up after DB_POOL_TIMEOUT')
+pool_connects = Counter('db_pool_connections_opened_total', 'New DBAPI connections opened by the pool')
+pool_invalidations = Counter('db_pool_connections_invalidated_total', 'Connections discarded as broken or stale')
+
+_engines = []
+
+
+class InstrumentedQueuePool(QueuePool):
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            pool_timeouts.inc()
+            raise
+        finally:
+            pool_checkout_wait.observe(time.perf_counter() - start)
+
+
+def _pool_stat(name):
+    def read():
+        # engine.pool is looked up on every scrape because dispose() swaps it for a new one
+        return {(('engine', str(index)),): getattr(engine.pool, name)() for index, engine in enumerate(_engines)
+                if isinstance(engine.pool, QueuePool)}
+    return read
+
+
+Gauge('db_pool_size', 'Configured pool size', callback=_pool_stat('size'))
+Gauge('db_pool_checked_out', 'Connections currently in use', callback=_pool_stat('checkedout'))
+Gauge('db_pool_checked_in', 'Idle connections in the pool', callback=_pool_stat('checkedin'))
+Gauge('db_pool_overflow', 'Connections open beyond pool_size (negative while the pool is not full)',
+      callback=_pool_stat('overflow'))
+
+
+def _env_bool(name, default):
+    return os.getenv(name, str(default)).lower() in ('1', 'true', 'yes')
+
+
+def engine_options(database_uri):
+    options = {
+        'pool_pre_ping': _env_bool('DB_POOL_PRE_PING', True),
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', 1800)),
+    }
+    # In-memory sqlite needs its single-connection pool; everything else gets a sized QueuePool
+    if database_uri.startswith('sqlite') and (':memory:' in database_uri or database_uri.rstrip('/') == 'sqlite:'):
+        return options
+
+    options.update({
+        'poolclass': InstrumentedQueuePool,
+        'pool_size': int(os.getenv('DB_POOL_SIZE', 5)),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', 10)),
+        'pool_timeout': int(os.getenv('DB_POOL_TIMEOUT', 30)),
+    })
+
+    statement_timeout = os.getenv('DB_STATEMENT_TIMEOUT_MS')
+    if statement_timeout and database_uri.startswith('postgresql'):
+        options['connect_args'] = {'options': '-c statement_timeout=%d' % int(statement_timeout)}
+    return options
+
+
+def _enable_sqlite_foreign_keys(dbapi_connection, record):
+    # sqlite ignores FOREIGN KEY clauses (and ON DELETE CASCADE) unless asked on every connection
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA foreign_keys=ON')
+    cursor.close()
+
+
+def instrument_pool(engine):
+    _engines.append(engine)
+    event.listen(engine, 'connect', lambda dbapi_connection, record: pool_connects.inc())
+    event.listen(engine, 'invalidate', lambda dbapi_connection, record, exception: pool_invalidations.inc())
+    if engine.dialect.name == 'sqlite':
+        event.listen(engine, 'connect', _enable_sqlite_foreign_keys)
@@ -0,0 +1,64 @@
+import os
+from flask import request
+from sqlalchemy import func, select, update
+from utils import APIException
+from models import db, Planet, Character, Vehicle, Character_Favorite_List, Planet_Favorite_List, Vehicle_Favorite_List
+from serialization import public_columns
+
+# Denormalized favorite counters. Each catalog row carries favorite_count, changed
+# with relative UPDATEs (count = count + 1) inside the same transaction as the
+# favorite row itself, so concurrent writers never lose an increment and
+# /<entity>/popular is an index scan instead of a GROUP BY over the favorite tables.
+# reconcile_favorite_counts() recomputes them from scratch to fix any drift
+# (rows written by hand, restored backups, ...): `flask reconcile-favorites`.
+
+POPULAR_DEFAULT_LIMIT = int(os.getenv('POPULAR_DEFAULT_LIMIT', 10))
+POPULAR_MAX_LIMIT = int(os.getenv('POPULAR_MAX_LIMIT', 100))
+
+# favorite model -> (catalog model, foreign key column name)
+FAVORITE_TARGETS = {
+    Character_Favorite_List: (Character, 'character_id'),
+    Planet_Favorite_List: (Planet, 'planet_id'),
+    Vehicle_Favorite_List: (Vehicle, 'vehicle_id'),
+}
+
+
+def popular_namespace(model):
+    # Response cache namespace of /<entity>/popular
+    return 'popular_%ss' % model.__tablename__
+
+
+def adjust_favorite_count(model, entity_id, delta):
+    if entity_id is None or not delta:
+        return
+    # updated_at is set to itself so the counter does not count as an edit (ETags, Last-Modified)
+    db.session.execute(update(model).where(model.id == entity_id)
+                       .values(favorite_count=model.favorite_count + delta, updated_at=model.updated_at))
+
+
+def popular(model):
+    limit = request.args.get('limit', POPULAR_DEFAULT_LIMIT, type=int)
+    if limit is None or limit < 1:
+        raise APIException('limit must be a positive integer', status_code=400)
+    keys = [column.name for column in public_columns(model)] + ['favorite_count']
+    rows = db.session.execute(
+        select(*[model.__table__.c[name] for name in keys])
+        .where(model.favorite_count > 0)
+        .order_by(model.favorite_count.desc(), model.id.desc())
+        .limit(min(limit, POPULAR_MAX_LIMIT))
+    ).all()
+    return [dict(zip(keys, row)) for row in rows]
+
+
+def reconcile_favorite_counts():
+    # Returns {table: rows fixed}; only rows whose counter is wrong are written
+    fixed = {}
+    for favorite_model, (model, column) in FAVORITE_TARGETS.items():
+        actual = (select(func.count()).select_from(favorite_model)
+                  .where(getattr(favorite_model, column) == model.id).scalar_subquery())
+        result = db.session.execute(update(model).where(model.favorite_count != actual)
+                                    .values(favorite_count=actual, updated_at=model.updated_at)
+                                    .execution_options(synchronize_session=False))
+        fixed[model.__tablename__] = result.rowcount
+    db.session.commit()
+    return fixed
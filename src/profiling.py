@@ -0,0 +1,124 @@
+import cProfile
+import os
+import random
+import re
+import threading
+import time
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from metrics import Histogram
+
+# Per-request instrumentation: latency per endpoint, SQL statements and time
+# (every engine, replicas included) and JSON serialization time, all exported on
+# /metrics. Optionally, a sample of requests is run under cProfile and the slow
+# ones are dumped as .pstats files (open them with `python -m pstats <file>`).
+#
+#   PROFILE_SAMPLE_RATE=0.01   profile 1% of requests
+#   PROFILE_TOKEN=<secret>     profile any request sent with `X-Profile: <secret>`
+#   PROFILE_SLOW_MS=500        only dump sampled requests slower than this
+#   PROFILE_DIR=/tmp/profiles  where the .pstats files go
+PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', 0))
+PROFILE_TOKEN = os.getenv('PROFILE_TOKEN')
+PROFILE_SLOW_MS = float(os.getenv('PROFILE_SLOW_MS', 500))
+PROFILE_DIR = os.getenv('PROFILE_DIR', '/tmp/profiles')
+PROFILE_HEADER = 'X-Profile'
+
+request_latency = Histogram('http_request_duration_seconds', 'Time to build the response, per endpoint')
+request_sql_queries = Histogram('http_request_sql_queries', 'SQL statements executed per request',
+                                buckets=(0, 1, 2, 3, 5, 10, 25, 50, 100, 250))
+request_sql_time = Histogram('http_request_sql_duration_seconds', 'Time spent in SQL per request')
+request_serialization_time = Histogram('http_request_serialization_seconds', 'Time spent encoding JSON per request',
+                                       buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1))
+
+# cProfile can only have one active profiler at a time, so concurrent sampled
+# requests in other threads simply go unprofiled.
+_profiler_lock = threading.Lock()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and '_request_started' in g:
+        g._sql_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = g.pop('_sql_started', None) if has_request_context() else None
+    if started is not None:
+        g._sql_time += time.perf_counter() - started
+        g._sql_queries += 1
+
+
+def record_serialization(seconds):
+    if has_request_context() and '_request_started' in g:
+        g._serialization_time += seconds
+
+
+def _wants_profile():
+    if PROFILE_TOKEN and request.headers.get(PROFILE_HEADER) == PROFILE_TOKEN:
+        return True
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+
+def _start_request():
+    g._request_started = time.perf_counter()
+    g._sql_time = 0.0
+    g._sql_queries = 0
+    g._serialization_time = 0.0
+    if _wants_profile() and _profiler_lock.acquire(blocking=False):
+        g._profiler = cProfile.Profile()
+        g._profiler.enable()
+
+
+def _stop_profiler():
+    profiler = g.pop('_profiler', None)
+    if profiler is not None:
+        profiler.disable()
+        _profiler_lock.release()
+    return profiler
+
+
+def _dump_profile(profiler, endpoint, elapsed_ms):
+    # Requests asked for through the header are always written; sampled ones only when slow
+    forced = PROFILE_TOKEN and request.headers.get(PROFILE_HEADER) == PROFILE_TOKEN
+    if not forced and elapsed_ms < PROFILE_SLOW_MS:
+        return
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    name = '%d-%s-%s-%dms.pstats' % (time.time() * 1000, request.method, re.sub(r'\W+', '_', endpoint), elapsed_ms)
+    profiler.dump_stats(os.path.join(PROFILE_DIR, name))
+
+
+def _finish_request(response):
+    if '_request_started' not in g:
+        return response
+    elapsed = time.perf_counter() - g._request_started
+    profiler = _stop_profiler()
+
+    # Streamed bodies are produced after this point, so only their setup is timed
+    endpoint = request.endpoint or 'unmatched'
+    labels = {'endpoint': endpoint, 'method': request.method}
+    request_latency.observe(elapsed, status=response.status_code, **labels)
+    request_sql_queries.observe(g._sql_queries, **labels)
+    request_sql_time.observe(g._sql_time, **labels)
+    request_serialization_time.observe(g._serialization_time, **labels)
+
+    response.headers['Server-Timing'] = 'db;dur=%.1f, serialize;dur=%.1f, total;dur=%.1f' % (
+        g._sql_time * 1000, g._serialization_time * 1000, elapsed * 1000)
+
+    if profiler is not None:
+        _dump_profile(profiler, endpoint, elapsed * 1000)
+    return response
+
+
+def _teardown_request(exception):
+    # after_request does not run for unhandled errors; make sure the profiler is released
+    _stop_profiler()
+
+
+def init_profiling(app):
+    # Listening on the Engine class covers the primary and every replica engine
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    app.teardown_request(_teardown_request)
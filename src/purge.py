@@ -0,0 +1,32 @@
+from sqlalchemy import delete, func, select, update
+from cache import invalidate
+from models import db, User
+from popularity import FAVORITE_TARGETS, popular_namespace
+
+# Set-based user deletes. The statement count does not depend on how many users go:
+# per favorite table one UPDATE takes their favorites off the catalog counters and one
+# DELETE removes them, then a single DELETE drops the users. The favorite DELETEs are
+# what ON DELETE CASCADE would do anyway; running them here keeps the counters and the
+# rows changing in the same transaction, and works on databases migrated by hand.
+
+
+def purge_users(user_ids):
+    """Deletes the users in user_ids (a list of ids or a select() of ids) with their
+    favorites. Returns how many users were deleted."""
+    for favorite_model, (model, column) in FAVORITE_TARGETS.items():
+        target = getattr(favorite_model, column)
+        removed = (select(func.count()).select_from(favorite_model)
+                   .where(target == model.id, favorite_model.user_id.in_(user_ids)).scalar_subquery())
+        db.session.execute(update(model)
+                           .where(model.id.in_(select(target).where(favorite_model.user_id.in_(user_ids))))
+                           .values(favorite_count=model.favorite_count - removed, updated_at=model.updated_at)
+                           .execution_options(synchronize_session=False))
+        db.session.execute(delete(favorite_model).where(favorite_model.user_id.in_(user_ids))
+                           .execution_options(synchronize_session=False))
+    deleted = db.session.execute(delete(User).where(User.id.in_(user_ids))
+                                 .execution_options(synchronize_session=False)).rowcount
+    db.session.commit()
+    if deleted:
+        for model, _ in FAVORITE_TARGETS.values():
+            invalidate(popular_namespace(model))
+    return deleted
@@ -0,0 +1,198 @@
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import g, request
+from utils import APIException
+from cache import redis_client
+from metrics import Counter
+
+# Sliding-window rate limits. Each key keeps a counter for the current and the
+# previous fixed window; the previous one is weighted by how much of it still
+# overlaps the sliding window, which approximates a true sliding log in O(1)
+# memory. Every attempt counts, rejected ones included, so a client that keeps
+# hammering stays throttled.
+#
+#   RATE_LIMIT_ENABLED=1              master switch
+#   RATE_LIMIT_BACKEND=memory         memory (per worker) or redis (shared by every worker)
+#   RATE_LIMIT_LOGIN_IP=20/60         password attempts per client IP per 60 s (/login, /token)
+#   RATE_LIMIT_LOGIN_EMAIL=5/60       password attempts per account per 60 s (/login, /token)
+#   RATE_LIMIT_SIGNUP_IP=10/3600      signups per client IP per hour
+#   RATE_LIMIT_DEFAULT=               per IP and route for every other endpoint, e.g. 600/60 (off when empty)
+#   RATE_LIMIT_TRUSTED_PROXIES=0      proxies in front of the app (1 on Heroku/Render) for X-Forwarded-For
+RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', '1').lower() in ('1', 'true', 'yes')
+TRUSTED_PROXIES = int(os.getenv('RATE_LIMIT_TRUSTED_PROXIES', 0))
+
+rate_limited = Counter('rate_limited_requests_total', 'Requests rejected with 429, by scope and key kind')
+
+
+def parse_limit(spec):
+    # '20/60' -> (20, 60): 20 requests per 60 seconds; empty -> None (no limit)
+    if not spec:
+        return None
+    amount, _, window = spec.partition('/')
+    return int(amount), int(window or 60)
+
+
+class MemoryRateLimitStore:
+    """Per-process counters; least recently used keys are evicted past maxsize."""
+
+    def __init__(self, maxsize=100000):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, key, window, now):
+        # Returns (current window count including this hit, previous window count)
+        index = int(now // window)
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < index - 1:
+                current, previous = 0, 0
+            elif entry[0] == index - 1:
+                current, previous = 0, entry[1]
+            else:
+                current, previous = entry[1], entry[2]
+            current += 1
+            self._data[key] = (index, current, previous)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return current, previous
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class RedisRateLimitStore:
+    """Counters shared by every worker, on a client from cache.redis_client()."""
+
+    def __init__(self, client, prefix='ratelimit:'):
+        self.client = client
+        self.prefix = prefix
+
+    def hit(self, key, window, now):
+        index = int(now // window)
+        current_key = '%s%s:%d' % (self.prefix, key, index)
+        pipe = self.client.pipeline()
+        pipe.incr(current_key)
+        pipe.expire(current_key, window * 2)
+        pipe.get('%s%s:%d' % (self.prefix, key, index - 1))
+        current, _, previous = pipe.execute()
+        return int(current), int(previous or 0)
+
+    def clear(self):
+        for key in self.client.scan_iter(self.prefix + '*'):
+            self.client.delete(key)
+
+
+def make_rate_limit_store():
+    if os.getenv('RATE_LIMIT_BACKEND', 'memory') == 'redis':
+        return RedisRateLimitStore(redis_client('RATE_LIMIT_REDIS_URL'))
+    return MemoryRateLimitStore(maxsize=int(os.getenv('RATE_LIMIT_MAXSIZE', 100000)))
+
+
+rate_limit_store = make_rate_limit_store()
+
+LOGIN_IP_LIMIT = parse_limit(os.getenv('RATE_LIMIT_LOGIN_IP', '20/60'))
+LOGIN_EMAIL_LIMIT = parse_limit(os.getenv('RATE_LIMIT_LOGIN_EMAIL', '5/60'))
+SIGNUP_IP_LIMIT = parse_limit(os.getenv('RATE_LIMIT_SIGNUP_IP', '10/3600'))
+DEFAULT_LIMIT = parse_limit(os.getenv('RATE_LIMIT_DEFAULT', ''))
+
+
+class RateLimitResult:
+    def __init__(self, allowed, limit, window, remaining, reset, retry_after):
+        self.allowed = allowed
+        self.limit = limit
+        self.window = window
+        self.remaining = remaining
+        self.reset = reset
+        self.retry_after = retry_after
+
+    def headers(self):
+        headers = {
+            'RateLimit-Limit': str(self.limit),
+            'RateLimit-Remaining': str(self.remaining),
+            'RateLimit-Reset': str(self.reset),
+            'RateLimit-Policy': '%d;w=%d' % (self.limit, self.window),
+        }
+        if not self.allowed:
+            headers['Retry-After'] = str(self.retry_after)
+        return headers
+
+
+def check(key, limit):
+    amount, window = limit
+    now = time.time()
+    current, previous = rate_limit_store.hit(key, window, now)
+    elapsed = now % window
+    estimate = previous * (window - elapsed) / window + current
+    allowed = estimate <= amount
+    reset = max(1, math.ceil(window - elapsed))
+
+    retry_after = reset
+    if not allowed and previous and current <= amount:
+        # Only the tail of the previous window is in the way; it slides out linearly
+        retry_after = max(1, min(reset, math.ceil((estimate - amount) * window / previous)))
+    return RateLimitResult(allowed, amount, window, max(0, math.floor(amount - estimate)), reset, retry_after)
+
+
+def client_ip():
+    if TRUSTED_PROXIES:
+        forwarded = [part.strip() for part in request.headers.get('X-Forwarded-For', '').split(',') if part.strip()]
+        if len(forwarded) >= TRUSTED_PROXIES:
+            return forwarded[-TRUSTED_PROXIES]
+    return request.remote_addr or 'unknown'
+
+
+def _request_email():
+    data = request.get_json(silent=True)
+    email = data.get('email') if isinstance(data, dict) else None
+    return email.strip().lower() if isinstance(email, str) and email.strip() else None
+
+
+def enforce(scope, kind, value, limit):
+    if not RATE_LIMIT_ENABLED or limit is None or value is None:
+        return
+    result = check('%s:%s:%s' % (scope, kind, value), limit)
+    # Headers describe the tightest limit the request went through
+    current = g.get('_rate_limit')
+    if current is None or result.remaining < current.remaining or not result.allowed:
+        g._rate_limit = result
+    if not result.allowed:
+        rate_limited.inc(scope=scope, kind=kind)
+        raise APIException('Too many requests, try again in %d seconds' % result.retry_after, status_code=429,
+                           payload={'retry_after': result.retry_after}, headers=result.headers())
+
+
+def rate_limit(scope, ip=None, email=None):
+    """Checks the limits before the view runs, so a rejected request never reaches the
+    database or bcrypt. scope groups routes that share counters (e.g. /login and /token)."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            enforce(scope, 'ip', client_ip(), ip)
+            enforce(scope, 'email', _request_email(), email)
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _default_limit():
+    if request.endpoint is not None:
+        enforce('route:' + request.endpoint, 'ip', client_ip(), DEFAULT_LIMIT)
+
+
+def _add_headers(response):
+    result = g.get('_rate_limit')
+    if result is not None:
+        response.headers.update(result.headers())
+    return response
+
+
+def init_rate_limits(app):
+    app.before_request(_default_limit)
+    app.after_request(_add_headers)
@@ -0,0 +1,98 @@
+import itertools
+import os
+import threading
+import time
+from flask import has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine, text
+from sqlalchemy.sql.expression import Select, TextClause
+from metrics import Gauge
+
+# Optional read replicas. With DATABASE_REPLICA_URLS set, SELECTs issued while
+# handling GET/HEAD requests go to a healthy replica; everything else, and every
+# read that follows a write in the same request, stays on the primary.
+HEALTH_CHECK_SECONDS = int(os.getenv('DATABASE_REPLICA_HEALTH_CHECK_SECONDS', 10))
+ROUTING = os.getenv('DATABASE_REPLICA_ROUTING', 'round_robin')  # or least_connections
+
+READ_METHODS = ('GET', 'HEAD')
+
+
+class Replica:
+    def __init__(self, url, engine):
+        self.url = url
+        self.engine = engine
+        self.healthy = True
+        self.checked_at = 0
+
+
+class ReplicaSet:
+    def __init__(self):
+        self.replicas = []
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    def configure(self, urls, engine_options):
+        self.replicas = [Replica(url, create_engine(url, **engine_options)) for url in urls]
+        return [replica.engine for replica in self.replicas]
+
+    def _check(self, replica):
+        # Lazy health check: each replica is pinged at most once per interval, and an
+        # unhealthy one is retried after the same interval so it can rejoin.
+        now = time.monotonic()
+        with self._lock:
+            if now - replica.checked_at < HEALTH_CHECK_SECONDS:
+                return replica.healthy
+            replica.checked_at = now
+        try:
+            with replica.engine.connect() as connection:
+                connection.execute(text('SELECT 1'))
+            replica.healthy = True
+        except Exception:
+            replica.healthy = False
+        return replica.healthy
+
+    def choose(self):
+        healthy = [replica for replica in self.replicas if self._check(replica)]
+        if not healthy:
+            return None
+        if ROUTING == 'least_connections':
+            return min(healthy, key=lambda replica: replica.engine.pool.checkedout())
+        return healthy[next(self._counter) % len(healthy)]
+
+    def health(self):
+        return {(('replica', str(index)),): int(replica.healthy) for index, replica in enumerate(self.replicas)}
+
+
+replica_set = ReplicaSet()
+
+Gauge('db_replica_healthy', 'Whether a read replica is in rotation (1) or not (0)', callback=replica_set.health)
+
+
+def _is_read(clause):
+    if isinstance(clause, Select):
+        return True
+    return isinstance(clause, TextClause) and clause.text.lstrip().lower().startswith('select')
+
+
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self._use_replica(clause):
+            # One replica per session (i.e. per request) so reads see a consistent snapshot
+            replica = self.info.get('replica')
+            if replica is None or not replica.healthy:
+                replica = replica_set.choose()
+                self.info['replica'] = replica
+            if replica is not None:
+                return replica.engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _use_replica(self, clause):
+        if not replica_set.replicas or self.info.get('primary') or not has_request_context():
+            return False
+        if request.method not in READ_METHODS:
+            return False
+        if self._flushing or not _is_read(clause):
+            # A write (or a raw connection) pins the rest of the request to the primary
+            self.info['primary'] = True
+            return False
+        return True
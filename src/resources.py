@@ -0,0 +1,293 @@
+from flask import jsonify, request
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.exc import StaleDataError
+from utils import APIException
+from models import db
+from pagination import paginate
+from streaming import wants_stream, stream_ndjson
+from cache import cached, invalidate, invalidate_many
+from bulk import bulk_create, bulk_update, bulk_delete, validate_row, writable_columns
+from expand import get_expand, expand_options, serialize_expanded
+from filters import get_filters, get_sort
+from search import index_entity, remove_entity
+from popularity import FAVORITE_TARGETS, adjust_favorite_count, popular, popular_namespace
+from serialization import get_fields, select_columns, output_keys, serialize_rows, project
+from conditional import item_etag, collection_etag, is_fresh, not_modified, tag_response
+from snapshot import catalog_snapshot
+
+# Generic CRUD routes for a model. Everything is derived once, at registration,
+# from the model's columns, so a fix to listing, validation or serialization
+# lands here and applies to every resource:
+#
+#   Resource(Planet_Favorite_List, 'planet_favorite_list', 'Planet favorite list', ...).register(app)
+#
+# registers GET/POST /planet-favorite-lists and GET/PUT/DELETE /planet-favorite-lists/<id>
+# with the endpoint names get_planet_favorite_lists, create_planet_favorite_list,
+# get_planet_favorite_list, update_planet_favorite_list and delete_planet_favorite_list.
+
+
+def is_foreign_key_violation(error):
+    # Una FK rota no es un duplicado: postgres la marca con su SQLSTATE, sqlite y mysql solo con el mensaje
+    pgcode = getattr(error.orig, 'pgcode', None)  # psycopg2
+    if pgcode is not None:
+        return pgcode == '23503'
+    # sqlite: "FOREIGN KEY constraint failed"; mysql: "... a foreign key constraint fails"
+    return 'foreign key constraint' in str(error.orig).lower()
+
+
+class Resource:
+    cache_reads = False
+
+    def __init__(self, model, name, label, plural=None, path=None, id_arg=None, item_key=None, list_key=None,
+                 conflict_message=None):
+        self.model = model
+        self.name = name  # endpoint suffix: get_<name>, create_<name>, ...
+        self.plural = plural or name + 's'
+        self.label = label  # used in messages: '<label> not found'
+        self.path = path or '/' + self.plural.replace('_', '-')
+        self.id_arg = id_arg or name + '_id'
+        self.item_key = item_key or name
+        self.list_key = list_key or self.plural
+        self.conflict_message = conflict_message or '%s already exists' % label
+        self.columns = {column.name: column for column in writable_columns(model)}
+
+    def routes(self):
+        item = '%s/<int:%s>' % (self.path, self.id_arg)
+        list_view, detail_view = self.list_view, self.detail_view
+        if self.cache_reads:
+            # GET responses are cached under the collection's namespace; changed() invalidates them
+            list_view = cached(self.plural)(list_view)
+            detail_view = cached(self.plural, id_arg=self.id_arg)(detail_view)
+        return [
+            (self.path, 'get_' + self.plural, list_view, ['GET']),
+            (self.path, 'create_' + self.name, self.create_view, ['POST']),
+            (item, 'get_' + self.name, detail_view, ['GET']),
+            (item, 'update_' + self.name, self.update_view, ['PUT']),
+            (item, 'delete_' + self.name, self.delete_view, ['DELETE']),
+        ]
+
+    def register(self, app):
+        for rule, endpoint, view, methods in self.routes():
+            app.add_url_rule(rule, endpoint, view, methods=methods)
+        return self
+
+    # Hooks for subclasses: written() and deleting() run inside the transaction,
+    # changed() after the commit. written() gets the previous values of the columns
+    # an update touched (None on create).
+
+    def written(self, obj, previous=None):
+        pass
+
+    def deleting(self, obj):
+        pass
+
+    def changed(self, item_id=None):
+        pass
+
+    def not_found(self):
+        return jsonify(message='%s not found' % self.label), 404
+
+    def parse_body(self):
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            raise APIException('Body must be a JSON object', status_code=400)
+        # Keys that are not writable columns are ignored; the rest are checked against the column types
+        clean, error = validate_row(self.model, {name: value for name, value in data.items() if name in self.columns})
+        if error:
+            raise APIException(error, status_code=400)
+        return clean
+
+    def missing_reference(self, references):
+        # Label of the first row a foreign key points at that does not exist ('Planet', 'User')
+        for column, value in references.items():
+            if value is None:
+                continue
+            target = next(iter(column.foreign_keys)).column
+            if db.session.execute(select(target).where(target == value)).first() is None:
+                return target.table.name.capitalize()
+        return None
+
+    def save(self, obj, previous=None):
+        # Read before flushing: a failed flush leaves obj expired
+        references = {column: getattr(obj, name) for name, column in self.columns.items() if column.foreign_keys}
+        try:
+            db.session.flush()
+            self.written(obj, previous)
+            db.session.commit()
+        except IntegrityError as error:
+            db.session.rollback()
+            if is_foreign_key_violation(error):
+                raise APIException('%s not found' % (self.missing_reference(references) or 'Referenced row'),
+                                   status_code=404)
+            return False
+        except StaleDataError:
+            # Catalog rows are versioned (version_id_col): another write got in between
+            db.session.rollback()
+            raise APIException('%s was modified by another request, retry' % self.label, status_code=409)
+        return True
+
+    def list_view(self):
+        expand = get_expand(self.model)
+        query = self.model.query.options(*expand_options(self.model, expand))
+        items, next_cursor = paginate(query, self.model.id)
+        return jsonify(**{self.list_key: [serialize_expanded(item, expand) for item in items], 'next': next_cursor})
+
+    def detail_view(self, **kwargs):
+        expand = get_expand(self.model)
+        obj = self.model.query.options(*expand_options(self.model, expand)).get(kwargs[self.id_arg])
+        if not obj:
+            return self.not_found()
+        return jsonify(serialize_expanded(obj, expand))
+
+    def create_view(self):
+        obj = self.model(**self.parse_body())
+        db.session.add(obj)
+        if not self.save(obj):
+            return jsonify(message=self.conflict_message), 409
+        self.changed()
+        return jsonify(**{'message': '%s created successfully' % self.label, self.item_key: obj.serialize()}), 201
+
+    def update_view(self, **kwargs):
+        item_id = kwargs[self.id_arg]
+        obj = self.model.query.get(item_id)
+        if not obj:
+            return self.not_found()
+
+        body = self.parse_body()
+        previous = {name: getattr(obj, name) for name in body}
+        for name, value in body.items():
+            setattr(obj, name, value)
+        if not self.save(obj, previous):
+            return jsonify(message=self.conflict_message), 409
+        self.changed(item_id)
+        return jsonify(**{'message': '%s updated successfully' % self.label, self.item_key: obj.serialize()})
+
+    def delete_view(self, **kwargs):
+        item_id = kwargs[self.id_arg]
+        obj = self.model.query.get(item_id)
+        if not obj:
+            return self.not_found()
+        self.deleting(obj)
+        db.session.delete(obj)
+        db.session.commit()
+        self.changed(item_id)
+        return jsonify(message='%s deleted successfully' % self.label)
+
+
+class CatalogResource(Resource):
+    """Catalog models: cached, filterable column-row listings, ETags, search indexing and bulk routes."""
+
+    # With the in-memory snapshot on, the response cache would only hold a second copy
+    cache_reads = not catalog_snapshot.enabled
+
+    def __init__(self, model, name, label, **kwargs):
+        super().__init__(model, name, label, **kwargs)
+        catalog_snapshot.track(model, self.list_key)
+
+    @property
+    def popular_namespace(self):
+        return popular_namespace(self.model)
+
+    def routes(self):
+        bulk = self.path + '/bulk'
+        return super().routes() + [
+            (bulk, 'bulk_create_' + self.plural, self.bulk_create_view, ['POST']),
+            (bulk, 'bulk_update_' + self.plural, self.bulk_update_view, ['PUT']),
+            (bulk, 'bulk_delete_' + self.plural, self.bulk_delete_view, ['DELETE']),
+            (self.path + '/popular', 'get_popular_' + self.plural, cached(self.popular_namespace)(self.popular_view),
+             ['GET']),
+        ]
+
+    def written(self, obj, previous=None):
+        index_entity(obj)
+
+    def deleting(self, obj):
+        remove_entity(obj)
+
+    def changed(self, item_id=None):
+        invalidate(self.plural, item_id)
+        invalidate(self.popular_namespace)
+        catalog_snapshot.refresh(self.model)
+
+    def bulk_changed(self, ids):
+        invalidate_many(self.plural, ids)
+        invalidate(self.popular_namespace)
+        catalog_snapshot.refresh(self.model)
+
+    def list_view(self):
+        model = self.model
+        if catalog_snapshot.serves(model) and not wants_stream():
+            return catalog_snapshot.list_response(model)
+        criteria = get_filters(model)
+        sort = get_sort(model)
+        fields = get_fields(model)
+        if wants_stream():
+            return stream_ndjson(model, criteria, fields)
+
+        etag = collection_etag(model)
+        if is_fresh(etag):
+            return not_modified(etag)
+
+        # Plain rows of just the requested columns; no ORM objects are built for list pages
+        query = select(*select_columns(model, fields, sort)).where(*criteria)
+        rows, next_cursor = paginate(query, model.id, sort)
+        return tag_response(jsonify(**{self.list_key: serialize_rows(rows, output_keys(model, fields)),
+                                       'next': next_cursor}), etag)
+
+    def detail_view(self, **kwargs):
+        if catalog_snapshot.enabled:
+            response = catalog_snapshot.detail_response(self.model, kwargs[self.id_arg])
+            return self.not_found() if response is None else response
+        fields = get_fields(self.model)
+        obj = self.model.query.get(kwargs[self.id_arg])
+        if not obj:
+            return self.not_found()
+        etag = item_etag(obj)
+        if is_fresh(etag):
+            return not_modified(etag, obj.updated_at)
+        return tag_response(jsonify(project(obj.serialize(), fields)), etag, obj.updated_at)
+
+    def popular_view(self):
+        # Most favorited first, straight off the (favorite_count, id) index
+        return jsonify(**{self.list_key: popular(self.model)})
+
+    def bulk_create_view(self):
+        results, ids = bulk_create(self.model, upsert=request.args.get('upsert') in ('1', 'true'))
+        self.bulk_changed(ids)
+        return jsonify(results=results)
+
+    def bulk_update_view(self):
+        results, ids = bulk_update(self.model)
+        self.bulk_changed(ids)
+        return jsonify(results=results)
+
+    def bulk_delete_view(self):
+        results, ids = bulk_delete(self.model)
+        self.bulk_changed(ids)
+        return jsonify(results=results)
+
+
+class FavoriteResource(Resource):
+    """Favorite lists: every write moves the favorite_count of the catalog row it points at."""
+
+    def __init__(self, model, name, label, **kwargs):
+        super().__init__(model, name, label, **kwargs)
+        self.target, self.target_column = FAVORITE_TARGETS[model]
+        self.target_namespace = popular_namespace(self.target)
+
+    def written(self, obj, previous=None):
+        current = getattr(obj, self.target_column)
+        if previous is None:
+            adjust_favorite_count(self.target, current, 1)
+            return
+        old = previous.get(self.target_column, current)
+        if old != current:
+            adjust_favorite_count(self.target, old, -1)
+            adjust_favorite_count(self.target, current, 1)
+
+    def deleting(self, obj):
+        adjust_favorite_count(self.target, getattr(obj, self.target_column), -1)
+
+    def changed(self, item_id=None):
+        invalidate(self.target_namespace)
@@ -0,0 +1,101 @@
+import re
+from sqlalchemy import bindparam, text
+from utils import APIException
+from models import db, Planet, Character, Vehicle
+
+# Full-text / prefix search over catalog names and descriptions, backed by the
+# catalog_search table created in migrations/versions (not part of the models):
+#   - sqlite: an FTS5 virtual table ranked with bm25, rowid = entity id * 4 + kind code
+#   - postgresql: a table with a generated tsvector column under a GIN index
+# The catalog write handlers keep it in sync inside their own transaction.
+
+SEARCH_MODELS = {'character': Character, 'planet': Planet, 'vehicle': Vehicle}
+KIND_CODES = {'character': 1, 'planet': 2, 'vehicle': 3}
+MAX_RESULTS = 50
+
+
+def _dialect():
+    return db.engine.dialect.name
+
+
+def _kind(model):
+    return model.__tablename__
+
+
+def index_entities(model, ids):
+    if not ids:
+        return
+    # The index is rebuilt from the entity rows, so pending ORM changes must reach them first
+    db.session.flush()
+    kind = _kind(model)
+    params = {'kind': kind, 'code': KIND_CODES[kind], 'ids': list(ids)}
+    dialect = _dialect()
+    if dialect == 'sqlite':
+        db.session.execute(text('DELETE FROM catalog_search WHERE rowid IN (SELECT id * 4 + :code FROM "%s" WHERE id IN :ids)' % kind)
+                           .bindparams(bindparam('ids', expanding=True)), params)
+        db.session.execute(text('INSERT INTO catalog_search (rowid, kind, name, description) '
+                                'SELECT id * 4 + :code, :kind, name, description FROM "%s" WHERE id IN :ids' % kind)
+                           .bindparams(bindparam('ids', expanding=True)), params)
+    elif dialect == 'postgresql':
+        db.session.execute(text('INSERT INTO catalog_search (kind, entity_id, name, description) '
+                                'SELECT :kind, id, name, description FROM "%s" WHERE id IN :ids '
+                                'ON CONFLICT (kind, entity_id) DO UPDATE '
+                                'SET name = excluded.name, description = excluded.description' % kind)
+                           .bindparams(bindparam('ids', expanding=True)), params)
+
+
+def remove_entities(model, ids):
+    if not ids:
+        return
+    kind = _kind(model)
+    dialect = _dialect()
+    if dialect == 'sqlite':
+        rowids = [row_id * 4 + KIND_CODES[kind] for row_id in ids]
+        db.session.execute(text('DELETE FROM catalog_search WHERE rowid IN :rowids')
+                           .bindparams(bindparam('rowids', expanding=True)), {'rowids': rowids})
+    elif dialect == 'postgresql':
+        db.session.execute(text('DELETE FROM catalog_search WHERE kind = :kind AND entity_id IN :ids')
+                           .bindparams(bindparam('ids', expanding=True)), {'kind': kind, 'ids': list(ids)})
+
+
+def index_entity(obj):
+    # Call after a flush so new rows already have their id
+    index_entities(type(obj), [obj.id])
+
+
+def remove_entity(obj):
+    remove_entities(type(obj), [obj.id])
+
+
+def search(q, types, limit=20):
+    terms = re.findall(r'\w+', q.lower())
+    if not terms:
+        raise APIException('q must contain at least one word', status_code=400)
+    unknown = [kind for kind in types if kind not in SEARCH_MODELS]
+    if unknown:
+        raise APIException('Unknown types: ' + ', '.join(unknown), status_code=400,
+                           payload={'types': sorted(SEARCH_MODELS)})
+    types = types or sorted(SEARCH_MODELS)
+    limit = max(1, min(limit, MAX_RESULTS))
+
+    dialect = _dialect()
+    if dialect == 'sqlite':
+        # Every word must match; the last one as a prefix so partial input autocompletes.
+        # FTS5 keeps 2 and 3 character prefix indexes, so short prefixes stay cheap.
+        match = ' '.join('"%s"' % term for term in terms[:-1]) + ' "%s"*' % terms[-1]
+        stmt = text('SELECT kind, rowid / 4 AS id, name, description, -bm25(catalog_search, 0, 10.0, 1.0) AS score '
+                    'FROM catalog_search WHERE catalog_search MATCH :match AND kind IN :types '
+                    'ORDER BY bm25(catalog_search, 0, 10.0, 1.0) LIMIT :limit')
+    elif dialect == 'postgresql':
+        match = ' & '.join(term + ':*' for term in terms)
+        stmt = text("SELECT kind, entity_id AS id, name, description, "
+                    "ts_rank(document, to_tsquery('simple', :match)) AS score "
+                    "FROM catalog_search WHERE document @@ to_tsquery('simple', :match) AND kind IN :types "
+                    "ORDER BY score DESC LIMIT :limit")
+    else:
+        raise APIException('Search is not supported on %s' % dialect, status_code=501)
+
+    rows = db.session.execute(stmt.bindparams(bindparam('types', expanding=True)),
+                              {'match': match, 'types': types, 'limit': limit})
+    return [{'type': row.kind, 'id': row.id, 'name': row.name, 'description': row.description,
+             'score': round(row.score, 4)} for row in rows]
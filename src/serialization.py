@@ -0,0 +1,99 @@
+import json
+import time
+from flask import request
+from flask.json.provider import DefaultJSONProvider
+from utils import APIException
+from profiling import record_serialization
+
+try:
+    import orjson  # optional: much faster encoding for large list responses
+except ImportError:
+    orjson = None
+
+# Columns never exposed by the API (serialize() leaves them out too; only the
+# /<entity>/popular routes return favorite_count)
+HIDDEN_COLUMNS = ('password', 'version', 'updated_at', 'favorite_count')
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider that encodes with orjson when it is installed.
+
+    Output keeps the default provider's conventions (sorted keys, compact
+    separators, Flask's date format); non-ASCII text is written as UTF-8
+    instead of \\u escapes.
+    """
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        return self._encode(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            if orjson is None or self._app.debug:
+                return super().response(*args, **kwargs)
+            obj = self._prepare_response_obj(args, kwargs)
+            return self._app.response_class(self._encode(obj) + b'\n', mimetype=self.mimetype)
+        finally:
+            record_serialization(time.perf_counter() - start)
+
+    def dumpb(self, obj):
+        # Compact UTF-8 bytes, the same body response() sends (minus the trailing newline)
+        if orjson is None:
+            return json.dumps(obj, default=self.default, ensure_ascii=self.ensure_ascii, sort_keys=self.sort_keys,
+                              separators=(',', ':')).encode('utf-8')
+        return self._encode(obj)
+
+    def _encode(self, obj):
+        options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=self.default, option=options)
+
+
+def public_columns(model):
+    return [column for column in model.__table__.columns if column.name not in HIDDEN_COLUMNS]
+
+
+def get_fields(model):
+    # ?fields=id,name -> only those columns are selected and returned (id is always kept)
+    raw = request.args.get('fields')
+    if not raw:
+        return None
+    fields = [name.strip() for name in raw.split(',') if name.strip()]
+    allowed = [column.name for column in public_columns(model)]
+    unknown = [name for name in fields if name not in allowed]
+    if unknown:
+        raise APIException('Unknown fields: ' + ', '.join(unknown), status_code=400, payload={'fields': allowed})
+    return ['id'] + [name for name in fields if name != 'id']
+
+
+def output_keys(model, fields=None):
+    return fields or [column.name for column in public_columns(model)]
+
+
+def select_columns(model, fields=None, sort=None):
+    # Output columns first; a sort column the client did not ask for goes last so
+    # keyset pagination can still read it from the row.
+    names = output_keys(model, fields)
+    if sort is not None and sort[0].key not in names:
+        names = names + [sort[0].key]
+    return [model.__table__.c[name] for name in names]
+
+
+def serialize_rows(rows, keys):
+    # Rows come straight from session.execute(select(...)); zip() stops at the
+    # output keys, dropping any trailing sort column.
+    return [dict(zip(keys, row)) for row in rows]
+
+
+def project(data, fields=None):
+    if not fields:
+        return data
+    return {name: data[name] for name in fields}
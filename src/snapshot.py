@@ -0,0 +1,268 @@
+import bisect
+import os
+import threading
+import time
+from array import array
+from datetime import datetime, timedelta
+from itertools import islice
+from flask import current_app
+from sqlalchemy import select
+from models import db
+from metrics import Counter
+from filters import OPERATORS, parse_filters, get_sort
+from pagination import DEFAULT_PAGE_SIZE, encode_cursor, get_page_args
+from serialization import get_fields, output_keys, project
+from conditional import collection_etag, is_fresh, not_modified, table_fingerprint, tag_response, version_etag
+
+# Opt-in in-memory catalog (CATALOG_SNAPSHOT=1). Each worker loads the tables behind
+# the CatalogResources (Planet, Character, Vehicle) once and serves their GET routes
+# from an immutable snapshot: every row with its JSON already encoded, plus the
+# encoded default pages (?after=<page boundary>, default limit) ready to send.
+#
+# A write in this worker builds a new snapshot and swaps the reference, so readers
+# see either the old table or the new one, never a mix. Other workers compare
+# their snapshot with the table fingerprint (the same count/max(id)/max(updated_at)
+# behind the collection ETags) at most every CATALOG_SNAPSHOT_CHECK_SECONDS and
+# rebuild when it moved; that check is the only query left on the read path.
+#
+# ?stream=1 and sorts on text columns (collation is the database's business) still
+# go to the database.
+SNAPSHOT_ENABLED = os.getenv('CATALOG_SNAPSHOT', '0').lower() in ('1', 'true', 'yes')
+CHECK_SECONDS = float(os.getenv('CATALOG_SNAPSHOT_CHECK_SECONDS', 1))
+
+snapshot_swaps = Counter('catalog_snapshot_swaps_total', 'Catalog snapshots built and swapped in, by table')
+
+EPOCH = datetime(1970, 1, 1)
+
+
+class TableSnapshot:
+    """One catalog table, laid out to stay shared between forked workers.
+
+    Every encoded row and default page lives in one bytes buffer, addressed through
+    offset arrays; ids, versions and modification times are arrays of machine
+    numbers. Serving a default page or a detail therefore touches a handful of
+    objects instead of one per row, so reads in a worker do not write refcounts
+    (and copy pages) all over the snapshot the master loaded before forking
+    (see gunicorn.conf.py). The row values are only read for filters, sorts and
+    ?fields.
+    """
+
+    __slots__ = ('tablename', 'keys', 'rows', 'ids', 'versions', 'modified', 'fingerprint', 'buffer', 'row_offsets',
+                 'page_offsets', 'orders')
+
+    def __init__(self, tablename, keys, rows, versions, updated, list_key):
+        self.tablename = tablename
+        self.keys = keys
+        self.rows = rows  # value tuples in `keys` order, ordered by id
+        self.ids = array('q', [row[0] for row in rows])
+        self.versions = array('q', versions)
+        self.modified = array('d', [(value - EPOCH).total_seconds() for value in updated])
+        self.fingerprint = (len(rows), rows[-1][0] if rows else None, max(updated) if updated else None)
+        self.orders = {}  # (column, descending) -> row positions in that order, built on first use
+
+        dumpb = current_app.json.dumpb
+        buffer = bytearray()
+        self.row_offsets = array('Q', [0])
+        for row in rows:
+            buffer += dumpb(dict(zip(keys, row)))
+            self.row_offsets.append(len(buffer))
+        # Page k holds rows k*DEFAULT_PAGE_SIZE... and answers ?after=<id of the row before it>
+        self.page_offsets = array('Q', [len(buffer)])
+        for start in range(0, max(len(rows), 1), DEFAULT_PAGE_SIZE):
+            stop = min(start + DEFAULT_PAGE_SIZE, len(rows))
+            next_cursor = self.ids[stop - 1] if stop < len(rows) else None
+            buffer += envelope(list_key, [self.row_body(position, buffer) for position in range(start, stop)],
+                               next_cursor)
+            self.page_offsets.append(len(buffer))
+        self.buffer = bytes(buffer)
+
+    def row_body(self, position, buffer=None):
+        buffer = self.buffer if buffer is None else buffer
+        return buffer[self.row_offsets[position]:self.row_offsets[position + 1]]
+
+    def position(self, item_id):
+        position = bisect.bisect_left(self.ids, item_id)
+        return position if position < len(self.ids) and self.ids[position] == item_id else None
+
+    def page_body(self, after):
+        # The encoded default page starting right after `after`, when that is a page boundary
+        start = 0 if after is None else bisect.bisect_right(self.ids, after)
+        if start % DEFAULT_PAGE_SIZE:
+            return None
+        page = start // DEFAULT_PAGE_SIZE
+        if page + 1 >= len(self.page_offsets):
+            return None
+        return self.buffer[self.page_offsets[page]:self.page_offsets[page + 1]]
+
+    def etag(self, position):
+        return version_etag(self.tablename, self.ids[position], self.versions[position])
+
+    def last_modified(self, position):
+        return EPOCH + timedelta(seconds=self.modified[position])
+
+    def ordered(self, name, descending):
+        # Same order as ORDER BY <name> [DESC] NULLS LAST, id: the stable sort keeps id order among ties
+        order = self.orders.get((name, descending))
+        if order is None:
+            index = self.keys.index(name)
+            present = [position for position, row in enumerate(self.rows) if row[index] is not None]
+            present.sort(key=lambda position: self.rows[position][index], reverse=descending)
+            order = self.orders[(name, descending)] = array('q', present + [
+                position for position, row in enumerate(self.rows) if row[index] is None])
+        return order
+
+    def matching(self, criteria, sort, after):
+        # Row positions, in response order
+        if sort is None:
+            start = 0 if after is None else bisect.bisect_right(self.ids, after)
+            positions = range(start, len(self.rows))
+        else:
+            name, descending = sort
+            positions = self.ordered(name, descending)
+            if after is not None:
+                index = self.keys.index(name)
+                positions = [position for position in positions
+                             if _past_cursor(self.rows[position][index], self.ids[position], descending, *after)]
+        tests = [(self.keys.index(name), OPERATORS[operator], value) for name, operator, value in criteria]
+        # Like SQL, a NULL column never matches
+        return (position for position in positions
+                if all(self.rows[position][index] is not None and test(self.rows[position][index], value)
+                       for index, test, value in tests))
+
+
+def _past_cursor(value, row_id, descending, after_value, after_id):
+    # pagination._after_condition, evaluated in Python
+    if after_value is None:
+        return value is None and row_id > after_id
+    if value is None:
+        return True
+    return (value < after_value if descending else value > after_value) or (value == after_value and row_id > after_id)
+
+
+def envelope(list_key, bodies, next_cursor):
+    # {"<list_key>": [...], "next": ...} from rows that are already encoded
+    dumpb = current_app.json.dumpb
+    parts = {list_key: b'[' + b','.join(bodies) + b']', 'next': dumpb(next_cursor)}
+    keys = sorted(parts) if current_app.json.sort_keys else parts
+    return b'{' + b','.join(dumpb(key) + b':' + parts[key] for key in keys) + b'}\n'
+
+
+def build_snapshot(model, list_key):
+    keys = output_keys(model)
+    table = model.__table__
+    rows = db.session.execute(select(*[table.c[name] for name in keys], table.c.version, table.c.updated_at)
+                              .order_by(table.c.id)).all()
+    return TableSnapshot(model.__tablename__, keys, tuple(tuple(row[:len(keys)]) for row in rows),
+                         [row.version for row in rows], [row.updated_at for row in rows], list_key)
+
+
+def _json_response(body):
+    return current_app.response_class(body, mimetype=current_app.json.mimetype)
+
+
+class CatalogSnapshot:
+    def __init__(self, enabled=SNAPSHOT_ENABLED, check_seconds=CHECK_SECONDS):
+        self.list_keys = {}  # model -> key of the list in collection responses
+        self.enabled = enabled
+        self.check_seconds = check_seconds
+        self._tables = {}
+        self._checked_at = {}
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return bool(self.list_keys) and all(model in self._tables for model in self.list_keys)
+
+    def track(self, model, list_key):
+        self.list_keys[model] = list_key
+
+    def _swap(self, model):
+        table = build_snapshot(model, self.list_keys[model])
+        self._tables[model] = table  # a single reference assignment: readers never see a half-built table
+        self._checked_at[model] = time.monotonic()
+        snapshot_swaps.inc(table=model.__tablename__)
+        return table
+
+    def load(self):
+        # gunicorn master (preload) or worker boot; without either, each table loads on its first read
+        if self.enabled:
+            with self._lock:
+                for model in self.list_keys:
+                    self._swap(model)
+
+    def refresh(self, model):
+        # After a committed write in this worker
+        if self.enabled and model in self.list_keys:
+            with self._lock:
+                self._swap(model)
+
+    def get(self, model):
+        table = self._tables.get(model)
+        if table is None:
+            with self._lock:
+                return self._tables.get(model) or self._swap(model)
+        if time.monotonic() - self._checked_at[model] >= self.check_seconds and self._lock.acquire(blocking=False):
+            # One thread checks while the others keep serving the current snapshot
+            try:
+                self._checked_at[model] = time.monotonic()
+                if table_fingerprint(model) != table.fingerprint:
+                    table = self._swap(model)
+            finally:
+                self._lock.release()
+        return table
+
+    def serves(self, model):
+        if not self.enabled or model not in self.list_keys:
+            return False
+        sort = get_sort(model)
+        return sort is None or sort[0].type.python_type is not str
+
+    def list_response(self, model):
+        table = self.get(model)
+        criteria = parse_filters(model)
+        sort_column, descending = get_sort(model) or (None, False)
+        sort = (sort_column.key, descending) if sort_column is not None else None
+        fields = get_fields(model)
+
+        etag = collection_etag(model, table.fingerprint)
+        if is_fresh(etag):
+            return not_modified(etag)
+
+        after, limit = get_page_args(sort_column)
+        if not criteria and sort is None and fields is None and limit == DEFAULT_PAGE_SIZE:
+            body = table.page_body(after)
+            if body is not None:
+                return tag_response(_json_response(body), etag)
+
+        page = list(islice(table.matching(criteria, sort, after), limit + 1))
+        next_cursor = None
+        if len(page) > limit:
+            page = page[:limit]
+            last = page[-1]
+            next_cursor = (table.ids[last] if sort is None
+                           else encode_cursor(table.rows[last][table.keys.index(sort[0])], table.ids[last]))
+        if fields is None:
+            bodies = [table.row_body(position) for position in page]
+        else:
+            dumpb = current_app.json.dumpb
+            bodies = [dumpb(project(dict(zip(table.keys, table.rows[position])), fields)) for position in page]
+        return tag_response(_json_response(envelope(self.list_keys[model], bodies, next_cursor)), etag)
+
+    def detail_response(self, model, item_id):
+        # None when there is no such row
+        table = self.get(model)
+        fields = get_fields(model)
+        position = table.position(item_id)
+        if position is None:
+            return None
+        etag, last_modified = table.etag(position), table.last_modified(position)
+        if is_fresh(etag):
+            return not_modified(etag, last_modified)
+        if fields is None:
+            body = table.row_body(position) + b'\n'
+        else:
+            body = current_app.json.dumpb(project(dict(zip(table.keys, table.rows[position])), fields)) + b'\n'
+        return tag_response(_json_response(body), etag, last_modified)
+
+
+catalog_snapshot = CatalogSnapshot()
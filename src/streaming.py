@@ -0,0 +1,32 @@
+import os
+from flask import Response, current_app, request, stream_with_context
+from sqlalchemy import select
+from models import db
+from serialization import output_keys, select_columns, serialize_rows
+
+# Rows fetched per round trip through the server-side cursor while streaming
+STREAM_BATCH_SIZE = int(os.getenv('STREAM_BATCH_SIZE', 1000))
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+
+def wants_stream():
+    if request.args.get('stream') in ('1', 'true'):
+        return True
+    return request.accept_mimetypes.best_match(['application/json', NDJSON_MIMETYPE]) == NDJSON_MIMETYPE
+
+
+def stream_ndjson(model, criteria=(), fields=None):
+    # Rows are read as plain tuples (no ORM objects) through a server-side cursor:
+    # yield_per turns on stream_results, so only STREAM_BATCH_SIZE rows live in
+    # the worker at any time.
+    keys = output_keys(model, fields)
+    stmt = (select(*select_columns(model, fields)).where(*criteria).order_by(model.id)
+            .execution_options(yield_per=STREAM_BATCH_SIZE))
+
+    def generate():
+        dumps = current_app.json.dumps
+        for rows in db.session.execute(stmt).partitions():
+            yield ''.join(dumps(row) + '\n' for row in serialize_rows(rows, keys))
+
+    return Response(stream_with_context(generate()), mimetype=NDJSON_MIMETYPE)
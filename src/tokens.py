@@ -0,0 +1,160 @@
+import hashlib
+import math
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from flask_jwt_extended import JWTManager, create_access_token, create_refresh_token, decode_token
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError
+from models import db, RevokedToken
+
+# Access tokens are validated from the signature alone; the only per-request check is
+# the in-memory denylist below, so no route needs the database to authenticate.
+ACCESS_TOKEN_MINUTES = int(os.getenv('JWT_ACCESS_TOKEN_MINUTES', 15))
+REFRESH_TOKEN_DAYS = int(os.getenv('JWT_REFRESH_TOKEN_DAYS', 30))
+# How often each worker pulls new revocations from the revoked_token table
+DENYLIST_SYNC_SECONDS = int(os.getenv('JWT_DENYLIST_SYNC_SECONDS', 5))
+# Each sync re-reads the revocations created this many seconds before the previous one:
+# a revocation is stamped before its transaction commits, so it can become visible after
+# later ones. Must exceed the longest revoking transaction plus the clock skew between hosts.
+DENYLIST_SYNC_MARGIN_SECONDS = int(os.getenv('JWT_DENYLIST_SYNC_MARGIN_SECONDS', 60))
+# How often expired revocations are dropped and the filter is rebuilt
+DENYLIST_PRUNE_SECONDS = int(os.getenv('JWT_DENYLIST_PRUNE_SECONDS', 3600))
+DENYLIST_CAPACITY = int(os.getenv('JWT_DENYLIST_CAPACITY', 100000))
+
+jwt = JWTManager()
+
+
+def _digest(jti):
+    return int.from_bytes(hashlib.blake2b(jti.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate=0.001):
+        # Standard sizing: m = -n ln p / (ln 2)^2 bits and k = m/n ln 2 hash functions
+        self.size = max(64, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, digest):
+        # Double hashing over the two 32-bit halves of the 64-bit digest
+        h1, h2 = digest >> 32, digest & 0xffffffff
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, digest):
+        for position in self._positions(digest):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, digest):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(digest))
+
+
+class Denylist:
+    """jti denylist mirrored in memory from the revoked_token table.
+
+    The bloom filter answers the common "not revoked" case in O(1); its rare positives
+    are confirmed against the set of 64-bit jti digests, also held in memory.
+    """
+
+    def __init__(self, capacity=DENYLIST_CAPACITY):
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._reset()
+        self._synced_at = 0
+        self._pruned_at = 0
+
+    def _reset(self):
+        self._bloom = BloomFilter(self.capacity)
+        self._digests = set()
+        self._window_start = None  # None: the next sync reads the whole table
+
+    def _add(self, jti):
+        digest = _digest(jti)
+        if digest in self._digests:
+            return  # already seen, e.g. re-read in the overlapping window
+        self._bloom.add(digest)
+        self._digests.add(digest)
+
+    def revoke(self, payload):
+        # Returns False when the token had already been revoked (possibly by another worker)
+        db.session.add(RevokedToken(jti=payload['jti'], token_type=payload['type'],
+                                    expires_at=datetime.utcfromtimestamp(payload['exp'])))
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            return False
+        finally:
+            with self._lock:
+                self._add(payload['jti'])
+        return True
+
+    def sync(self, force=False):
+        now = time.monotonic()
+        if not force and now - self._synced_at < DENYLIST_SYNC_SECONDS:
+            return
+        with self._lock:
+            # Own connection to the primary, never the request's session: sync runs inside
+            # the blocklist loader, and must neither commit the request's work nor read a replica.
+            if now - self._pruned_at >= DENYLIST_PRUNE_SECONDS:
+                # Expired tokens are rejected by their signature anyway, so their
+                # revocations can go; a bloom filter cannot delete, so rebuild it.
+                with db.engine.begin() as connection:
+                    connection.execute(delete(RevokedToken).where(RevokedToken.expires_at < datetime.utcnow()))
+                self._reset()
+                self._pruned_at = now
+            started = datetime.utcnow()
+            query = select(RevokedToken.jti)
+            if self._window_start is not None:
+                query = query.where(RevokedToken.created_at >= self._window_start)
+            with db.engine.connect() as connection:
+                for jti in connection.execute(query).scalars():
+                    self._add(jti)
+            self._window_start = started - timedelta(seconds=DENYLIST_SYNC_MARGIN_SECONDS)
+            self._synced_at = now
+
+    def is_revoked(self, jti):
+        self.sync()
+        digest = _digest(jti)
+        return digest in self._bloom and digest in self._digests
+
+
+denylist = Denylist()
+
+
+@jwt.token_in_blocklist_loader
+def check_if_token_revoked(jwt_header, jwt_payload):
+    return denylist.is_revoked(jwt_payload['jti'])
+
+
+def configure_tokens(app):
+    # Key material and lifetimes are read once at startup
+    secret = os.getenv('JWT_SECRET_KEY') or os.getenv('FLASK_APP_KEY')
+    if not secret:
+        # Sin clave no se arranca: un valor por defecto firmaría tokens que cualquiera puede falsificar
+        raise RuntimeError('Set JWT_SECRET_KEY (or FLASK_APP_KEY) to sign the access and refresh tokens')
+    app.config['JWT_SECRET_KEY'] = secret
+    app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(minutes=ACCESS_TOKEN_MINUTES)
+    app.config['JWT_REFRESH_TOKEN_EXPIRES'] = timedelta(days=REFRESH_TOKEN_DAYS)
+    jwt.init_app(app)
+
+
+def issue_tokens(user_id):
+    identity = str(user_id)
+    return {
+        'access_token': create_access_token(identity=identity),
+        'refresh_token': create_refresh_token(identity=identity),
+    }
+
+
+def rotate_refresh_token(payload):
+    # Every refresh token is single use: it is revoked the moment it buys a new pair,
+    # so a stolen refresh token stops working as soon as either party uses it.
+    if not denylist.revoke(payload):
+        return None
+    return issue_tokens(payload['sub'])
+
+
+def revoke_encoded_token(encoded_token):
+    denylist.revoke(decode_token(encoded_token))
@@ -1,14 +1,16 @@
+import threading
 from flask import jsonify, url_for
 
 class APIException(Exception):
     status_code = 400
 
-    def __init__(self, message, status_code=None, payload=None):
+    def __init__(self, message, status_code=None, payload=None, headers=None):
         Exception.__init__(self)
         self.message = message
         if status_code is not None:
             self.status_code = status_code
         self.payload = payload
+        self.headers = headers or {}
 
     def to_dict(self):
         rv = dict(self.payload or ())
@@ -20,8 +22,8 @@ def has_no_empty_params(rule):
     arguments = rule.arguments if rule.arguments is not None else ()
     return len(defaults) >= len(arguments)
 
-def generate_sitemap(app):
-    links = ['/admin/']
+def generate_sitemap(app, extra_links=('/admin/',)):
+    links = list(extra_links)
     for rule in app.url_map.iter_rules():
         # Filter out rules we can't navigate to in a browser
         # and rules that require parameters
@@ -40,24 +42,32 @@ def generate_sitemap(app):
         <p>Remember to specify a real endpoint path like: </p>
         <ul style="text-align: left;">"""+links_html+"</ul></div>"
 
-import jwt
-from datetime import datetime, timedelta
+class LazyMount:
+    """WSGI middleware: requests under `prefix` go to the WSGI app returned by `build`,
+    which only runs when the first of them comes in; the rest go to `wsgi_app`."""
 
-def generate_token(user_id):
-    # Define la clave secreta para firmar el token
-    secret_key = 'tu_clave_secreta_aqui'
+    def __init__(self, wsgi_app, prefix, build):
+        self.wsgi_app = wsgi_app
+        self.prefix = prefix
+        self.build = build
+        self._mounted = None
+        self._lock = threading.Lock()
 
-    # Define la fecha de expiración del token (por ejemplo, 1 hora desde ahora)
-    expiration_time = datetime.utcnow() + timedelta(hours=1)
+    def __call__(self, environ, start_response):
+        path = environ.get('PATH_INFO', '')
+        if path == self.prefix or path.startswith(self.prefix + '/'):
+            return self.mounted()(environ, start_response)
+        return self.wsgi_app(environ, start_response)
 
-    # Crea el payload del token con el ID de usuario y la fecha de expiración
-    payload = {
-        'user_id': user_id,
-        'exp': expiration_time
-    }
+    def mounted(self):
+        if self._mounted is None:
+            with self._lock:
+                if self._mounted is None:
+                    self._mounted = self.build()
+        return self._mounted
 
-    # Genera el token utilizando la clave secreta y el algoritmo de firma
-    token = jwt.encode(payload, secret_key, algorithm='HS256')
+from flask_jwt_extended import create_access_token
 
-    # Devuelve el token generado
-    return token.decode('utf-8')
+def generate_token(user_id):
+    # Tokens are signed by the app's JWTManager with JWT_SECRET_KEY (see tokens.py)
+    return create_access_token(identity=str(user_id))
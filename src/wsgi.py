@@ -1,7 +1,10 @@
 # This file was created to run the application on heroku using gunicorn.
 # Read more about it here: https://devcenter.heroku.com/articles/python-gunicorn
 
-from app import app as application
+from app import create_app
+
+# The app of this process (gunicorn, asgi.py and the benchmarks import it from here)
+application = create_app()
 
 if __name__ == "__main__":
     application.run()
@@ -0,0 +1,33 @@
+import os
+import sys
+
+import pytest
+
+# The app reads most of its configuration at import time
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+os.environ.setdefault('JWT_SECRET_KEY', 'test-only-signing-key')
+os.environ.setdefault('CACHE_BACKEND', 'none')
+os.environ.setdefault('RATE_LIMIT_ENABLED', '0')
+os.environ.setdefault('CATALOG_SNAPSHOT', '0')
+os.environ.setdefault('ADMIN_ENABLED', '0')
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.setenv('DATABASE_URL', 'sqlite:///%s' % (tmp_path / 'test.db'))
+    from flask_migrate import upgrade
+    from app import create_app
+    from models import db
+    app = create_app(migrations=True)
+    with app.app_context():
+        # The real migrations, not create_all(): catalog_search and the indexes only exist there
+        upgrade(directory=os.path.join(ROOT, 'migrations'))
+        yield app
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
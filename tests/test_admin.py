@@ -0,0 +1,66 @@
+import pytest
+
+from models import db, Planet
+
+
+@pytest.fixture
+def admin(app):
+    from admin import create_admin_app
+    from app import RESOURCES
+    admin_app = create_admin_app(app, RESOURCES)
+    return admin_app.test_client()
+
+
+def popular(client):
+    return [(planet['id'], planet['favorite_count']) for planet in client.get('/planets/popular').get_json()['planets']]
+
+
+def test_admin_planet_edits_reach_the_search_index(client, admin):
+    assert admin.post('/admin/planet/new/', data={'name': 'Tatooine', 'version': 1}).status_code == 302
+    assert [hit['name'] for hit in client.get('/search?q=tatooine').get_json()['results']] == ['Tatooine']
+
+    assert admin.post('/admin/planet/edit/?id=1', data={'name': 'Hoth', 'version': 1}).status_code == 302
+    assert client.get('/search?q=tatooine').get_json()['results'] == []
+    assert client.get('/search?q=hoth').get_json()['results'][0]['id'] == 1
+
+    assert admin.post('/admin/planet/delete/', data={'id': 1}).status_code == 302
+    assert client.get('/search?q=hoth').get_json()['results'] == []
+
+
+def test_admin_favorite_edits_keep_favorite_count(client, admin):
+    client.post('/signup', json={'email': 'fan@x.com', 'password': 'secret'})
+    client.post('/planets', json={'name': 'Tatooine'})
+    client.post('/planets', json={'name': 'Hoth'})
+
+    assert admin.post('/admin/planet_favorite_list/new/', data={'planet': 1, 'user': 1}).status_code == 302
+    assert popular(client) == [(1, 1)]
+    assert admin.post('/admin/planet_favorite_list/edit/?id=1', data={'planet': 2, 'user': 1}).status_code == 302
+    assert popular(client) == [(2, 1)]
+    assert admin.post('/admin/planet_favorite_list/delete/', data={'id': 1}).status_code == 302
+    assert popular(client) == []
+
+
+def test_admin_user_delete_takes_their_favorites_off_the_counters(client, admin):
+    client.post('/signup', json={'email': 'fan@x.com', 'password': 'secret'})
+    client.post('/planets', json={'name': 'Tatooine'})
+    client.post('/planet-favorite-lists', json={'user_id': 1, 'planet_id': 1})
+
+    assert admin.post('/admin/user/delete/', data={'id': 1}).status_code == 302
+    assert popular(client) == []
+    assert client.get('/planet-favorite-lists').get_json()['favorite_lists'] == []
+
+
+def test_admin_edits_refresh_the_snapshot(client, admin, monkeypatch):
+    from snapshot import catalog_snapshot
+    monkeypatch.setattr(catalog_snapshot, 'enabled', True)
+    monkeypatch.setattr(catalog_snapshot, '_tables', {})
+    monkeypatch.setattr(catalog_snapshot, '_checked_at', {})
+    monkeypatch.setattr(catalog_snapshot, 'check_seconds', 3600)  # only a refresh can show the edit
+    client.post('/planets', json={'name': 'Tatooine'})
+    assert client.get('/planets/1').get_json()['name'] == 'Tatooine'
+
+    admin.post('/admin/planet/edit/?id=1', data={'name': 'Hoth', 'version': 1})
+    response = client.get('/planets/1')
+    assert response.get_json()['name'] == 'Hoth'
+    assert response.headers['ETag'] == '"planet-1-v2"'
+    assert client.get('/planets').get_json()['planets'][0]['name'] == 'Hoth'
@@ -0,0 +1,71 @@
+import json
+
+from models import db, Planet
+
+
+def planets(client):
+    return {planet['id']: planet for planet in client.get('/planets').get_json()['planets']}
+
+
+def test_bulk_create_reports_each_row(client):
+    response = client.post('/planets/bulk', json=[
+        {'name': 'Tatooine'}, {'name': 7}, 'not an object', {'name': 'Hoth', 'moons': 3}, {'name': 'Dagobah'},
+    ])
+    assert response.status_code == 200
+    assert response.get_json()['results'] == [
+        {'index': 0, 'id': 1, 'status': 'created'},
+        {'index': 1, 'error': 'name must be a string'},
+        {'index': 2, 'error': 'Row must be a JSON object'},
+        {'index': 3, 'error': 'Unknown fields: moons'},
+        {'index': 4, 'id': 2, 'status': 'created'},
+    ]
+    assert [planet['name'] for planet in planets(client).values()] == ['Tatooine', 'Dagobah']
+
+
+def test_bulk_create_reports_only_the_conflicting_rows(client):
+    client.post('/planets/bulk', json=[{'id': 2, 'name': 'Hoth'}])
+    results = client.post('/planets/bulk', json=[{'id': 1, 'name': 'Tatooine'}, {'id': 2, 'name': 'Again'},
+                                                 {'id': 3, 'name': 'Dagobah'}]).get_json()['results']
+    assert [result.get('status') for result in results] == ['created', None, 'created']
+    assert results[1]['error'].startswith('Conflict')
+    assert planets(client)[2]['name'] == 'Hoth'
+    # Explicit ids must not make the next POST collide
+    assert client.post('/planets', json={'name': 'Endor'}).get_json()['planet']['id'] == 4
+
+
+def test_bulk_create_upserts_and_bumps_the_version(client):
+    client.post('/planets/bulk', json=[{'id': 1, 'name': 'Tatooine'}])
+    results = client.post('/planets/bulk?upsert=1', json=[{'id': 1, 'name': 'Hoth'}, {'id': 2, 'name': 'Endor'}])
+    assert results.get_json()['results'] == [{'index': 0, 'id': 1, 'status': 'upserted'},
+                                             {'index': 1, 'id': 2, 'status': 'upserted'}]
+    assert planets(client)[1]['name'] == 'Hoth'
+    assert client.get('/planets/1').headers['ETag'] == '"planet-1-v2"'
+
+
+def test_bulk_create_reads_ndjson(client):
+    body = '\n'.join([json.dumps({'name': 'Tatooine'}), '{broken', '', json.dumps({'name': 'Hoth'})]) + '\n'
+    results = client.post('/planets/bulk', data=body, content_type='application/x-ndjson').get_json()['results']
+    assert results == [{'index': 0, 'id': 1, 'status': 'created'},
+                       {'index': 1, 'error': 'Row must be a JSON object'},
+                       {'index': 2, 'id': 2, 'status': 'created'}]
+
+
+def test_bulk_update_and_delete(client):
+    client.post('/planets/bulk', json=[{'name': 'Tatooine'}, {'name': 'Hoth'}])
+    results = client.put('/planets/bulk', json=[{'id': 1, 'population': 200000}, {'id': 9, 'name': 'x'},
+                                                {'name': 'no id'}]).get_json()['results']
+    assert results == [{'index': 0, 'id': 1, 'status': 'updated'},
+                       {'index': 1, 'id': 9, 'error': 'Not found'},
+                       {'index': 2, 'error': 'id must be an integer'}]
+    assert planets(client)[1]['population'] == 200000
+    assert db.session.get(Planet, 1).version == 2
+
+    results = client.delete('/planets/bulk', json={'ids': [2, 9]}).get_json()['results']
+    assert results == [{'id': 2, 'status': 'deleted'}, {'id': 9, 'error': 'Not found'}]
+    assert list(planets(client)) == [1]
+
+
+def test_bulk_bodies_of_the_wrong_shape_are_400(client):
+    assert client.post('/planets/bulk', json={'name': 'Tatooine'}).status_code == 400
+    assert client.delete('/planets/bulk', json={'ids': ['1']}).status_code == 400
+    assert client.delete('/planets/bulk', json=[1]).status_code == 400
@@ -0,0 +1,63 @@
+import fakeredis
+import pytest
+
+import cache
+from cache import LRUCache, NullCache, RedisCache, make_cache_backend
+from models import db
+
+
+@pytest.fixture
+def redis_cache(monkeypatch):
+    store = RedisCache(fakeredis.FakeRedis(), ttl=60)
+    monkeypatch.setattr(cache, 'response_cache', store)
+    return store
+
+
+def rename_behind_the_api(planet_id, name):
+    # A change the API never hears about: only a cache miss can show it
+    with db.engine.begin() as connection:
+        connection.execute(db.text('UPDATE planet SET name = :name WHERE id = :id'), {'name': name, 'id': planet_id})
+
+
+def names(client, url='/planets'):
+    return [planet['name'] for planet in client.get(url).get_json()['planets']]
+
+
+def test_writes_drop_the_collection_generation(client, redis_cache):
+    client.post('/planets', json={'name': 'Tatooine'})
+    assert names(client) == ['Tatooine']
+
+    rename_behind_the_api(1, 'Stale')
+    assert names(client) == ['Tatooine']  # served from redis
+
+    client.post('/planets', json={'name': 'Hoth'})
+    assert names(client) == ['Stale', 'Hoth']
+
+
+def test_item_writes_drop_only_that_item_generation(client, redis_cache):
+    client.post('/planets', json={'name': 'Tatooine'})
+    client.post('/planets', json={'name': 'Hoth'})
+    assert client.get('/planets/1').get_json()['name'] == 'Tatooine'
+    assert client.get('/planets/2').get_json()['name'] == 'Hoth'
+
+    rename_behind_the_api(2, 'Stale')
+    client.put('/planets/1', json={'name': 'Dagobah'})
+    assert client.get('/planets/1').get_json()['name'] == 'Dagobah'
+    assert client.get('/planets/2').get_json()['name'] == 'Hoth'
+
+
+def test_lost_generation_token_is_a_miss_not_a_stale_read(client, redis_cache):
+    client.post('/planets', json={'name': 'Tatooine'})
+    assert names(client) == ['Tatooine']
+
+    rename_behind_the_api(1, 'Fresh')
+    redis_cache.client.delete('cache:gen:planets')  # evicted, or expired before its entries
+    assert names(client) == ['Fresh']
+
+
+def test_memory_cache_is_off_with_several_workers(monkeypatch):
+    monkeypatch.setenv('CACHE_BACKEND', 'memory')
+    monkeypatch.setenv('WEB_CONCURRENCY', '1')
+    assert isinstance(make_cache_backend(), LRUCache)
+    monkeypatch.setenv('WEB_CONCURRENCY', '4')
+    assert isinstance(make_cache_backend(), NullCache)
@@ -0,0 +1,52 @@
+import pytest
+
+from models import db, Planet
+
+
+@pytest.fixture
+def planet(client):
+    client.post('/planets', json={'name': 'Tatooine'})
+
+
+def test_detail_etag_follows_the_version(client, planet):
+    response = client.get('/planets/1')
+    assert response.headers['ETag'] == '"planet-1-v1"'
+    assert response.headers['Last-Modified']
+
+    response = client.get('/planets/1', headers={'If-None-Match': '"planet-1-v1"'})
+    assert response.status_code == 304
+    assert response.get_data() == b''
+    assert response.headers['ETag'] == '"planet-1-v1"'
+
+    client.put('/planets/1', json={'name': 'Hoth'})
+    response = client.get('/planets/1', headers={'If-None-Match': '"planet-1-v1"'})
+    assert response.status_code == 200
+    assert response.headers['ETag'] == '"planet-1-v2"'
+
+
+def test_orm_writes_outside_the_api_bump_the_version(client, planet):
+    # Flask-Admin or a script: version_id_col bumps it on any ORM update
+    db.session.get(Planet, 1).name = 'Hoth'
+    db.session.commit()
+    assert client.get('/planets/1').headers['ETag'] == '"planet-1-v2"'
+
+
+def test_collection_etag_changes_on_create_update_and_delete(client, planet):
+    etags = [client.get('/planets').headers['ETag']]
+    assert client.get('/planets', headers={'If-None-Match': etags[0]}).status_code == 304
+
+    client.post('/planets', json={'name': 'Hoth'})
+    etags.append(client.get('/planets').headers['ETag'])
+    client.put('/planets/2', json={'name': 'Dagobah'})
+    etags.append(client.get('/planets').headers['ETag'])
+    client.delete('/planets/1')
+    etags.append(client.get('/planets').headers['ETag'])
+    assert len(set(etags)) == 4
+    assert client.get('/planets', headers={'If-None-Match': etags[0]}).status_code == 200
+
+
+def test_collection_etag_depends_on_the_query(client, planet):
+    plain = client.get('/planets').headers['ETag']
+    sorted_ = client.get('/planets?sort=name').headers['ETag']
+    assert plain != sorted_
+    assert client.get('/planets?sort=name', headers={'If-None-Match': plain}).status_code == 200
@@ -0,0 +1,59 @@
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+from models import db, User, Character, Character_Favorite_List, Planet, Planet_Favorite_List
+
+# ?expand= eager loads every relationship it names: the queries per request must not
+# grow with the number of rows in the page.
+
+
+@contextmanager
+def count_queries():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def add_favorites(start, count):
+    for index in range(start, start + count):
+        user = User(email='user%d@test.local' % index, password='x', is_active=True)
+        character = Character(name='Character %d' % index)
+        planet = Planet(name='Planet %d' % index)
+        db.session.add_all([user, character, planet])
+        db.session.flush()
+        db.session.add_all([Character_Favorite_List(user_id=user.id, character_id=character.id),
+                            Planet_Favorite_List(user_id=user.id, planet_id=planet.id)])
+    db.session.commit()
+    db.session.expunge_all()
+
+
+def queries_for(client, url):
+    with count_queries() as statements:
+        response = client.get(url)
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return len(statements), response.get_json()
+
+
+@pytest.mark.parametrize('url, list_key, expanded', [
+    ('/character-favorite-lists?expand=character,user', 'favorite_lists', ('character', 'user')),
+    ('/users?expand=planet_favorites', 'users', ('planet_favorites',)),
+])
+def test_expand_query_count_does_not_grow_with_rows(client, url, list_key, expanded):
+    add_favorites(0, 1)
+    one, body = queries_for(client, url)
+    assert len(body[list_key]) == 1
+
+    add_favorites(1, 24)
+    many, body = queries_for(client, url)
+    assert len(body[list_key]) == 25
+    assert all(row[name] for row in body[list_key] for name in expanded)
+    assert many == one
@@ -0,0 +1,53 @@
+import pytest
+
+from models import db, Planet
+
+
+@pytest.fixture(autouse=True)
+def planets(app):
+    db.session.add_all([
+        Planet(name='Tatooine', terrain='desert', population=200000, diameter=10465),
+        Planet(name='Hoth', terrain='tundra', population=None, diameter=7200),
+        Planet(name='Jakku', terrain='desert', population=84, diameter=6400),
+    ])
+    db.session.commit()
+
+
+def names(client, query):
+    response = client.get('/planets?' + query)
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return [planet['name'] for planet in response.get_json()['planets']]
+
+
+@pytest.mark.parametrize('query, expected', [
+    ('terrain=desert', ['Tatooine', 'Jakku']),
+    ('terrain_ne=desert', ['Hoth']),
+    ('population_gt=100', ['Tatooine']),
+    ('diameter_gte=7200&diameter_lt=10465', ['Hoth']),
+    ('terrain=desert&sort=-population', ['Tatooine', 'Jakku']),
+    ('sort=name', ['Hoth', 'Jakku', 'Tatooine']),
+    ('sort=-diameter&fields=name', ['Tatooine', 'Hoth', 'Jakku']),
+])
+def test_filters_and_sorts(client, query, expected):
+    assert names(client, query) == expected
+
+
+def test_unknown_filter_is_400_listing_the_allowed_ones(client):
+    response = client.get('/planets?climate=arid')
+    assert response.status_code == 400
+    body = response.get_json()
+    assert body['message'] == 'Unsupported filter: climate'
+    assert body['filters']['population'] == ['eq', 'ne', 'gt', 'gte', 'lt', 'lte']
+    assert body['filters']['terrain'] == ['eq', 'ne']
+
+
+@pytest.mark.parametrize('query, message', [
+    ('terrain_gt=desert', 'Unsupported filter: terrain_gt'),
+    ('population_gt=many', 'population_gt must be an integer'),
+    ('sort=terrain', 'Unsupported sort: terrain'),
+    ('sort=-description', 'Unsupported sort: -description'),
+])
+def test_bad_filter_or_sort_is_400(client, query, message):
+    response = client.get('/planets?' + query)
+    assert response.status_code == 400
+    assert response.get_json()['message'] == message
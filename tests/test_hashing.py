@@ -0,0 +1,42 @@
+import threading
+
+import pytest
+
+import hashing
+
+
+@pytest.fixture
+def slots(monkeypatch):
+    slots = threading.BoundedSemaphore(1)
+    monkeypatch.setattr(hashing, '_slots', slots)
+    return slots
+
+
+def assert_shed(response):
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == str(hashing.HASH_RETRY_AFTER)
+    assert response.get_json() == {'message': 'Server is busy, try again later'}
+
+
+def test_signup_and_login_shed_load_when_the_hash_queue_is_full(client, slots):
+    credentials = {'email': 'a@x.com', 'password': 'secret'}
+    assert client.post('/signup', json=credentials).status_code == 201
+
+    slots.acquire()  # the only slot is taken: the next hash has nowhere to wait
+    assert_shed(client.post('/signup', json={'email': 'b@x.com', 'password': 'secret'}))
+    assert_shed(client.post('/login', json=credentials))
+
+    slots.release()
+    assert client.post('/login', json=credentials).status_code == 200
+    assert client.post('/signup', json={'email': 'b@x.com', 'password': 'secret'}).status_code == 201
+
+
+def test_shed_signup_is_not_stored_for_idempotent_replay(client, slots):
+    headers = {'Idempotency-Key': 'retry-me'}
+    body = {'email': 'a@x.com', 'password': 'secret'}
+    slots.acquire()
+    assert_shed(client.post('/signup', json=body, headers=headers))
+    slots.release()
+    response = client.post('/signup', json=body, headers=headers)
+    assert response.status_code == 201
+    assert 'Idempotent-Replayed' not in response.headers
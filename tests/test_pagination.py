@@ -0,0 +1,63 @@
+import base64
+import json
+
+import pytest
+
+from models import db, Planet
+
+
+@pytest.fixture
+def planets(app):
+    # Repeated and missing populations: the cursor has to break ties by id and walk past NULLs
+    populations = [300, None, 100, 300, None, 200, 100]
+    db.session.add_all([Planet(name='Planet %d' % index, population=population)
+                        for index, population in enumerate(populations)])
+    db.session.commit()
+    return populations
+
+
+def walk(client, url):
+    pages, cursor = [], None
+    while True:
+        response = client.get(url + ('&after=%s' % cursor if cursor is not None else ''))
+        assert response.status_code == 200, response.get_data(as_text=True)
+        body = response.get_json()
+        pages.append([planet['id'] for planet in body['planets']])
+        cursor = body['next']
+        if cursor is None:
+            return pages
+
+
+def test_id_pages_cover_every_row_once(client, planets):
+    pages = walk(client, '/planets?limit=3')
+    assert pages == [[1, 2, 3], [4, 5, 6], [7]]
+
+
+@pytest.mark.parametrize('sort, expected', [
+    ('population', [3, 7, 6, 1, 4, 2, 5]),
+    ('-population', [1, 4, 6, 3, 7, 2, 5]),
+])
+def test_sorted_pages_follow_the_sort_then_id_with_nulls_last(client, planets, sort, expected):
+    pages = walk(client, '/planets?sort=%s&limit=2' % sort)
+    assert [len(page) for page in pages] == [2, 2, 2, 1]
+    assert sum(pages, []) == expected
+
+
+def test_last_full_page_has_no_next(client, planets):
+    assert client.get('/planets?limit=7').get_json()['next'] is None
+
+
+def cursor(value):
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).decode()
+
+
+@pytest.mark.parametrize('query', [
+    'after=abc', 'limit=0', 'limit=x',
+    'sort=population&after=%%%',
+    'sort=population&after=' + cursor({'id': 1}),
+    'sort=population&after=' + cursor([100, '1']),
+    'sort=population&after=' + cursor(['many', 1]),
+    'sort=population&after=' + cursor([True, 1]),
+])
+def test_malformed_page_args_are_400(client, planets, query):
+    assert client.get('/planets?' + query).status_code == 400
@@ -0,0 +1,53 @@
+import pytest
+
+from models import db, Planet, Planet_Favorite_List
+from popularity import reconcile_favorite_counts
+
+
+@pytest.fixture
+def fans(client):
+    for index in range(3):
+        client.post('/signup', json={'email': 'fan%d@x.com' % index, 'password': 'secret'})
+    for name in ('Tatooine', 'Hoth', 'Jakku'):
+        client.post('/planets', json={'name': name})
+
+
+def favorite(client, user_id, planet_id):
+    assert client.post('/planet-favorite-lists', json={'user_id': user_id, 'planet_id': planet_id}).status_code == 201
+
+
+def popular(client, query=''):
+    return [(planet['name'], planet['favorite_count']) for planet in client.get('/planets/popular' + query).get_json()['planets']]
+
+
+def test_popular_orders_by_count_then_newest(client, fans):
+    for user_id, planet_id in [(1, 2), (2, 2), (3, 2), (1, 1), (2, 3)]:
+        favorite(client, user_id, planet_id)
+    assert popular(client) == [('Hoth', 3), ('Jakku', 1), ('Tatooine', 1)]
+    assert popular(client, '?limit=1') == [('Hoth', 3)]
+    assert client.get('/planets/popular?limit=0').status_code == 400
+
+
+def test_counters_do_not_count_as_edits(client, fans):
+    etag = client.get('/planets/2').headers['ETag']
+    favorite(client, 1, 2)
+    assert client.get('/planets/2').headers['ETag'] == etag
+
+
+def test_deleting_a_user_takes_their_favorites_off_the_counters(client, fans):
+    favorite(client, 1, 2)
+    favorite(client, 2, 2)
+    favorite(client, 1, 1)
+    assert client.delete('/users/1').status_code == 200
+    assert popular(client) == [('Hoth', 1)]
+
+
+def test_reconcile_fixes_counters_written_around_the_api(client, fans):
+    favorite(client, 1, 2)
+    db.session.add(Planet_Favorite_List(user_id=2, planet_id=3))  # no counter upkeep
+    db.session.get(Planet, 1).favorite_count = 5
+    db.session.commit()
+
+    assert reconcile_favorite_counts() == {'character': 0, 'planet': 2, 'vehicle': 0}
+    assert popular(client) == [('Jakku', 1), ('Hoth', 1)]
+    assert reconcile_favorite_counts()['planet'] == 0
@@ -0,0 +1,67 @@
+from types import SimpleNamespace
+
+import fakeredis
+import pytest
+
+import ratelimit
+from ratelimit import MemoryRateLimitStore, RedisRateLimitStore, check
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = SimpleNamespace(now=6000.0)  # the start of a 60 s window
+    monkeypatch.setattr(ratelimit, 'time', SimpleNamespace(time=lambda: clock.now))
+    return clock
+
+
+@pytest.fixture(params=['memory', 'redis'])
+def store(request, monkeypatch):
+    store = MemoryRateLimitStore() if request.param == 'memory' else RedisRateLimitStore(fakeredis.FakeRedis())
+    monkeypatch.setattr(ratelimit, 'rate_limit_store', store)
+    return store
+
+
+def hits(count, limit=(5, 60)):
+    return [check('login:email:a@x.com', limit) for _ in range(count)]
+
+
+def test_previous_window_is_weighted_by_its_overlap(clock, store):
+    results = hits(6)
+    assert [result.allowed for result in results] == [True] * 5 + [False]
+    assert results[-1].retry_after == results[-1].reset == 60
+
+    # Halfway through the next window the 6 earlier attempts weigh 3
+    clock.now = 6090.0
+    first, second, third = hits(3)
+    assert (first.allowed, first.remaining) == (True, 1)
+    assert (second.allowed, second.remaining) == (True, 0)
+    assert not third.allowed
+    # Only the tail of the previous window is in the way: it slides out in 10 s, before the reset
+    assert (third.retry_after, third.reset) == (10, 30)
+
+    # A window later the previous one is almost whole again
+    clock.now = 6121.0
+    assert hits(1)[0].allowed
+    # Two windows of silence forget everything
+    clock.now = 6300.0
+    assert hits(1)[0].remaining == 4
+
+
+def test_login_is_429_before_bcrypt_once_the_account_limit_is_hit(client, clock, store, monkeypatch):
+    monkeypatch.setattr(ratelimit, 'RATE_LIMIT_ENABLED', True)
+    client.post('/signup', json={'email': 'a@x.com', 'password': 'secret'})
+    amount, window = ratelimit.LOGIN_EMAIL_LIMIT
+    for _ in range(amount):
+        assert client.post('/login', json={'email': 'a@x.com', 'password': 'wrong'}).status_code == 401
+
+    checked = []
+    monkeypatch.setattr('app.check_password_hash', lambda *args: checked.append(args))
+    # Same account however the email is typed
+    response = client.post('/login', json={'email': ' A@x.com', 'password': 'secret'})
+    assert response.status_code == 429
+    assert response.get_json() == {'message': 'Too many requests, try again in %d seconds' % window,
+                                   'retry_after': window}
+    assert response.headers['Retry-After'] == str(window)
+    assert response.headers['RateLimit-Policy'] == '%d;w=%d' % (amount, window)
+    assert response.headers['RateLimit-Remaining'] == '0'
+    assert checked == []
@@ -0,0 +1,127 @@
+import pytest
+
+
+@pytest.fixture
+def user_and_planet(client):
+    assert client.post('/signup', json={'email': 'fan@x.com', 'password': 'secret'}).status_code == 201
+    assert client.post('/planets', json={'name': 'Tatooine'}).status_code == 201
+
+
+def test_favorite_of_a_missing_row_is_404_not_a_conflict(client, user_and_planet):
+    assert client.post('/planet-favorite-lists', json={'user_id': 1, 'planet_id': 1}).status_code == 201
+
+    response = client.post('/planet-favorite-lists', json={'user_id': 1, 'planet_id': 99})
+    assert response.status_code == 404
+    assert response.get_json() == {'message': 'Planet not found'}
+
+    response = client.post('/planet-favorite-lists', json={'user_id': 99, 'planet_id': 1})
+    assert response.status_code == 404
+    assert response.get_json() == {'message': 'User not found'}
+
+    response = client.put('/planet-favorite-lists/1', json={'planet_id': 42})
+    assert response.status_code == 404
+    assert response.get_json() == {'message': 'Planet not found'}
+    assert client.get('/planet-favorite-lists/1').get_json()['Planet_id'] == 1
+
+
+PLANET = {'id': 1, 'name': 'Tatooine', 'description': None, 'population': 200000, 'terrain': 'desert',
+          'diameter': None, 'orbital_period': None}
+
+
+def test_planet_crud_status_codes_and_bodies(client):
+    assert client.get('/planets').get_json() == {'planets': [], 'next': None}
+
+    response = client.post('/planets', json={'name': 'Tatooine', 'population': 200000, 'terrain': 'desert',
+                                             'unknown': 'ignored'})
+    assert response.status_code == 201
+    assert response.get_json() == {'message': 'Planet created successfully', 'planet': PLANET}
+
+    assert client.get('/planets').get_json() == {'planets': [PLANET], 'next': None}
+    response = client.get('/planets/1')
+    assert response.status_code == 200
+    assert response.get_json() == PLANET
+
+    response = client.put('/planets/1', json={'diameter': 10465})
+    assert response.status_code == 200
+    assert response.get_json() == {'message': 'Planet updated successfully', 'planet': dict(PLANET, diameter=10465)}
+
+    response = client.delete('/planets/1')
+    assert response.status_code == 200
+    assert response.get_json() == {'message': 'Planet deleted successfully'}
+    assert client.get('/planets/1').status_code == 404
+
+
+@pytest.mark.parametrize('body, message', [
+    ([1], 'Body must be a JSON object'),
+    ('not json', 'Body must be a JSON object'),
+    ({'population': 'many'}, 'population must be an integer'),
+])
+def test_planet_invalid_body_is_400(client, body, message):
+    if isinstance(body, str):
+        response = client.post('/planets', data=body, content_type='application/json')
+    else:
+        response = client.post('/planets', json=body)
+    assert response.status_code == 400
+    assert response.get_json() == {'message': message}
+
+
+def test_planet_missing_id_is_404_on_every_item_route(client):
+    for response in (client.get('/planets/9'), client.put('/planets/9', json={'name': 'x'}),
+                     client.delete('/planets/9')):
+        assert response.status_code == 404
+        assert response.get_json() == {'message': 'Planet not found'}
+
+
+def test_planet_update_racing_another_write_is_409(client, monkeypatch):
+    from app import RESOURCES
+    from models import db
+    client.post('/planets', json={'name': 'Tatooine'})
+    planets = next(resource for resource in RESOURCES if resource.plural == 'planets')
+    parse_body = planets.parse_body
+
+    def parse_body_after_another_write():
+        # Another request commits its update between our read and our write
+        with db.engine.begin() as connection:
+            connection.execute(db.text('UPDATE planet SET version = version + 1 WHERE id = 1'))
+        return parse_body()
+
+    monkeypatch.setattr(planets, 'parse_body', parse_body_after_another_write)
+    response = client.put('/planets/1', json={'name': 'Hoth'})
+    assert response.status_code == 409
+    assert response.get_json()['message'] == 'Planet was modified by another request, retry'
+
+
+def test_planet_favorite_crud_keeps_the_planet_id_key(client, user_and_planet):
+    assert client.get('/planet-favorite-lists').get_json() == {'favorite_lists': [], 'next': None}
+
+    # Written as planet_id, served as Planet_id (the key the clients already read)
+    response = client.post('/planet-favorite-lists', json={'user_id': 1, 'planet_id': 1})
+    assert response.status_code == 201
+    favorite = {'id': 1, 'Planet_id': 1, 'user_id': 1}
+    assert response.get_json() == {'message': 'Planet favorite list created successfully', 'favorite_list': favorite}
+    assert client.get('/planet-favorite-lists').get_json() == {'favorite_lists': [favorite], 'next': None}
+    assert client.get('/planet-favorite-lists/1').get_json() == favorite
+    assert client.get('/planets/popular').get_json()['planets'][0]['favorite_count'] == 1
+
+    response = client.post('/planet-favorite-lists', json={'user_id': 1, 'planet_id': 1})
+    assert response.status_code == 409
+    assert response.get_json() == {'message': 'Planet is already in this user favorites'}
+
+    response = client.put('/planet-favorite-lists/1', json={'planet_id': 'x'})
+    assert response.status_code == 400
+    assert response.get_json() == {'message': 'planet_id must be an integer'}
+
+    client.post('/planets', json={'name': 'Hoth'})
+    response = client.put('/planet-favorite-lists/1', json={'planet_id': 2})
+    assert response.status_code == 200
+    assert response.get_json() == {'message': 'Planet favorite list updated successfully',
+                                   'favorite_list': dict(favorite, Planet_id=2)}
+    assert [planet['id'] for planet in client.get('/planets/popular').get_json()['planets']] == [2]
+
+    response = client.delete('/planet-favorite-lists/1')
+    assert response.status_code == 200
+    assert response.get_json() == {'message': 'Planet favorite list deleted successfully'}
+    assert client.get('/planets/popular').get_json() == {'planets': []}
+    response = client.delete('/planet-favorite-lists/1')
+    assert response.status_code == 404
+    assert response.get_json() == {'message': 'Planet favorite list not found'}
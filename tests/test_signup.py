@@ -0,0 +1,26 @@
+def signup(client, **body):
+    return client.post('/signup', json=dict({'password': 'secret'}, **body))
+
+
+def test_duplicate_email_and_username_are_409_naming_the_field(client):
+    assert signup(client, email='username@x.com', username='first').status_code == 201
+
+    response = signup(client, email='username@x.com', username='second')
+    assert response.status_code == 409
+    assert response.get_json() == {'error': 'Email already exists.'}
+
+    response = signup(client, email='other@x.com', username='first')
+    assert response.status_code == 409
+    assert response.get_json() == {'error': 'Username already exists.'}
+
+
+def test_idempotency_key_replays_the_first_response(client):
+    headers = {'Idempotency-Key': 'signup-1'}
+    first = client.post('/signup', json={'email': 'a@x.com', 'password': 'secret'}, headers=headers)
+    again = client.post('/signup', json={'email': 'a@x.com', 'password': 'secret'}, headers=headers)
+    assert first.status_code == again.status_code == 201
+    assert again.headers['Idempotent-Replayed'] == 'true'
+    assert again.get_json() == first.get_json()
+
+    other = client.post('/signup', json={'email': 'b@x.com', 'password': 'secret'}, headers=headers)
+    assert other.status_code == 422
@@ -0,0 +1,85 @@
+import json
+from datetime import datetime
+
+import pytest
+
+from models import db, Planet
+from snapshot import catalog_snapshot
+
+TERRAINS = ['desert', 'tundra', None, 'jungle']
+
+
+@pytest.fixture
+def planets(app):
+    # More than two default pages, with ties and NULLs in every sortable column
+    db.session.add_all([Planet(name='Planet %03d' % (index % 97), terrain=TERRAINS[index % 4],
+                               population=None if index % 5 == 0 else (index * 7919) % 1000,
+                               diameter=(index * 31) % 50, orbital_period=None if index % 3 else index)
+                        for index in range(250)])
+    db.session.commit()
+
+
+@pytest.fixture
+def snapshot(monkeypatch):
+    monkeypatch.setattr(catalog_snapshot, 'enabled', True)
+    monkeypatch.setattr(catalog_snapshot, '_tables', {})
+    monkeypatch.setattr(catalog_snapshot, '_checked_at', {})
+    monkeypatch.setattr(catalog_snapshot, 'check_seconds', 0)
+    return catalog_snapshot
+
+
+def fetch(client, url, headers=None):
+    response = client.get(url, headers=headers)
+    body = json.loads(response.get_data()) if response.get_data() else None
+    return response.status_code, body, response.headers.get('ETag'), response.headers.get('Last-Modified')
+
+
+def both(client, snapshot, url, headers=None):
+    snapshot.enabled = False
+    from_db = fetch(client, url, headers)
+    snapshot.enabled = True
+    return from_db, fetch(client, url, headers)
+
+
+URLS = [
+    '/planets', '/planets?after=100', '/planets?after=200', '/planets?after=37', '/planets?limit=7&after=5',
+    '/planets?limit=1000', '/planets?fields=name,population', '/planets?terrain=desert&population_gt=500',
+    '/planets?terrain_ne=desert&diameter_lte=10&limit=20', '/planets?population=0',
+    '/planets/5', '/planets/250', '/planets/999', '/planets/5?fields=name',
+]
+
+
+@pytest.mark.parametrize('url', URLS)
+def test_snapshot_answers_like_the_database(client, planets, snapshot, url):
+    from_db, from_snapshot = both(client, snapshot, url)
+    assert from_snapshot == from_db
+
+
+@pytest.mark.parametrize('sort', ['population', '-population', 'diameter', '-orbital_period'])
+def test_sorted_pages_match_all_the_way(client, planets, snapshot, sort):
+    url = '/planets?sort=%s&limit=40&terrain_ne=jungle' % sort
+    while url:
+        from_db, from_snapshot = both(client, snapshot, url)
+        assert from_snapshot == from_db
+        next_cursor = from_db[1]['next']
+        url = '/planets?sort=%s&limit=40&terrain_ne=jungle&after=%s' % (sort, next_cursor) if next_cursor else None
+
+
+def test_snapshot_honours_the_database_etags(client, planets, snapshot):
+    for url in ('/planets', '/planets/5'):
+        etag = fetch(client, url)[2]
+        from_db, from_snapshot = both(client, snapshot, url, {'If-None-Match': etag})
+        assert from_db[0] == from_snapshot[0] == 304
+
+
+def test_snapshot_follows_writes_from_this_and_other_workers(client, planets, snapshot):
+    client.put('/planets/5', json={'name': 'Renamed'})
+    assert fetch(client, '/planets/5')[1]['name'] == 'Renamed'
+
+    # Another worker's write: noticed through the table fingerprint
+    with db.engine.begin() as connection:
+        connection.execute(db.update(Planet.__table__).where(Planet.id == 6).values(
+            name='Elsewhere', version=Planet.version + 1, updated_at=datetime.utcnow()))
+    from_db, from_snapshot = both(client, snapshot, '/planets/6')
+    assert from_snapshot == from_db
+    assert from_snapshot[1]['name'] == 'Elsewhere'
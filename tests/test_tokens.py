@@ -0,0 +1,38 @@
+from datetime import datetime, timedelta
+
+from models import db, RevokedToken
+from tokens import Denylist
+
+
+def add_revocation(row_id, jti, created_at):
+    db.session.add(RevokedToken(id=row_id, jti=jti, token_type='access', created_at=created_at,
+                                expires_at=datetime.utcnow() + timedelta(hours=1)))
+    db.session.commit()
+
+
+def test_sync_picks_up_revocations_committed_out_of_order(app):
+    denylist = Denylist(capacity=100)
+    add_revocation(10, 'first', datetime.utcnow())
+    denylist.sync(force=True)
+    assert denylist.is_revoked('first')
+
+    # Its transaction got a lower id and timestamp, but committed after the last sync
+    add_revocation(5, 'late', datetime.utcnow() - timedelta(seconds=10))
+    denylist.sync(force=True)
+    assert denylist.is_revoked('late')
+    assert not denylist.is_revoked('never')
+
+
+def test_prune_drops_expired_revocations_without_touching_the_session(app):
+    denylist = Denylist(capacity=100)
+    db.session.add(RevokedToken(jti='expired', token_type='access', expires_at=datetime.utcnow() - timedelta(hours=1)))
+    db.session.commit()
+    pending = RevokedToken(jti='pending', token_type='access', expires_at=datetime.utcnow() + timedelta(hours=1))
+    db.session.add(pending)
+
+    denylist.sync(force=True)
+
+    assert pending in db.session.new  # the request's unit of work was not committed
+    db.session.rollback()
+    assert db.session.scalars(db.select(RevokedToken.jti)).all() == []
+    assert not denylist.is_revoked('expired')